@@ -0,0 +1,270 @@
+import base64
+import datetime
+import json
+from collections import OrderedDict
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    커서 값 인코딩 (DjangoJSONEncoder는 마이크로초를 밀리초로 자르므로 전체 값 유지)
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    키셋(커서) 페이지네이션
+    - 쿼리셋 정렬 컬럼 + pk(tie-breaker) 값으로 다음 페이지 위치를 표현하므로 OFFSET, COUNT(*) 없이 조회
+    - ?cursor= 파라미터가 있을 때만 페이지네이션 (없으면 기존처럼 전체 목록 반환)
+    - ?count=exact 전체 개수, ?count=approx 근사 개수 (깊은 페이지도 첫 페이지와 동일한 비용)
+    정렬 컬럼은 NULL 값이 없어야 합니다. (nullable, LEFT JOIN 컬럼은 Coalesce annotation 으로 정렬)
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+    # approx 모드에서 개수를 세는 최대 행 수
+    approximate_count_limit = 1000
+    invalid_cursor_message = "Invalid cursor"
+
+    def is_requested(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.page_model = queryset.model
+        self.annotations = queryset.query.annotations
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.get_order_by(self.ordering))
+        self.count = self.get_count(queryset, request)
+
+        values, reverse = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self.get_position_filter(values, reverse))
+        if reverse:
+            queryset = queryset.order_by(*self.get_order_by(self.ordering, reverse=True))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        self.has_next = has_more if not reverse else True
+        self.has_previous = (values is not None) if not reverse else has_more
+        return results
+
+    def paginate_first_page(self, queryset, request, url):
+        """
+        다른 응답(상품 상세 등)에 목록 첫 페이지를 포함할 때 사용
+        (첫 페이지 목록, url 기준 다음 페이지 링크) 반환
+        """
+        self.request = request
+        self.page_model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        results = list(queryset.order_by(*self.get_order_by(self.ordering))[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        if len(results) <= self.page_size:
+            return self.page, None
+        next_link = replace_query_param(
+            request.build_absolute_uri(url), self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+        return self.page, next_link
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """
+        쿼리셋 정렬 조건을 (필드명, 내림차순 여부) 목록으로 변환, 마지막에 pk 추가
+        """
+        order_by = list(queryset.query.order_by)
+        if not order_by and queryset.query.default_ordering:
+            order_by = list(queryset.model._meta.ordering)
+
+        ordering = []
+        for item in order_by:
+            if isinstance(item, str):
+                ordering.append((item.lstrip("-"), item.startswith("-")))
+            elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+                ordering.append((item.expression.name, item.descending))
+            elif isinstance(item, F):
+                ordering.append((item.name, False))
+            else:
+                raise ValueError("KeysetPagination은 필드명 정렬만 지원합니다.")
+
+        pk_name = queryset.model._meta.pk.name
+        if not any(
+            field in ("pk", pk_name) or self.is_unique_field(queryset.model, field) for field, descending in ordering
+        ):
+            descending = ordering[-1][1] if ordering else True
+            ordering.append(("pk", descending))
+        return ordering
+
+    def get_order_by(self, ordering, reverse=False):
+        return [
+            f"-{field}" if descending != reverse else field
+            for field, descending in ordering
+        ]
+
+    def get_position_filter(self, values, reverse=False):
+        """
+        (a, b, pk) > (va, vb, vpk) 형태의 사전식 비교 조건 생성
+        """
+        position = Q()
+        equals = Q()
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = "lt" if descending != reverse else "gt"
+            position |= equals & Q(**{f"{field}__{lookup}": value})
+            equals &= Q(**{field: value})
+        return position
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        self.count_is_estimate = False
+        if mode == "exact":
+            return queryset.count()
+        if mode == "approx":
+            return self.get_approximate_count(queryset)
+        return None
+
+    def get_approximate_count(self, queryset):
+        """
+        Postgres : 실행 계획의 예상 행 수
+        그 외 : approximate_count_limit 까지만 카운트
+        """
+        self.count_is_estimate = True
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql":
+            sql, params = queryset.order_by().query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+
+        count = queryset.order_by()[: self.approximate_count_limit + 1].count()
+        self.count_is_estimate = count > self.approximate_count_limit
+        return min(count, self.approximate_count_limit)
+
+    def get_value(self, instance, field):
+        if field == "pk":
+            return instance.pk
+        value = instance
+        for attribute in field.split("__"):
+            value = getattr(value, attribute, None)
+        return value
+
+    def is_unique_field(self, model, field):
+        """
+        행마다 값이 다른 컬럼인지 (1:1 관계를 따라간 unique 컬럼 포함, 정렬에 있으면 pk tie-breaker 생략)
+        """
+        try:
+            for part in field.split("__")[:-1]:
+                relation = model._meta.get_field(part)
+                if not relation.one_to_one:
+                    return False
+                model = relation.related_model
+            return model._meta.get_field(field.split("__")[-1]).unique
+        except (FieldDoesNotExist, AttributeError):
+            return False
+
+    def get_model_field(self, model, field):
+        if field == "pk":
+            return model._meta.pk
+        if field in getattr(self, "annotations", {}):
+            return getattr(self.annotations[field], "output_field", None)
+        try:
+            for part in field.split("__")[:-1]:
+                model = model._meta.get_field(part).related_model
+            return model._meta.get_field(field.split("__")[-1])
+        except (FieldDoesNotExist, AttributeError):
+            return None
+
+    def encode_cursor(self, instance, reverse=False, ordering=None):
+        """
+        instance 위치를 가리키는 커서 문자열 생성
+        """
+        ordering = ordering or self.ordering
+        data = {
+            "v": [self.get_value(instance, field) for field, descending in ordering],
+            "r": int(reverse),
+        }
+        encoded = json.dumps(data, cls=CursorJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(encoded.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values, reverse = data["v"], bool(data.get("r"))
+            if len(values) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        model = self.page_model
+        decoded = []
+        for (field, descending), value in zip(self.ordering, values):
+            if value is None:
+                # NULL 값은 비교할 수 없음 (정렬 컬럼 기본값 누락)
+                raise NotFound(self.invalid_cursor_message)
+            model_field = self.get_model_field(model, field)
+            try:
+                decoded.append(model_field.to_python(value) if model_field else value)
+            except Exception:
+                raise NotFound(self.invalid_cursor_message)
+        return decoded, reverse
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.page[0], reverse=True)
+        )
+
+    def get_paginated_response(self, data):
+        response = OrderedDict(
+            [
+                ("next", self.get_next_link()),
+                ("previous", self.get_previous_link()),
+            ]
+        )
+        if self.count is not None:
+            response["count"] = self.count
+            response["count_is_estimate"] = self.count_is_estimate
+        response["results"] = data
+        return Response(response)
@@ -102,9 +102,49 @@ else:
         }
     }
 
+# 상품 검색 백엔드
+# DatabaseSearchBackend : 역색인 테이블 + BM25 (SQLite, Postgres 공통)
+# SQLiteFTS5SearchBackend : SQLite FTS5 가상 테이블 + bm25()
+PRODUCT_SEARCH_BACKEND = os.environ.get(
+    "PRODUCT_SEARCH_BACKEND", "products.search.DatabaseSearchBackend"
+)
+
+# 상품 목록 응답 캐시 유지 시간(초)
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 60 * 5))
+
+# 포인트 달력 응답 캐시 유지 시간(초), 포인트 추가 시 사용자별로 무효화
+POINT_CALENDAR_CACHE_TIMEOUT = int(os.environ.get("POINT_CALENDAR_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# 포인트 잔액 스냅샷 보관 기간(일), 사용자별 마지막 스냅샷은 기간이 지나도 유지
+POINT_SNAPSHOT_RETENTION_DAYS = int(os.environ.get("POINT_SNAPSHOT_RETENTION_DAYS", 90))
+
+# 장바구니 재고 선점 유지 시간(초)
+STOCK_RESERVATION_TIMEOUT = int(os.environ.get("STOCK_RESERVATION_TIMEOUT", 60 * 10))
+
+# 플래시 세일 누적 차감 수량을 Product.amount 에 반영하는 단위
+FLASH_SALE_FLUSH_BATCH = int(os.environ.get("FLASH_SALE_FLUSH_BATCH", 50))
+
+# 주문 이벤트 집계 시 커밋 대기 시간(초), 이 시간이 지난 이벤트만 반영
+ORDER_EVENT_SETTLE_SECONDS = int(os.environ.get("ORDER_EVENT_SETTLE_SECONDS", 5))
+
+# 주문 이벤트 watermark 아래 빈 id 를 다시 조회하는 시간(초), 지나면 롤백된 id 로 보고 제외
+ORDER_EVENT_GAP_SECONDS = int(os.environ.get("ORDER_EVENT_GAP_SECONDS", 60 * 60))
+
+# 상품 자동완성 인덱스 전체 재생성 주기(초)
+PRODUCT_SUGGEST_MAX_AGE = int(os.environ.get("PRODUCT_SUGGEST_MAX_AGE", 60 * 10))
+
 
 env = Env()
 
+# 공유 캐시 (미설정 시 Django 기본 로컬 메모리 캐시)
+if "CACHE_REDIS_URL" in env:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": env("CACHE_REDIS_URL"),
+        }
+    }
+
 # django channels layer
 if "CHANNEL_LAYER_REDIS_URL" in env:
     channel_layer_redis = env.db_url("CHANNEL_LAYER_REDIS_URL")
@@ -122,6 +162,8 @@ if "CHANNEL_LAYER_REDIS_URL" in env:
             },
         }
     }
+    # 플래시 세일 재고 카운터 (채널 레이어와 같은 Redis 사용)
+    FLASH_SALE_REDIS = CHANNEL_LAYERS["default"]["CONFIG"]["hosts"][0]
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -212,6 +254,8 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "anon": "150/minute",
         "user": "200/minute",
+        # 상품 이름 자동완성 (입력마다 호출)
+        "suggest": "600/minute",
     },
 }
 
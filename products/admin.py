@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, Review
+from .models import Category, Product, Review, FlashSale
 
 
 class CategoryAdmin(admin.ModelAdmin):
@@ -21,3 +21,10 @@ class ReviewAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Review, ReviewAdmin)
+
+
+class FlashSaleAdmin(admin.ModelAdmin):
+    list_display = ["product", "is_active", "started_at", "flushed_amount"]
+
+
+admin.site.register(FlashSale, FlashSaleAdmin)
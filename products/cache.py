@@ -0,0 +1,116 @@
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+class CatalogCache:
+    """
+    상품 목록 응답 캐시
+    캐시 키에 카탈로그 버전을 포함하고, 상품/리뷰/찜/판매량 변경, 품절 시 버전만 올려 전체 무효화
+    주문마다 바뀌는 남은 재고 수량은 캐시 유지 시간(CATALOG_CACHE_TIMEOUT) 동안 이전 값일 수 있음
+    로컬 메모리 캐시, Redis 등 공유 캐시 모두 동일하게 동작
+    """
+
+    version_key = "catalog:version"
+    hits_key = "catalog:hits"
+    misses_key = "catalog:misses"
+
+    @classmethod
+    def get_timeout(cls):
+        return getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 5)
+
+    @classmethod
+    def get_version(cls):
+        """
+        현재 카탈로그 버전, 없다면 현재 시각(ms)으로 초기화
+        (캐시에서 버전이 사라져도 이전 버전과 겹치지 않도록)
+        """
+        version = cache.get(cls.version_key)
+        if version is None:
+            cache.add(cls.version_key, int(time.time() * 1000), None)
+            version = cache.get(cls.version_key)
+        return version
+
+    @classmethod
+    def bump_version(cls):
+        """
+        카탈로그 버전 증가 (즉시 + 트랜잭션 커밋 후)
+        커밋 전 다른 요청이 이전 데이터를 새 버전으로 캐시하는 경우를 막기 위해 커밋 후 한번 더 증가
+        """
+        cls._incr_version()
+        transaction.on_commit(cls._incr_version)
+
+    @classmethod
+    def _incr_version(cls):
+        try:
+            cache.incr(cls.version_key)
+        except ValueError:
+            cls.get_version()
+
+    @classmethod
+    def count(cls, key):
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, 1, None)
+
+    @classmethod
+    def get_stats(cls):
+        hits = cache.get(cls.hits_key, 0)
+        misses = cache.get(cls.misses_key, 0)
+        total = hits + misses
+        return {
+            "version": cls.get_version(),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0,
+        }
+
+    @classmethod
+    def get_key(cls, name, request):
+        """
+        정규화된 쿼리 파라미터(정렬, 공백 제거, 빈 값 제외)로 캐시 키 생성
+        """
+        params = sorted(
+            (key, value.strip())
+            for key, values in request.query_params.lists()
+            for value in values
+            if value.strip()
+        )
+        return f"catalog:{cls.get_version()}:{name}:{urlencode(params)}"
+
+    @classmethod
+    def is_cacheable(cls, request):
+        # 비로그인 GET 요청만 캐시
+        return request.method == "GET" and not request.user.is_authenticated
+
+
+class CatalogCacheMixin:
+    """
+    ListAPIView 응답 캐시
+    """
+
+    catalog_cache_name = None
+
+    def list(self, request, *args, **kwargs):
+        if not CatalogCache.is_cacheable(request):
+            return super().list(request, *args, **kwargs)
+
+        key = CatalogCache.get_key(self.catalog_cache_name or self.__class__.__name__, request)
+        data = cache.get(key)
+        if data is not None:
+            CatalogCache.count(CatalogCache.hits_key)
+            response = Response(data)
+            response["X-Catalog-Cache"] = "HIT"
+            return response
+
+        CatalogCache.count(CatalogCache.misses_key)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, CatalogCache.get_timeout())
+        response["X-Catalog-Cache"] = "MISS"
+        return response
@@ -0,0 +1,315 @@
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Sum, Value, When
+from django.utils import timezone
+from .cache import CatalogCache
+
+
+class LocalCounterStore:
+    """
+    프로세스 내부 카운터 (단일 프로세스 개발, 테스트용)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        with self.lock:
+            self.values[key] = value
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.values.pop(key, None)
+
+    def incr(self, key, amount):
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+            return self.values[key]
+
+    def claim(self, stock_key, amount):
+        """
+        재고 카운터가 amount 이상이면 차감
+        1 : 성공, 0 : 재고 부족, -1 : 카운터 없음
+        """
+        with self.lock:
+            stock = self.values.get(stock_key)
+            if stock is None:
+                return -1
+            if stock < amount:
+                return 0
+            self.values[stock_key] = stock - amount
+            return 1
+
+
+class RedisCounterStore:
+    """
+    Redis 카운터 (여러 프로세스, 서버 공유)
+    확인과 차감은 Lua 스크립트로 원자적으로 처리
+    """
+
+    claim_script = """
+    local stock = redis.call('GET', KEYS[1])
+    if not stock then return -1 end
+    if tonumber(stock) < tonumber(ARGV[1]) then return 0 end
+    redis.call('DECRBY', KEYS[1], ARGV[1])
+    return 1
+    """
+
+    def __init__(self, host, port=6379, password=None):
+        import redis
+
+        self.client = redis.Redis(host=host, port=port, password=password or None)
+        self.claim_command = self.client.register_script(self.claim_script)
+
+    def get(self, key):
+        value = self.client.get(key)
+        return int(value) if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(key, value)
+
+    def delete(self, *keys):
+        self.client.delete(*keys)
+
+    def incr(self, key, amount):
+        return self.client.incrby(key, amount)
+
+    def claim(self, stock_key, amount):
+        return int(self.claim_command(keys=[stock_key], args=[amount]))
+
+
+_stores = {}
+# 진행 중인 release_on_error 범위별 카운터 차감 목록
+_claim_scopes = threading.local()
+
+
+def get_counter_store():
+    """
+    settings.FLASH_SALE_REDIS(CHANNEL_LAYER_REDIS_URL 설정 시)가 있으면 Redis, 없으면 프로세스 내부 카운터
+    """
+    redis_config = getattr(settings, "FLASH_SALE_REDIS", None)
+    key = "redis" if redis_config else "local"
+    if key not in _stores:
+        _stores[key] = RedisCounterStore(**redis_config) if redis_config else LocalCounterStore()
+    return _stores[key]
+
+
+class FlashSaleCounter:
+    """
+    플래시 세일 재고 카운터
+    세일 중인 상품은 주문 시 상품 row 대신 카운터에서 재고를 차감하고,
+    누적 차감 수량(claimed) 중 아직 반영하지 않은 만큼을 모아서 Product.amount 에 반영(write-behind)
+    누적 차감 수량은 주문 트랜잭션 커밋 후에만 증가하므로 롤백된 주문은 Product.amount 에 반영되지 않음
+    카운터가 사라졌다면(재시작 등) 세일 시작 이후 주문상품으로 누적 차감 수량을 다시 계산해 복구
+    """
+
+    @classmethod
+    def get_flush_batch(cls):
+        return getattr(settings, "FLASH_SALE_FLUSH_BATCH", 50)
+
+    @classmethod
+    def get_keys(cls, product_id):
+        return f"flashsale:{product_id}:stock", f"flashsale:{product_id}:claimed"
+
+    @classmethod
+    def get_active_product_ids(cls, product_ids):
+        from .models import FlashSale
+
+        return set(
+            FlashSale.objects.filter(product_id__in=product_ids, is_active=True).values_list("product_id", flat=True)
+        )
+
+    @classmethod
+    def get_stock(cls, product_id):
+        """
+        카운터의 남은 재고 (카운터가 없다면 None)
+        """
+        return get_counter_store().get(cls.get_keys(product_id)[0])
+
+    @classmethod
+    @transaction.atomic
+    def start(cls, product_id):
+        """
+        플래시 세일 시작, 현재 재고로 카운터 초기화
+        """
+        from .models import FlashSale, Product
+
+        product = Product.objects.select_for_update().get(pk=product_id)
+        flash_sale, created = FlashSale.objects.update_or_create(
+            product=product, defaults={"is_active": True, "started_at": timezone.now(), "flushed_amount": 0}
+        )
+        stock_key, claimed_key = cls.get_keys(product_id)
+        store = get_counter_store()
+        store.set(claimed_key, 0)
+        store.set(stock_key, product.amount or 0)
+        return flash_sale
+
+    @classmethod
+    @contextmanager
+    def release_on_error(cls):
+        """
+        범위 안에서 예외가 발생하면(트랜잭션 롤백) 범위 안에서 차감한 카운터 수량 복구
+        정상 종료 시 차감 목록은 바깥 범위로 넘겨 바깥 범위 롤백 시에도 복구
+        """
+        scopes = _claim_scopes.__dict__.setdefault("stack", [])
+        claims = []
+        scopes.append(claims)
+        try:
+            yield
+        except BaseException:
+            scopes.pop()
+            for product_id, amount in claims:
+                cls.release(product_id, amount)
+            raise
+        scopes.pop()
+        if scopes:
+            scopes[-1].extend(claims)
+
+    @classmethod
+    def claim(cls, product_id, amount):
+        """
+        카운터에서 재고 차감, 성공 여부 반환
+        누적 차감 수량은 트랜잭션 커밋 후 증가 (confirm)
+        """
+        stock_key, claimed_key = cls.get_keys(product_id)
+        store = get_counter_store()
+        result = store.claim(stock_key, amount)
+        if result == -1:
+            cls.reconcile(product_id)
+            result = store.claim(stock_key, amount)
+        if result != 1:
+            return False
+
+        scopes = getattr(_claim_scopes, "stack", None)
+        if scopes:
+            scopes[-1].append((product_id, amount))
+        transaction.on_commit(lambda: cls.confirm(product_id, amount))
+        return True
+
+    @classmethod
+    def confirm(cls, product_id, amount):
+        """
+        커밋된 주문의 차감 수량을 누적 차감 수량에 반영, 반영 단위 이상 쌓이면 Product.amount 에 반영
+        """
+        from .models import FlashSale
+
+        stock_key, claimed_key = cls.get_keys(product_id)
+        claimed = get_counter_store().incr(claimed_key, amount)
+        flushed_amount = FlashSale.objects.filter(product_id=product_id).values_list("flushed_amount", flat=True).first()
+        if claimed - (flushed_amount or 0) >= cls.get_flush_batch():
+            cls.flush(product_id)
+
+    @classmethod
+    def release(cls, product_id, amount):
+        """
+        차감 취소 (주문 실패, 롤백), 커밋 전이므로 누적 차감 수량은 그대로
+        """
+        stock_key, claimed_key = cls.get_keys(product_id)
+        store = get_counter_store()
+        if store.get(stock_key) is None:
+            return
+        store.incr(stock_key, amount)
+
+    @classmethod
+    def restock(cls, product_id, amount):
+        """
+        환불, 주문취소로 Product.amount 에 복구된 수량을 카운터에도 반영
+        """
+        stock_key, claimed_key = cls.get_keys(product_id)
+        store = get_counter_store()
+        if store.get(stock_key) is not None:
+            store.incr(stock_key, amount)
+
+    @classmethod
+    @transaction.atomic
+    def flush(cls, product_id):
+        """
+        아직 반영하지 않은 누적 차감 수량을 Product.amount 에 반영, 반영한 수량 반환
+        """
+        from .models import FlashSale, Product
+
+        flash_sale = FlashSale.objects.select_for_update().filter(product_id=product_id).first()
+        if flash_sale is None:
+            return 0
+        stock_key, claimed_key = cls.get_keys(product_id)
+        claimed = get_counter_store().get(claimed_key)
+        if claimed is None:
+            return 0
+        delta = claimed - flash_sale.flushed_amount
+        if delta:
+            updated = Product.objects.filter(pk=product_id, amount__gte=delta).update(
+                amount=F("amount") - delta,
+                item_state=Case(
+                    When(Q(amount=delta, item_state=1), then=Value(2)),
+                    When(Q(amount__gt=delta, item_state=2), then=Value(1)),
+                    default=F("item_state"),
+                    output_field=PositiveIntegerField(),
+                ),
+            )
+            if not updated:
+                # 세일 중 재고 수정 등으로 재고가 차감 수량보다 적다면 0(품절)으로 맞추고 카운터도 0으로 설정
+                Product.objects.filter(pk=product_id).update(
+                    amount=0,
+                    item_state=Case(When(item_state=1, then=Value(2)), default=F("item_state"),
+                                    output_field=PositiveIntegerField()),
+                )
+                get_counter_store().set(stock_key, 0)
+            flash_sale.flushed_amount = claimed
+            flash_sale.save(update_fields=["flushed_amount", "updated_at"])
+            CatalogCache.bump_version()
+        return delta
+
+    @classmethod
+    @transaction.atomic
+    def reconcile(cls, product_id):
+        """
+        카운터 복구, 세일 시작 이후 주문상품 수량을 누적 차감 수량으로 보고 미반영분을 Product.amount 에 반영 후
+        남은 재고로 카운터 초기화
+        """
+        from .models import FlashSale, Product
+        from users.models import OrderItem
+
+        flash_sale = FlashSale.objects.select_for_update().filter(product_id=product_id, is_active=True).first()
+        if flash_sale is None:
+            return None
+        claimed = OrderItem.objects.filter(
+            product_id=product_id, created_at__gte=flash_sale.started_at
+        ).aggregate(total=Sum("amount"))["total"] or 0
+        stock_key, claimed_key = cls.get_keys(product_id)
+        store = get_counter_store()
+        store.set(claimed_key, claimed)
+        cls.flush(product_id)
+        amount = Product.objects.filter(pk=product_id).values_list("amount", flat=True).first() or 0
+        store.set(stock_key, amount)
+        return claimed
+
+    @classmethod
+    @transaction.atomic
+    def end(cls, product_id):
+        """
+        플래시 세일 종료, 남은 차감 수량 반영 후 카운터 삭제
+        """
+        from .models import FlashSale
+
+        cls.flush(product_id)
+        FlashSale.objects.filter(product_id=product_id).update(is_active=False, updated_at=timezone.now())
+        get_counter_store().delete(*cls.get_keys(product_id))
+
+    @classmethod
+    def flush_all(cls):
+        """
+        진행 중인 모든 플래시 세일 반영 (crontab, 관리 명령)
+        """
+        from .models import FlashSale
+
+        return {
+            product_id: cls.flush(product_id)
+            for product_id in FlashSale.objects.filter(is_active=True).values_list("product_id", flat=True)
+        }
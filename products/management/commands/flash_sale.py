@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from products.flashsale import FlashSaleCounter
+
+
+class Command(BaseCommand):
+    """
+    플래시 세일 시작, 종료, 차감 수량 반영, 카운터 복구
+    python manage.py flash_sale start|end|flush|reconcile [--product <id> ...]
+    """
+
+    help = "플래시 세일 재고 카운터를 관리합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["start", "end", "flush", "reconcile"])
+        parser.add_argument("--product", type=int, nargs="*", dest="product_ids", help="대상 상품 id")
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        product_ids = options.get("product_ids") or []
+
+        if action == "flush" and not product_ids:
+            flushed = FlashSaleCounter.flush_all()
+            self.stdout.write(self.style.SUCCESS(f"{len(flushed)}개 플래시 세일 반영 완료 ({sum(flushed.values())}개)"))
+            return
+
+        if not product_ids:
+            self.stdout.write(self.style.ERROR("--product 를 지정해주세요."))
+            return
+
+        for product_id in product_ids:
+            if action == "start":
+                FlashSaleCounter.start(product_id)
+                self.stdout.write(f"product {product_id}: 플래시 세일 시작")
+            elif action == "end":
+                FlashSaleCounter.end(product_id)
+                self.stdout.write(f"product {product_id}: 플래시 세일 종료")
+            elif action == "flush":
+                self.stdout.write(f"product {product_id}: {FlashSaleCounter.flush(product_id)}개 반영")
+            else:
+                claimed = FlashSaleCounter.reconcile(product_id)
+                self.stdout.write(f"product {product_id}: 누적 차감 수량 {claimed}")
+        self.stdout.write(self.style.SUCCESS("완료"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from products.models import ProductStatistic
+
+
+class Command(BaseCommand):
+    """
+    상품 통계(ProductStatistic) 재계산 및 검증
+    python manage.py rebuild_product_statistics [--verify | --repair] [--product <id> ...]
+    """
+
+    help = "상품 통계 테이블을 원본 데이터로 재계산하거나 검증합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="재계산 없이 불일치 항목만 출력")
+        parser.add_argument("--repair", action="store_true", help="전체 상품을 나눠 검증하고 불일치 항목만 재계산")
+        parser.add_argument("--product", type=int, nargs="*", dest="product_ids", help="대상 상품 id")
+
+    def handle(self, *args, **options):
+        product_ids = options.get("product_ids") or None
+
+        if options["verify"]:
+            mismatches = ProductStatistic.objects.verify(product_ids)
+            for product_id, stored, expected in mismatches:
+                self.stdout.write(f"product {product_id}: stored={stored} expected={expected}")
+            if mismatches:
+                self.stdout.write(self.style.ERROR(f"{len(mismatches)}개 상품 통계 불일치"))
+            else:
+                self.stdout.write(self.style.SUCCESS("상품 통계 일치"))
+            return
+
+        if options["repair"]:
+            repaired = ProductStatistic.objects.repair()
+            self.stdout.write(self.style.SUCCESS(f"{len(repaired)}개 상품 통계 재계산 완료"))
+            return
+
+        with transaction.atomic():
+            count = ProductStatistic.objects.rebuild(product_ids)
+        self.stdout.write(self.style.SUCCESS(f"{count}개 상품 통계 재계산 완료"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    상품 검색 색인 재생성
+    python manage.py rebuild_search_index
+    """
+
+    help = "삭제됨(6) 상태를 제외한 전체 상품의 검색 색인을 재생성합니다."
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(item_state=6).only("id", "name", "content").iterator()
+        count = get_search_backend().rebuild(products)
+        self.stdout.write(self.style.SUCCESS(f"{count}개 상품 검색 색인 완료"))
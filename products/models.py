@@ -1,5 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+import itertools
+import math
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from config.models import CommonModel, img_upload_to
+from .cache import CatalogCache
 
 
 class Category(models.Model):
@@ -82,3 +88,366 @@ class Review(CommonModel):
 
     class Meta:
         ordering = ["-updated_at"]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        수정 전 별점, 평가 기록 (통계 증감량 계산용)
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_summary = instance.get_summary()
+        return instance
+
+    def get_summary(self):
+        """
+        리뷰 요약 통계에 반영되는 값 (별점, 배송/서비스/피드백 평가)
+        """
+        return {
+            "star": self.star,
+            "delivery": self.delivery_evaluation,
+            "service": self.service_evaluation,
+            "feedback": self.feedback_evaluation,
+        }
+
+
+class ProductStatisticManager(models.Manager):
+    """
+    상품 통계 증분 갱신 및 재계산
+    """
+
+    def apply(self, product_id, create_missing=True, **deltas):
+        """
+        통계 컬럼에 증감량 반영
+        통계가 없는 상품이라면 원본 데이터로 재계산
+        """
+        deltas = {key: value for key, value in deltas.items() if value}
+        if not deltas:
+            return
+        changes = {key: F(key) + value for key, value in deltas.items()}
+        if "review_count" in deltas or "star_sum" in deltas:
+            # 평균 별점 정렬 컬럼 동시 갱신 (UPDATE 우변은 변경 전 값 기준)
+            review_count = F("review_count") + deltas.get("review_count", 0)
+            star_sum = F("star_sum") + deltas.get("star_sum", 0)
+            changes["star_average"] = Case(
+                When(review_count__gt=-deltas.get("review_count", 0),
+                     then=Cast(star_sum, FloatField()) / review_count),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        updated = self.filter(product_id=product_id).update(**changes)
+        if not updated and create_missing:
+            self.rebuild(product_ids=[product_id])
+
+    def get_fields(self):
+        """
+        통계 컬럼 목록 (상품 제외)
+        """
+        return [field.attname for field in self.model._meta.concrete_fields if not field.primary_key]
+
+    def get_review_deltas(self, summary, sign=1):
+        """
+        리뷰 1건이 통계 컬럼에 미치는 증감량
+        summary : Review.get_summary() 값, sign : 1(추가) 또는 -1(제거)
+        """
+        deltas = {"review_count": sign, "star_sum": sign * summary["star"]}
+        if summary["star"] in self.model.STARS:
+            deltas[f"star_{summary['star']}"] = sign
+        for axis in self.model.EVALUATION_AXES:
+            if summary[axis] in self.model.EVALUATIONS:
+                deltas[f"{axis}_{summary[axis]}"] = sign
+        return deltas
+
+    def apply_review(self, previous=None, current=None, product_id=None, create_missing=True):
+        """
+        리뷰 생성(previous 없음), 수정, 삭제(current 없음) 시 리뷰 요약 통계 반영
+        """
+        deltas = {}
+        for summary, sign in ((previous, -1), (current, 1)):
+            if summary is None:
+                continue
+            for key, value in self.get_review_deltas(summary, sign).items():
+                deltas[key] = deltas.get(key, 0) + value
+        self.apply(product_id, create_missing=create_missing, **deltas)
+
+    def add_sales(self, sales):
+        """
+        누적판매량 반영
+        sales : {상품 id: 판매량 증감}
+        """
+        for product_id, amount in sorted(sales.items()):
+            self.apply(product_id, sales=amount)
+
+    def calculate(self, product_ids=None):
+        """
+        원본 테이블(OrderItem, 찜 목록, Review)에서 통계 계산
+        """
+        from users.models import OrderItem, User
+
+        order_items = OrderItem.objects.filter(order_status=6)
+        wish_lists = User.product_wish_list.through.objects.all()
+        reviews = Review.objects.all()
+        products = Product.objects.all()
+        if product_ids is not None:
+            order_items = order_items.filter(product_id__in=product_ids)
+            wish_lists = wish_lists.filter(product_id__in=product_ids)
+            reviews = reviews.filter(product_id__in=product_ids)
+            products = products.filter(pk__in=product_ids)
+
+        fields = self.get_fields()
+        statistics = {
+            product_id: {field: 0 for field in fields}
+            for product_id in products.values_list("pk", flat=True)
+        }
+        for row in order_items.values("product_id").annotate(total=Sum("amount")):
+            if row["product_id"] in statistics:
+                statistics[row["product_id"]]["sales"] = row["total"] or 0
+        for row in wish_lists.values("product_id").annotate(total=Count("pk")):
+            statistics[row["product_id"]]["likes"] = row["total"]
+        # 리뷰 수, 별점 합계, 별점 분포, 평가 분포를 한번의 GROUP BY 로 계산
+        summary_counts = {f"star_{star}": Count("pk", filter=Q(star=star)) for star in self.model.STARS}
+        for axis in self.model.EVALUATION_AXES:
+            for evaluation in self.model.EVALUATIONS:
+                summary_counts[f"{axis}_{evaluation}"] = Count(
+                    "pk", filter=Q(**{f"{axis}_evaluation": evaluation})
+                )
+        for row in reviews.values("product_id").annotate(
+            review_count=Count("pk"), star_sum=Sum("star"), **summary_counts
+        ):
+            product_id = row.pop("product_id")
+            row["star_sum"] = row["star_sum"] or 0
+            row["star_average"] = row["star_sum"] / row["review_count"]
+            statistics[product_id].update(row)
+        return statistics
+
+    def rebuild(self, product_ids=None):
+        """
+        통계 재계산 후 저장, 저장한 상품 수 반환
+        """
+        statistics = self.calculate(product_ids)
+        objects = [
+            self.model(product_id=product_id, **values)
+            for product_id, values in statistics.items()
+        ]
+        self.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=self.get_fields(),
+        )
+        return len(objects)
+
+    def verify(self, product_ids=None):
+        """
+        저장된 통계와 원본 데이터 비교, 불일치 목록 반환
+        """
+        expected = self.calculate(product_ids)
+        stored = {
+            row["product_id"]: row
+            for row in self.filter(product_id__in=expected.keys()).values("product_id", *self.get_fields())
+        }
+        mismatches = []
+        for product_id, values in expected.items():
+            current = stored.get(product_id)
+            if current is None or any(
+                not math.isclose(current[key], value) for key, value in values.items()
+            ):
+                mismatches.append((product_id, current, values))
+        return mismatches
+
+    def repair(self, batch_size=500):
+        """
+        상품을 batch_size 개씩 나눠 검증하고 불일치한 상품만 재계산, 재계산한 상품 id 목록 반환
+        """
+        product_ids = Product.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=batch_size)
+        repaired = []
+        while batch := list(itertools.islice(product_ids, batch_size)):
+            drifted = [product_id for product_id, stored, expected in self.verify(batch)]
+            if drifted:
+                self.rebuild(drifted)
+                repaired += drifted
+        return repaired
+
+
+class ProductStatistic(models.Model):
+    """
+    상품 통계 (목록, 상세 조회 시 O(1) 조회)
+    구매확정(6) 판매량, 찜 수, 리뷰 수, 별점 합계, 리뷰 요약(별점 분포, 배송/서비스/피드백 평가 분포)
+    sales, likes, star_average 는 상품 정렬(판매량, 인기, 별점순) 인덱스 컬럼
+    """
+
+    STARS = [1, 2, 3, 4, 5]
+    EVALUATION_AXES = ["delivery", "service", "feedback"]
+    EVALUATIONS = ["good", "normal", "bad"]
+
+    product = models.OneToOneField(
+        "products.Product", related_name="statistic", on_delete=models.CASCADE, primary_key=True
+    )
+    sales = models.IntegerField("누적판매량", default=0)
+    likes = models.IntegerField("찜 수", default=0)
+    review_count = models.IntegerField("리뷰 수", default=0)
+    star_sum = models.IntegerField("별점 합계", default=0)
+    star_average = models.FloatField("평균 별점", default=0)
+    star_1 = models.IntegerField("1점 리뷰 수", default=0)
+    star_2 = models.IntegerField("2점 리뷰 수", default=0)
+    star_3 = models.IntegerField("3점 리뷰 수", default=0)
+    star_4 = models.IntegerField("4점 리뷰 수", default=0)
+    star_5 = models.IntegerField("5점 리뷰 수", default=0)
+    delivery_good = models.IntegerField("배송 평가 good", default=0)
+    delivery_normal = models.IntegerField("배송 평가 normal", default=0)
+    delivery_bad = models.IntegerField("배송 평가 bad", default=0)
+    service_good = models.IntegerField("서비스 평가 good", default=0)
+    service_normal = models.IntegerField("서비스 평가 normal", default=0)
+    service_bad = models.IntegerField("서비스 평가 bad", default=0)
+    feedback_good = models.IntegerField("피드백 평가 good", default=0)
+    feedback_normal = models.IntegerField("피드백 평가 normal", default=0)
+    feedback_bad = models.IntegerField("피드백 평가 bad", default=0)
+
+    objects = ProductStatisticManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-sales", "-product"], name="statistic_sales_idx"),
+            models.Index(fields=["-likes", "-product"], name="statistic_likes_idx"),
+            models.Index(fields=["-star_average", "-product"], name="statistic_stars_idx"),
+        ]
+
+    @property
+    def stars(self):
+        """
+        평균 별점(소수점 첫째 자리), 리뷰가 없다면 0
+        """
+        return round(self.star_average, 1) if self.review_count else 0
+
+    @property
+    def star_histogram(self):
+        """
+        별점별 리뷰 수 ex) {1: 0, 2: 1, 3: 0, 4: 2, 5: 5}
+        """
+        return {star: getattr(self, f"star_{star}") for star in self.STARS}
+
+    def get_evaluation(self, axis):
+        """
+        평가 항목(delivery, service, feedback)별 good, normal, bad 리뷰 수
+        """
+        return {evaluation: getattr(self, f"{axis}_{evaluation}") for evaluation in self.EVALUATIONS}
+
+
+class FlashSale(CommonModel):
+    """
+    플래시 세일 (진행 중에는 재고를 카운터에서 차감하고 모아서 Product.amount 에 반영)
+    flushed_amount : 세일 시작 이후 Product.amount 에 반영한 누적 차감 수량
+    """
+
+    product = models.OneToOneField(
+        "products.Product", related_name="flash_sale", on_delete=models.CASCADE, primary_key=True
+    )
+    is_active = models.BooleanField("진행 여부", default=True)
+    started_at = models.DateTimeField("시작 시각")
+    flushed_amount = models.PositiveIntegerField("반영한 차감 수량", default=0)
+
+
+class ProductSearchDocument(models.Model):
+    """
+    검색 색인 문서 (상품별 토큰 길이)
+    """
+
+    product = models.OneToOneField(
+        "products.Product", related_name="search_document", on_delete=models.CASCADE, primary_key=True
+    )
+    length = models.FloatField("문서 길이", default=0)
+
+
+class ProductSearchTerm(models.Model):
+    """
+    검색 역색인 (토큰별 상품, 가중치가 반영된 출현 빈도)
+    """
+
+    term = models.CharField("토큰", max_length=100)
+    product = models.ForeignKey("products.Product", related_name="search_terms", on_delete=models.CASCADE)
+    frequency = models.FloatField("출현 빈도", default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "product"], name="unique_search_term_product"),
+        ]
+
+
+def create_product_statistic(sender, instance, created, *args, **kwargs):
+    # 상품 생성 시 통계 row 생성
+    if created:
+        ProductStatistic.objects.get_or_create(product=instance)
+
+
+def index_product(sender, instance, *args, **kwargs):
+    # 상품 저장 시 검색 색인 갱신, 삭제됨(6) 상태라면 색인에서 제거
+    from .search import get_search_backend
+
+    backend = get_search_backend()
+    if instance.item_state == 6:
+        backend.remove(instance.pk)
+    else:
+        backend.index(instance)
+
+
+def review_saved(sender, instance, created, *args, **kwargs):
+    # 리뷰 생성 및 수정 시 리뷰 수, 별점 합계, 리뷰 요약 반영
+    current = instance.get_summary()
+    previous = None if created else getattr(instance, "_loaded_summary", current)
+    ProductStatistic.objects.apply_review(previous, current, product_id=instance.product_id)
+    instance._loaded_summary = current
+
+
+def review_deleted(sender, instance, *args, **kwargs):
+    # 리뷰 삭제 시 리뷰 수, 별점 합계, 리뷰 요약 차감
+    previous = getattr(instance, "_loaded_summary", None) or instance.get_summary()
+    ProductStatistic.objects.apply_review(previous, product_id=instance.product_id, create_missing=False)
+
+
+def wish_list_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    # 상품 찜 등록, 취소 시 찜 수 반영
+    if action == "pre_remove":
+        # 실제로 찜 목록에 존재하는 항목만 차감
+        lookup = {"product_id": instance.pk, "user_id__in": pk_set} if reverse else {"user_id": instance.pk, "product_id__in": pk_set}
+        instance._removed_wish_pairs = list(sender.objects.filter(**lookup).values_list("user_id", "product_id"))
+    elif action == "pre_clear":
+        lookup = {"product_id": instance.pk} if reverse else {"user_id": instance.pk}
+        instance._removed_wish_pairs = list(sender.objects.filter(**lookup).values_list("user_id", "product_id"))
+    elif action == "post_add":
+        if reverse:
+            ProductStatistic.objects.apply(instance.pk, likes=len(pk_set))
+        else:
+            for product_id in sorted(pk_set):
+                ProductStatistic.objects.apply(product_id, likes=1)
+    elif action in ("post_remove", "post_clear"):
+        likes = {}
+        for user_id, product_id in getattr(instance, "_removed_wish_pairs", []):
+            likes[product_id] = likes.get(product_id, 0) - 1
+        for product_id, delta in sorted(likes.items()):
+            ProductStatistic.objects.apply(product_id, likes=delta)
+        instance._removed_wish_pairs = []
+
+
+def update_suggest_index(sender, instance, *args, **kwargs):
+    # 상품 저장 커밋 후 자동완성 인덱스 갱신 (롤백된 저장은 반영하지 않음)
+    from .suggest import suggest_index
+
+    transaction.on_commit(lambda: suggest_index.update(instance))
+
+
+def bump_catalog_version(sender, *args, **kwargs):
+    # 상품 목록 응답 캐시 무효화
+    if kwargs.get("action", "post_").startswith("post_"):
+        CatalogCache.bump_version()
+
+
+post_save.connect(create_product_statistic, sender=Product)
+post_save.connect(index_product, sender=Product)
+post_save.connect(update_suggest_index, sender=Product)
+post_save.connect(review_saved, sender=Review)
+post_delete.connect(review_deleted, sender=Review)
+m2m_changed.connect(wish_list_changed, sender="users.User_product_wish_list")
+
+for catalog_model in (Category, Product, Review):
+    post_save.connect(bump_catalog_version, sender=catalog_model)
+    post_delete.connect(bump_catalog_version, sender=catalog_model)
+m2m_changed.connect(bump_catalog_version, sender="users.User_product_wish_list")
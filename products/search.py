@@ -0,0 +1,238 @@
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Q
+from django.utils.module_loading import import_string
+
+
+HANGUL_PATTERN = re.compile(r"[가-힣]+")
+TOKEN_PATTERN = re.compile(r"[가-힣]+|[^\W_]+")
+
+
+def tokenize(text, unigrams=False):
+    """
+    검색용 토큰 분리
+    한글은 음절 2-gram, 그 외 문자는 단어 단위로 분리
+    unigrams=True : 한글 음절 1-gram 도 추가 (색인용, 한 글자 검색어 "빵"으로 "초코빵" 검색)
+    ex) "밀크 초콜릿 box" => ["밀크", "초콜", "콜릿", "box"]
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for word in TOKEN_PATTERN.findall(text):
+        if HANGUL_PATTERN.fullmatch(word) and len(word) > 1:
+            tokens.extend(word[index:index + 2] for index in range(len(word) - 1))
+            if unigrams:
+                tokens.extend(word)
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def is_prefix_term(term):
+    """
+    한글이 아닌 단어 토큰은 접두어로 검색 ("choco" => "chocolate")
+    """
+    return not HANGUL_PATTERN.fullmatch(term)
+
+
+class BaseSearchBackend:
+    """
+    상품 검색 백엔드 기본 클래스
+    search()는 관련도 높은 순서의 (상품 id, 점수) 목록을 반환
+    """
+
+    # 상품 이름 가중치 (BM25 필드 가중치)
+    name_weight = 2.0
+    k1 = 1.2
+    b = 0.75
+
+    def index(self, product):
+        raise NotImplementedError
+
+    def remove(self, product_id):
+        raise NotImplementedError
+
+    def search(self, query, limit=None):
+        raise NotImplementedError
+
+    def rebuild(self, products):
+        """
+        전체 색인 재생성, 색인한 상품 수 반환
+        """
+        count = 0
+        for product in products:
+            self.index(product)
+            count += 1
+        return count
+
+    def query_terms(self, query):
+        return list(dict.fromkeys(tokenize(query)))
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    ProductSearchTerm 역색인 테이블 기반 검색 (SQLite, Postgres 공통)
+    BM25 점수는 질의어 포스팅만 읽어와 파이썬에서 계산
+    """
+
+    def get_frequencies(self, product):
+        frequencies = Counter()
+        for term in tokenize(product.name, unigrams=True):
+            frequencies[term] += self.name_weight
+        for term in tokenize(product.content, unigrams=True):
+            frequencies[term] += 1
+        return frequencies
+
+    @transaction.atomic
+    def index(self, product):
+        from .models import ProductSearchDocument, ProductSearchTerm
+
+        frequencies = self.get_frequencies(product)
+        ProductSearchTerm.objects.filter(product=product).delete()
+        ProductSearchDocument.objects.update_or_create(
+            product=product, defaults={"length": sum(frequencies.values())}
+        )
+        ProductSearchTerm.objects.bulk_create(
+            ProductSearchTerm(product=product, term=term, frequency=frequency)
+            for term, frequency in frequencies.items()
+        )
+
+    @transaction.atomic
+    def remove(self, product_id):
+        from .models import ProductSearchDocument, ProductSearchTerm
+
+        ProductSearchTerm.objects.filter(product_id=product_id).delete()
+        ProductSearchDocument.objects.filter(product_id=product_id).delete()
+
+    @transaction.atomic
+    def rebuild(self, products):
+        from .models import ProductSearchDocument, ProductSearchTerm
+
+        ProductSearchTerm.objects.all().delete()
+        ProductSearchDocument.objects.all().delete()
+        return super().rebuild(products)
+
+    def search(self, query, limit=None):
+        from .models import ProductSearchDocument, ProductSearchTerm
+
+        terms = self.query_terms(query)
+        if not terms:
+            return []
+        corpus = ProductSearchDocument.objects.aggregate(total=Count("pk"), average=Avg("length"))
+        if not corpus["total"]:
+            return []
+
+        # 한글 토큰은 일치, 그 외 단어 토큰은 접두어로 조회 (색인 토큰 하나가 여러 질의어에 해당할 수 있음)
+        prefixes = [term for term in terms if is_prefix_term(term)]
+        condition = Q(term__in=[term for term in terms if not is_prefix_term(term)])
+        for prefix in prefixes:
+            condition |= Q(term__startswith=prefix)
+
+        postings = defaultdict(lambda: defaultdict(float))
+        lengths = {}
+        for term, product_id, frequency, length in ProductSearchTerm.objects.filter(condition).values_list(
+            "term", "product_id", "frequency", "product__search_document__length"
+        ):
+            for query_term in terms:
+                if term == query_term or (query_term in prefixes and term.startswith(query_term)):
+                    postings[query_term][product_id] += frequency
+            lengths[product_id] = length
+
+        # 모든 질의어를 포함하는 상품만 검색 (기존 부분 문자열 검색과 동일한 조건)
+        candidates = set(lengths)
+        for term in terms:
+            candidates &= set(postings[term])
+
+        scores = {}
+        for product_id in candidates:
+            score = 0.0
+            length_ratio = lengths[product_id] / (corpus["average"] or 1)
+            for term in terms:
+                document_frequency = len(postings[term])
+                idf = math.log(1 + (corpus["total"] - document_frequency + 0.5) / (document_frequency + 0.5))
+                frequency = postings[term][product_id]
+                score += idf * frequency * (self.k1 + 1) / (
+                    frequency + self.k1 * (1 - self.b + self.b * length_ratio)
+                )
+            scores[product_id] = score
+
+        ranking = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranking[:limit] if limit else ranking
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 가상 테이블 기반 검색
+    2-gram(+ 한글 1-gram) 토큰을 공백으로 이어 저장하고 FTS5 내장 bm25()로 정렬
+    """
+
+    table_name = "products_search_fts"
+
+    def ensure_table(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table_name} USING fts5(name, content)"
+        )
+
+    def index(self, product):
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            cursor.execute(f"DELETE FROM {self.table_name} WHERE rowid = %s", [product.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table_name} (rowid, name, content) VALUES (%s, %s, %s)",
+                [
+                    product.pk,
+                    " ".join(tokenize(product.name, unigrams=True)),
+                    " ".join(tokenize(product.content, unigrams=True)),
+                ],
+            )
+
+    def remove(self, product_id):
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            cursor.execute(f"DELETE FROM {self.table_name} WHERE rowid = %s", [product_id])
+
+    @transaction.atomic
+    def rebuild(self, products):
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            cursor.execute(f"DELETE FROM {self.table_name}")
+        return super().rebuild(products)
+
+    def search(self, query, limit=None):
+        terms = self.query_terms(query)
+        if not terms:
+            return []
+        match = " AND ".join(
+            '"{}"{}'.format(term.replace('"', '""'), "*" if is_prefix_term(term) else "") for term in terms
+        )
+        sql = (
+            f"SELECT rowid, bm25({self.table_name}, %s, 1.0) AS score FROM {self.table_name} "
+            f"WHERE {self.table_name} MATCH %s ORDER BY score, rowid DESC"
+        )
+        params = [self.name_weight, match]
+        if limit:
+            sql += " LIMIT %s"
+            params.append(limit)
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            cursor.execute(sql, params)
+            # bm25()는 관련도가 높을수록 작은 값이므로 부호를 바꿔 반환
+            return [(product_id, -score) for product_id, score in cursor.fetchall()]
+
+
+_backends = {}
+
+
+def get_search_backend():
+    """
+    settings.PRODUCT_SEARCH_BACKEND 에 지정된 검색 백엔드 반환
+    """
+    path = getattr(settings, "PRODUCT_SEARCH_BACKEND", "products.search.DatabaseSearchBackend")
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
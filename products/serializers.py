@@ -1,9 +1,14 @@
 import time
 
+from django.db.models import Count
+from django.urls import reverse
 from rest_framework import serializers
+from rest_framework.utils.urls import replace_query_param
+from config.pagination import KeysetPagination
+from users.loaders import ViewerContext
 from users.models import Seller
-from products.models import Product, Category, Review
-from users.models import OrderItem, User
+from products.models import Product, Category, Review, ProductStatistic
+from users.models import User, StockReservation
 import json
 
 # 카테고리
@@ -24,23 +29,31 @@ class CategoryListSerializer(serializers.ModelSerializer):
 # 상품
 class ProductListSerializer(serializers.ModelSerializer):
     
-    # 누적판매량 OrderItem table에서 amount 조회 + filter(order_status = 6 ) 6: 구매확정 
+    # 누적판매량, 찜 수, 평점은 ProductStatistic 테이블에서 조회 (구매확정, 찜, 리뷰 시 증분 갱신)
     sales = serializers.SerializerMethodField()
-    def get_sales(self, obj):
-        product_sales = OrderItem.objects.filter(product_id=obj.id).filter(order_status=6) # 조건(구매확정)에 맞는 쿼리셋
-        return sum(sale.amount for sale in product_sales)
-    
-    # 상품 찜(likes) 갯수 User table 에서 wish 조회
     likes = serializers.SerializerMethodField()
+    stars = serializers.SerializerMethodField()
+
+    def get_statistic(self, obj):
+        """
+        상품 통계 조회, 통계가 없다면 None
+        """
+        return getattr(obj, "statistic", None)
+
+    # 누적판매량 (구매확정(6) 상태의 주문상품 amount 합계)
+    def get_sales(self, obj):
+        statistic = self.get_statistic(obj)
+        return statistic.sales if statistic else 0
+
+    # 상품 찜(likes) 갯수
     def get_likes(self, obj):
-        product_likes = User.objects.filter(product_wish_list=obj.id) # 조건(해당상품 찜 내역)에 맞는 쿼리셋
-        return len(product_likes) if product_likes else 0
+        statistic = self.get_statistic(obj)
+        return statistic.likes if statistic else 0
 
-    # 평점(별점) Review table 에서 star 조회
-    stars = serializers.SerializerMethodField()
+    # 평점(별점), 리뷰가 없다면 0
     def get_stars(self, obj):
-        product_stars = Review.objects.filter(product=obj.id) # 조건(해당상품의 리뷰)에 맞는 쿼리셋
-        return round(sum(star.star for star in product_stars)/len(product_stars), 1) if product_stars else 0 # 리뷰가 존재한다면 평균값 리턴, 없다면 None
+        statistic = self.get_statistic(obj)
+        return statistic.stars if statistic else 0
 
 
     class Meta:
@@ -58,24 +71,35 @@ class UserProfileInformationSerializer(serializers.ModelSerializer):
 class GetReviewUserListInfo(serializers.ModelSerializer):
     """
     리뷰 정보 불러오기
+    get_queryset()으로 조회하면 페이지당 고정된 쿼리로 조회
     """
 
     review_liking_people_count = serializers.SerializerMethodField()
     is_like = serializers.SerializerMethodField()
     user = UserProfileInformationSerializer()
 
+    @classmethod
+    def get_queryset(cls, product_id):
+        """
+        작성자 프로필, 좋아요 수를 함께 조회하는 상품 리뷰 쿼리셋
+        """
+        return (
+            Review.objects.filter(product_id=product_id)
+            .select_related("user")
+            .annotate(liking_count=Count("review_liking_people"))
+        )
+
     def get_is_like(self, obj):
-        request = self.context.get("request")
-        if request.user.is_authenticated:
-            # 좋아요 object에 포함되 있다면 True 아니라면 False
-            return obj.review_liking_people.filter(pk=request.user.pk).exists()
-        return False
+        # 요청 사용자의 좋아요 리뷰 id 목록에 포함되 있다면 True 아니라면 False
+        return ViewerContext.from_context(self.context).is_like(obj.pk)
 
     def get_review_liking_people_count(self, obj):
         """
         리뷰 좋아요 누른 사람 count 값 반환
         """
-
+        liking_count = getattr(obj, "liking_count", None)
+        if liking_count is not None:
+            return liking_count
         return obj.review_liking_people.count()
 
 
@@ -115,10 +139,7 @@ class SimpleSellerInformation(serializers.ModelSerializer):
         """
         get 요청한 사용자가 팔로우중인지 판단.
         """
-        user = self.context.get("request").user
-        if user.is_authenticated:
-            return user.followings.filter(pk=obj.pk).exists()
-        return False
+        return ViewerContext.from_context(self.context).is_follow(obj.pk)
 
     def get_follower_count(self, obj):
         return obj.follower.count()
@@ -133,65 +154,101 @@ class GetProductDetailSerializer(serializers.ModelSerializer):
     상품 상세 조회
     """
     seller = SimpleSellerInformation()
-    product_reviews = GetReviewUserListInfo(many=True)
+    # 리뷰는 첫 페이지만 포함, 이후 페이지는 product_reviews_next 링크로 조회
+    product_reviews = serializers.SerializerMethodField()
+    product_reviews_next = serializers.SerializerMethodField()
     product_information = serializers.SerializerMethodField()
     in_wishlist = serializers.SerializerMethodField()
     delivery_evaluation = serializers.SerializerMethodField()
     service_evaluation = serializers.SerializerMethodField()
     feedback_evaluation = serializers.SerializerMethodField()
+    star_histogram = serializers.SerializerMethodField()
+    available_amount = serializers.SerializerMethodField()
+
+    def get_available_amount(self, obj):
+        """
+        판매 가능 수량 (재고 - 다른 사용자가 장바구니에서 선점한 수량)
+        """
+        user = self.context.get("request").user
+        available = StockReservation.objects.get_available_amounts(
+            [obj.pk], user=user if user.is_authenticated else None
+        )
+        return available.get(obj.pk, 0)
+
+    def get_review_page(self, obj):
+        """
+        리뷰 첫 페이지, 다음 페이지 링크 (상품당 한번만 조회)
+        """
+        if getattr(obj, "_review_page", None) is None:
+            request = self.context.get("request")
+            url = replace_query_param(reverse("review_view", args=[obj.pk]), "detail", 1)
+            reviews, next_link = KeysetPagination().paginate_first_page(
+                GetReviewUserListInfo.get_queryset(obj.pk), request, url
+            )
+            obj._review_page = (
+                GetReviewUserListInfo(reviews, many=True, context=self.context).data, next_link
+            )
+        return obj._review_page
+
+    def get_product_reviews(self, obj):
+        return self.get_review_page(obj)[0]
+
+    def get_product_reviews_next(self, obj):
+        return self.get_review_page(obj)[1]
+
+    def get_evaluation(self, obj, axis):
+        """
+        리뷰 평가 분포 (상품 통계 row 에서 조회)
+        """
+        statistic = getattr(obj, "statistic", None)
+        if statistic is None:
+            return {evaluation: 0 for evaluation in ProductStatistic.EVALUATIONS}
+        return statistic.get_evaluation(axis)
 
     def get_delivery_evaluation(self, obj):
         """
         배송 리뷰 평가 종합하기
         """
-        delivery_counts = {
-            "good": obj.product_reviews.filter(delivery_evaluation="good").count(),
-            "normal": obj.product_reviews.filter(delivery_evaluation="normal").count(),
-            "bad": obj.product_reviews.filter(delivery_evaluation="bad").count(),
-        }
-        return delivery_counts
+        return self.get_evaluation(obj, "delivery")
 
     def get_service_evaluation(self, obj):
         """
         서비스 리뷰 평가 종합 하기
         """
-        service_counts = {
-            "good": obj.product_reviews.filter(service_evaluation="good").count(),
-            "normal": obj.product_reviews.filter(service_evaluation="normal").count(),
-            "bad": obj.product_reviews.filter(service_evaluation="bad").count(),
-        }
-        return service_counts
+        return self.get_evaluation(obj, "service")
 
     def get_feedback_evaluation(self, obj):
         """
         피드백 리뷰 평가 종합 하기
         """
-        feedback_counts = {
-            "good": obj.product_reviews.filter(feedback_evaluation="good").count(),
-            "normal": obj.product_reviews.filter(feedback_evaluation="normal").count(),
-            "bad": obj.product_reviews.filter(feedback_evaluation="bad").count(),
-        }
-        return feedback_counts
+        return self.get_evaluation(obj, "feedback")
+
+    def get_star_histogram(self, obj):
+        """
+        별점별 리뷰 수
+        """
+        statistic = getattr(obj, "statistic", None)
+        if statistic is None:
+            return {star: 0 for star in ProductStatistic.STARS}
+        return statistic.star_histogram
 
     def get_in_wishlist(self, obj):
         """
         get 요청 사용자가 상품을 찜 등록 했는지 판단.
         """
 
-        request = self.context.get("request")
-        if request.user.is_authenticated:
-            return obj.wish_lists.filter(pk=request.user.pk).exists()
-        return False
+        return ViewerContext.from_context(self.context).in_wishlist(obj.pk)
 
     def get_product_information(self, obj):
         """
         해당 product의 통계치 불러오기
         """
 
+        statistic = getattr(obj, "statistic", None)
         new_dict = {
-            "sales": ProductListSerializer(obj).data.get('sales'),
-            "likes": ProductListSerializer(obj).data.get('likes'),
-            "stars": ProductListSerializer(obj).data.get('stars'),
+            "sales": statistic.sales if statistic else 0,
+            "likes": statistic.likes if statistic else 0,
+            "stars": statistic.stars if statistic else 0,
         }
         return new_dict
 
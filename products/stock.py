@@ -0,0 +1,157 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, PositiveIntegerField, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.serializers import ValidationError
+from .cache import CatalogCache
+from .flashsale import FlashSaleCounter
+
+
+class OutOfStock(ValidationError):
+    """
+    재고 부족 (failures : 차감하지 못한 (상품 id, 요청 수량) 목록)
+    """
+
+    default_code = "out_of_stock"
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(code=self.default_code)
+
+
+class StockLedger:
+    """
+    상품 재고 증감
+    주문 상품 row 를 id 순서로 잠가(교착 상태 방지) 한번에 조회하고,
+    조건부 UPDATE(amount = amount - n WHERE amount >= n) 한번으로 모든 상품 차감
+    주문 상품 수와 관계없이 쿼리 수가 일정하며, 동시 주문 시에도 재고가 음수가 되거나 갱신이 유실되지 않음
+    """
+
+    @classmethod
+    def merge(cls, lines):
+        """
+        (상품 id, 수량) 목록을 상품별 합계로 묶어 상품 id 순서로 반환
+        """
+        amounts = defaultdict(int)
+        for product_id, amount in lines:
+            amounts[product_id] += amount
+        return sorted((product_id, amount) for product_id, amount in amounts.items() if amount > 0)
+
+    @classmethod
+    def get_held_amount(cls, user, product_ref="pk"):
+        """
+        user 를 제외한 다른 사용자의 유효한 재고 선점 수량 (상품 조회용 서브쿼리)
+        product_ref : 바깥 쿼리의 상품 id 필드 (장바구니 조회 시 "product_id")
+        """
+        from users.models import StockReservation
+
+        reservations = StockReservation.objects.filter(product=OuterRef(product_ref), expires_at__gt=timezone.now())
+        if user is not None:
+            reservations = reservations.exclude(user=user)
+        held = reservations.values("product").annotate(total=Sum("amount")).values("total")
+        return Coalesce(Subquery(held), 0, output_field=IntegerField())
+
+    @classmethod
+    def update_amounts(cls, lines, sign):
+        """
+        (상품 id, 수량) 목록을 UPDATE 한번으로 반영, 반영한 상품 수 반환
+        sign=-1 : 차감 (amount >= 수량 인 상품만, 0이 되면 판매중(1) => 품절(2))
+        sign=1 : 복구 (품절(2) => 판매중(1))
+        """
+        from .models import Product
+
+        if not lines:
+            return 0
+        delta = Case(
+            *[When(pk=product_id, then=Value(amount)) for product_id, amount in lines],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        if sign < 0:
+            condition = Q()
+            for product_id, amount in lines:
+                condition |= Q(pk=product_id, amount__gte=amount)
+            # UPDATE 우변은 변경 전 값 기준 (amount == 요청 수량이면 차감 후 0)
+            item_state = Case(
+                *[When(Q(pk=product_id, amount=amount, item_state=1), then=Value(2)) for product_id, amount in lines],
+                default=F("item_state"),
+                output_field=PositiveIntegerField(),
+            )
+            return Product.objects.filter(condition).update(amount=F("amount") - delta, item_state=item_state)
+        item_state = Case(When(item_state=2, then=Value(1)), default=F("item_state"), output_field=PositiveIntegerField())
+        return Product.objects.filter(pk__in=[product_id for product_id, amount in lines]).update(
+            amount=F("amount") + delta, item_state=item_state
+        )
+
+    @classmethod
+    def deduct(cls, lines, partial=False, user=None):
+        """
+        주문 시 재고 차감
+        다른 사용자가 선점한 수량은 차감할 수 없고, user 의 선점은 차감과 함께 해제
+        플래시 세일 중인 상품은 상품 row 대신 FlashSaleCounter 에서 차감
+        (호출한 트랜잭션이 롤백되면 FlashSaleCounter.release_on_error 범위에서 복구)
+        partial=False : 한 상품이라도 부족하면 전체 취소 후 OutOfStock
+        partial=True : 가능한 상품만 차감, 실패 목록 반환
+        """
+        from .models import Product
+        from users.models import StockReservation
+
+        lines = cls.merge(lines)
+        product_ids = [product_id for product_id, amount in lines]
+        failures = []
+        flash_sale_ids = FlashSaleCounter.get_active_product_ids(product_ids)
+        # OutOfStock 등 예외 발생 시 카운터 차감 복구
+        with FlashSaleCounter.release_on_error(), transaction.atomic():
+            for product_id, amount in lines:
+                if product_id in flash_sale_ids:
+                    if not FlashSaleCounter.claim(product_id, amount):
+                        failures.append((product_id, amount))
+
+            # 상품 row 를 id 순서로 잠그고 판매 가능 수량(재고 - 다른 사용자 선점 수량) 확인
+            row_lines = [(product_id, amount) for product_id, amount in lines if product_id not in flash_sale_ids]
+            rows = {
+                product_id: (stock, available)
+                for product_id, stock, available in Product.objects.select_for_update()
+                .filter(pk__in=[product_id for product_id, amount in row_lines])
+                .order_by("pk")
+                .annotate(held=cls.get_held_amount(user))
+                .values_list("pk", "amount", F("amount") - F("held"))
+            }
+            deductions = []
+            sold_out = False
+            for product_id, amount in row_lines:
+                stock, available = rows.get(product_id, (0, 0))
+                if amount <= (available or 0):
+                    deductions.append((product_id, amount))
+                    sold_out = sold_out or amount == stock
+                else:
+                    failures.append((product_id, amount))
+            failures.sort()
+
+            if failures and not partial:
+                raise OutOfStock(failures)
+
+            if cls.update_amounts(deductions, -1) != len(deductions):
+                # 잠금 이후 재고가 바뀐 경우 (잠금을 지원하지 않는 DB)
+                raise OutOfStock(deductions)
+            if user is not None:
+                failed_ids = {product_id for product_id, amount in failures}
+                StockReservation.objects.release(
+                    user, [product_id for product_id in product_ids if product_id not in failed_ids]
+                )
+        # 품절(2)로 바뀐 상품이 있을 때만 상품 목록 캐시 무효화 (남은 수량은 캐시 유지 시간 동안 이전 값일 수 있음)
+        if sold_out:
+            CatalogCache.bump_version()
+        return failures
+
+    @classmethod
+    def restock(cls, lines):
+        """
+        환불, 주문취소 시 재고 복구, 품절(2) 상품은 판매중(1)으로 변경
+        """
+        lines = cls.merge(lines)
+        cls.update_amounts(lines, 1)
+        for product_id, amount in lines:
+            FlashSaleCounter.restock(product_id, amount)
+        CatalogCache.bump_version()
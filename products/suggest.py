@@ -0,0 +1,183 @@
+import time
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.db import connection
+from .cache import CatalogCache
+
+
+INITIALS = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+MEDIALS = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+FINALS = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+          "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+# 겹모음, 겹받침은 입력 순서대로 분리 (ex. "닭" 입력 중 "달" 도 일치하도록)
+COMPOUND_JAMO = {
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+}
+
+
+def decompose(text):
+    """
+    자동완성 키 생성, 한글 음절을 자모 단위로 분리
+    ex) "초콜릿" => "ㅊㅗㅋㅗㄹㄹㅣㅅ" ("초코", "촠" 입력 중에도 접두사로 일치)
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    keys = []
+    for char in text:
+        code = ord(char) - 0xAC00
+        if 0 <= code < 11172:
+            jamo = INITIALS[code // 588] + MEDIALS[code % 588 // 28] + FINALS[code % 28]
+        else:
+            jamo = char
+        keys.append("".join(COMPOUND_JAMO.get(element, element) for element in jamo))
+    return "".join(keys)
+
+
+class ProductSuggestIndex:
+    """
+    상품 이름 자동완성 인덱스 (판매중(1), 품절(2) 상품)
+    단어 시작 위치마다 자모 키를 정렬 배열에 저장하고 bisect 로 접두사 범위 조회
+    상품 저장(커밋 후) 시 증분 갱신
+    다른 프로세스 변경분은 카탈로그 버전(CatalogCache)이 바뀌거나 max_age 가 지나면 백그라운드에서 전체 재생성
+    (재생성은 프로세스당 한번에 하나, 끝날 때까지 이전 인덱스로 응답)
+    """
+
+    item_states = (1, 2)
+    # 접두사 범위에서 확인하는 최대 키 수 (짧은 접두사 응답 시간 제한)
+    scan_limit = 2000
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.keys = []
+        self.products = {}
+        self.built_at = None
+        self.built_version = None
+        self.rebuilding = False
+
+    def get_max_age(self):
+        return getattr(settings, "PRODUCT_SUGGEST_MAX_AGE", 60 * 10)
+
+    def rebuild(self):
+        """
+        전체 인덱스 재생성, 색인한 상품 수 반환
+        """
+        from .models import Product
+
+        # 조회 전 버전 (조회 중 변경된 상품은 다음 재생성에서 반영)
+        version = CatalogCache.get_version()
+        products = {}
+        keys = []
+        queryset = Product.objects.filter(item_state__in=self.item_states).select_related("statistic")
+        for product in queryset.only("pk", "name", "item_state", "statistic__sales", "statistic__likes"):
+            statistic = getattr(product, "statistic", None)
+            entry = self.make_entry(product, statistic.sales, statistic.likes) if statistic else self.make_entry(product)
+            products[product.pk] = entry
+            keys.extend((key, product.pk) for key in entry["keys"])
+        keys.sort()
+        with self.lock:
+            self.keys, self.products, self.built_at = keys, products, time.monotonic()
+            self.built_version = version
+        return len(products)
+
+    def make_entry(self, product, sales=0, likes=0):
+        words = product.name.split()
+        return {
+            "name": product.name,
+            "sales": sales,
+            "likes": likes,
+            "keys": sorted({decompose(" ".join(words[index:])) for index in range(len(words))}),
+        }
+
+    def is_stale(self):
+        if self.built_at is None or time.monotonic() - self.built_at > self.get_max_age():
+            return True
+        return CatalogCache.get_version() != self.built_version
+
+    def refresh(self):
+        """
+        인덱스가 오래됐다면 백그라운드 재생성 시작 (이미 재생성 중이라면 무시)
+        """
+        if not self.is_stale():
+            return False
+        with self.lock:
+            if self.rebuilding:
+                return False
+            self.rebuilding = True
+        self.start_rebuild()
+        return True
+
+    def start_rebuild(self):
+        def target():
+            try:
+                self.run_rebuild()
+            finally:
+                # 스레드에서 연 DB 연결 정리
+                connection.close()
+
+        threading.Thread(target=target, daemon=True).start()
+
+    def run_rebuild(self):
+        try:
+            self.rebuild()
+        finally:
+            self.rebuilding = False
+
+    def remove(self, product_id):
+        with self.lock:
+            entry = self.products.pop(product_id, None)
+            if entry is None:
+                return
+            for key in entry["keys"]:
+                index = bisect_left(self.keys, (key, product_id))
+                if index < len(self.keys) and self.keys[index] == (key, product_id):
+                    del self.keys[index]
+
+    def update(self, product):
+        """
+        상품 저장 시 증분 갱신 (인덱스가 아직 생성되지 않았다면 무시)
+        누적판매량, 찜 수는 기존 값 유지 (통계 조회 없이 갱신)
+        """
+        with self.lock:
+            if self.built_at is None:
+                return
+            previous = self.products.get(product.pk)
+            self.remove(product.pk)
+            if product.item_state not in self.item_states:
+                return
+            if previous is None:
+                entry = self.make_entry(product)
+            else:
+                entry = self.make_entry(product, previous["sales"], previous["likes"])
+            self.products[product.pk] = entry
+            for key in entry["keys"]:
+                insort(self.keys, (key, product.pk))
+
+    def suggest(self, query, limit=10):
+        """
+        접두사가 일치하는 상품을 누적판매량, 찜 수 순서로 반환
+        인덱스가 오래됐다면 재생성은 백그라운드에서 진행하고 현재 인덱스로 응답 (첫 재생성 완료 전에는 빈 목록)
+        """
+        prefix = decompose(" ".join(query.split()))
+        if not prefix:
+            return []
+        self.refresh()
+
+        with self.lock:
+            matched = {}
+            index = bisect_left(self.keys, (prefix,))
+            end = min(index + self.scan_limit, len(self.keys))
+            while index < end and self.keys[index][0].startswith(prefix):
+                product_id = self.keys[index][1]
+                matched[product_id] = self.products[product_id]
+                index += 1
+
+        ranking = sorted(
+            matched.items(), key=lambda item: (-item[1]["sales"], -item[1]["likes"], -item[0])
+        )
+        return [{"id": product_id, "name": entry["name"]} for product_id, entry in ranking[:limit]]
+
+
+suggest_index = ProductSuggestIndex()
@@ -1,7 +1,18 @@
+from io import StringIO
+from unittest.mock import patch
 from django.urls import reverse
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
-from users.models import Seller, User
-from products.models import Product
+from users.models import Seller, User, Bill, OrderItem, StatusCategory
+from products.models import Product, Review, ProductStatistic, Category
+from products.cache import CatalogCache
+from products.search import tokenize, SQLiteFTS5SearchBackend
+from products.suggest import decompose, suggest_index
+from products.views import ordering_queryset
 
 
 class BaseTestCase(APITestCase):
@@ -48,6 +59,8 @@ class BaseTestCase(APITestCase):
         ]
 
     def setUp(self):
+        # 쓰로틀링 기록, 응답 캐시 초기화
+        cache.clear()
         self.seller_user_access_token = self.client.post(
             reverse("login"), self.seller_user_data
         ).data["access"]
@@ -335,3 +348,459 @@ class ProductDeleteTest(BaseTestCase):
         self.assertEqual(response.status_code, 204)
         self.assertEqual(Product.objects.count(), 3)
         self.assertEqual(Product.objects.get(pk=self.product.id).item_state, 6)
+
+
+class ProductStatisticTest(BaseTestCase):
+    """상품 통계 증분 갱신 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        call_command("loaddata", "json_data/status.json")
+        self.product = Product.objects.create(seller=self.seller, **self.product_data[0])
+        self.bill = Bill.objects.create(
+            user=self.user,
+            address="address",
+            detail_address="detailaddress",
+            recipient="recipient",
+            postal_code="12345",
+            is_paid=True,
+        )
+
+    def get_statistic(self):
+        return ProductStatistic.objects.get(product=self.product)
+
+    # 구매확정, 찜, 리뷰 작성 및 수정 시 통계 반영
+    def test_statistic_follows_events(self):
+        order_item = OrderItem.objects.create(
+            bill=self.bill,
+            seller=self.seller,
+            order_status_id=5,
+            name="name",
+            amount=3,
+            price=1000,
+            product_id=self.product.id,
+        )
+        self.assertEqual(self.get_statistic().sales, 0)
+        order_item = OrderItem.objects.get(pk=order_item.pk)
+        order_item.order_status = StatusCategory.objects.get(pk=6)
+        order_item.save()
+        self.assertEqual(self.get_statistic().sales, 3)
+
+        self.user.product_wish_list.add(self.product)
+        self.seller_user.product_wish_list.add(self.product)
+        self.user.product_wish_list.remove(self.product)
+        self.assertEqual(self.get_statistic().likes, 1)
+
+        review = Review.objects.create(
+            user=self.user, product=self.product, title="title", content="content", star=5
+        )
+        review = Review.objects.get(pk=review.pk)
+        review.star = 3
+        review.save()
+        Review.objects.create(
+            user=self.seller_user, product=self.product, title="title", content="content", star=4
+        )
+        statistic = self.get_statistic()
+        self.assertEqual((statistic.review_count, statistic.star_sum, statistic.stars), (2, 7, 3.5))
+        self.assertEqual(statistic.star_average, 3.5)
+        self.assertEqual(ProductStatistic.objects.verify(), [])
+
+        response = self.client.get(reverse("product-list"))
+        self.assertEqual(response.data["results"][0]["sales"], 3)
+        self.assertEqual(response.data["results"][0]["likes"], 1)
+        self.assertEqual(response.data["results"][0]["stars"], 3.5)
+
+    # 정기 검증은 불일치한 상품만 재계산
+    def test_repair_drifted(self):
+        other = Product.objects.create(seller=self.seller, **self.product_data[0])
+        self.user.product_wish_list.add(self.product, other)
+        ProductStatistic.objects.filter(product=self.product).update(likes=5)
+        self.assertEqual(ProductStatistic.objects.repair(batch_size=1), [self.product.id])
+        self.assertEqual(self.get_statistic().likes, 1)
+        self.assertEqual(ProductStatistic.objects.verify(), [])
+
+    # 리뷰 작성, 수정, 삭제 시 별점 분포, 평가 분포 반영 및 상세 조회
+    def test_review_summary(self):
+        review = Review.objects.create(
+            user=self.user, product=self.product, title="title", content="content", star=5,
+            delivery_evaluation="good", service_evaluation="bad",
+        )
+        Review.objects.create(
+            user=self.seller_user, product=self.product, title="title", content="content", star=2,
+            feedback_evaluation="bad",
+        )
+        review = Review.objects.get(pk=review.pk)
+        review.star = 4
+        review.delivery_evaluation = "normal"
+        review.save()
+        self.assertEqual(ProductStatistic.objects.verify(), [])
+
+        response = self.client.get(reverse("product-detail", args=[self.product.id]))
+        self.assertEqual(response.data["star_histogram"], {1: 0, 2: 1, 3: 0, 4: 1, 5: 0})
+        self.assertEqual(response.data["delivery_evaluation"], {"good": 0, "normal": 2, "bad": 0})
+        self.assertEqual(response.data["service_evaluation"], {"good": 0, "normal": 1, "bad": 1})
+        self.assertEqual(response.data["feedback_evaluation"], {"good": 0, "normal": 1, "bad": 1})
+
+        Review.objects.get(pk=review.pk).delete()
+        statistic = self.get_statistic()
+        self.assertEqual(statistic.star_histogram, {1: 0, 2: 1, 3: 0, 4: 0, 5: 0})
+        self.assertEqual(statistic.get_evaluation("service"), {"good": 0, "normal": 1, "bad": 0})
+        self.assertEqual(ProductStatistic.objects.verify(), [])
+
+    # 통계 재계산
+    def test_rebuild_statistic(self):
+        Review.objects.create(user=self.user, product=self.product, title="title", content="content", star=4)
+        ProductStatistic.objects.filter(product=self.product).update(review_count=0, star_sum=0)
+        self.assertEqual(len(ProductStatistic.objects.verify()), 1)
+        call_command("rebuild_product_statistics", stdout=StringIO())
+        self.assertEqual(self.get_statistic().stars, 4.0)
+
+
+class ProductSearchTest(BaseTestCase):
+    """상품 검색 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.milk = Product.objects.create(
+            seller=self.seller, name="밀크 초콜릿", content="부드러운 우유 맛"
+        )
+        self.dark = Product.objects.create(
+            seller=self.seller, name="다크 카카오", content="쌉쌀한 초콜릿, 초콜릿 애호가용"
+        )
+        self.candy = Product.objects.create(
+            seller=self.seller, name="사탕", content="달콤한 사탕"
+        )
+
+    # 한글 2-gram 토큰 분리
+    def test_tokenize(self):
+        self.assertEqual(tokenize("밀크 초콜릿 Box"), ["밀크", "초콜", "콜릿", "box"])
+        self.assertEqual(tokenize("초코빵", unigrams=True), ["초코", "코빵", "초", "코", "빵"])
+
+    # 관련도 순 검색, 상품 이름 일치가 우선
+    def test_search_ranking(self):
+        response = self.client.get(reverse("product-list"), {"search": "초콜릿"})
+        self.assertEqual(response.status_code, 200)
+        names = [product["name"] for product in response.data["results"]]
+        self.assertEqual(names, ["밀크 초콜릿", "다크 카카오"])
+
+    # 삭제됨(6) 상태의 상품은 색인에서 제거
+    def test_soft_deleted_product_removed(self):
+        self.milk.item_state = 6
+        self.milk.save()
+        response = self.client.get(reverse("product-list"), {"search": "초콜릿", "ordering": "recent"})
+        self.assertEqual([product["id"] for product in response.data["results"]], [self.dark.id])
+
+    # 한 글자 한글 검색어, 영문 접두어 검색 (기존 부분 문자열 검색 결과 유지)
+    def test_single_syllable_and_prefix(self):
+        bread = Product.objects.create(seller=self.seller, name="초코빵", content="Chocolate bread")
+        for query in ["빵", "코", "choco", "CHOC", "초코 bre"]:
+            response = self.client.get(reverse("product-list"), {"search": query})
+            self.assertEqual([product["id"] for product in response.data["results"]], [bread.id], query)
+
+        backend = SQLiteFTS5SearchBackend()
+        backend.rebuild(Product.objects.all())
+        for query in ["빵", "choco"]:
+            self.assertEqual([product_id for product_id, score in backend.search(query)], [bread.id], query)
+
+    # SQLite FTS5 백엔드
+    def test_sqlite_fts5_backend(self):
+        backend = SQLiteFTS5SearchBackend()
+        backend.rebuild(Product.objects.all())
+        self.assertEqual([product_id for product_id, score in backend.search("초콜릿")], [self.milk.id, self.dark.id])
+
+
+class ProductCursorPaginationTest(BaseTestCase):
+    """상품 커서 페이지네이션 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.products = [
+            Product.objects.create(seller=self.seller, name=f"product {index}", content="content", price=1000)
+            for index in range(7)
+        ]
+        for product in self.products[:3]:
+            Review.objects.create(user=self.user, product=product, title="title", content="content", star=4)
+
+    def get_all_pages(self, params):
+        ids = []
+        url = reverse("product-list")
+        response = self.client.get(url, {**params, "cursor": "", "page_size": 3})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [product["id"] for product in response.data["results"]]
+            if not response.data["next"]:
+                return ids, response
+            response = self.client.get(response.data["next"])
+
+    # 모든 정렬 조건에서 중복, 누락 없이 조회 (동일 값은 pk로 구분)
+    def test_all_orderings(self):
+        expected = sorted(product.id for product in self.products)
+        for ordering in ["recent", "popularity", "stars", "expensive", "cheap", "sales"]:
+            ids, response = self.get_all_pages({"ordering": ordering})
+            self.assertEqual(sorted(ids), expected, ordering)
+        ids, response = self.get_all_pages({"ordering": "stars"})
+        self.assertEqual(set(ids[:3]), {product.id for product in self.products[:3]})
+
+    # 가격 미입력 상품도 0으로 정렬해 누락 없이 조회
+    def test_null_sort_values(self):
+        Product.objects.filter(pk=self.products[2].pk).update(price=None)
+        expected = sorted(product.id for product in self.products)
+        for ordering in ["cheap", "expensive"]:
+            ids, response = self.get_all_pages({"ordering": ordering})
+            self.assertEqual(sorted(ids), expected, ordering)
+        ids, response = self.get_all_pages({"ordering": "cheap"})
+        self.assertEqual(ids[0], self.products[2].id)
+
+    # 인기, 별점, 판매량순은 통계 테이블 인덱스 순서로 읽음 (전체 정렬 없음)
+    def test_statistic_ordering_uses_index(self):
+        queryset = Product.objects.filter(Q(item_state=1) | Q(item_state=2)).select_related("statistic")
+        for ordering, index in [("popularity", "statistic_likes_idx"), ("stars", "statistic_stars_idx"), ("sales", "statistic_sales_idx")]:
+            plan = ordering_queryset(queryset, ordering)[:10].explain()
+            self.assertIn(index, plan, ordering)
+            self.assertNotIn("TEMP B-TREE", plan, ordering)
+
+    # 별점순 정렬은 평균 별점 컬럼 기준
+    def test_stars_ordering(self):
+        Review.objects.create(user=self.seller_user, product=self.products[1], title="title", content="content", star=1)
+        Review.objects.create(user=self.seller_user, product=self.products[6], title="title", content="content", star=5)
+        response = self.client.get(reverse("product-list"), {"ordering": "stars"})
+        ids = [product["id"] for product in response.data["results"]]
+        self.assertEqual(ids[:4], [self.products[6].id, self.products[2].id, self.products[0].id, self.products[1].id])
+
+    # 이전 페이지 이동, 개수 조회
+    def test_previous_page_and_count(self):
+        first = self.client.get(reverse("product-list"), {"cursor": "", "page_size": 3, "count": "exact"})
+        self.assertEqual(first.data["count"], 7)
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+        self.assertEqual(previous.data["results"], first.data["results"])
+
+        approx = self.client.get(reverse("product-list"), {"cursor": "", "count": "approx"})
+        self.assertEqual((approx.data["count"], approx.data["count_is_estimate"]), (7, False))
+
+    # 페이지 번호 방식 유지
+    def test_page_number_pagination(self):
+        response = self.client.get(reverse("product-list"), {"page": 1})
+        self.assertEqual(response.data["count"], 7)
+
+
+class CatalogCacheTest(BaseTestCase):
+    """상품 목록 응답 캐시 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.product = Product.objects.create(seller=self.seller, name="product", content="content", price=1000)
+
+    # 동일 조건 재요청 시 캐시 적중, 파라미터 순서/공백은 정규화
+    def test_hit_and_normalized_key(self):
+        url = reverse("product-list")
+        first = self.client.get(url, {"ordering": "cheap", "search": "product"})
+        second = self.client.get(f"{url}?search=product%20&ordering=cheap")
+        self.assertEqual(first["X-Catalog-Cache"], "MISS")
+        self.assertEqual(second["X-Catalog-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+
+        # 로그인 사용자는 캐시하지 않음
+        response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}")
+        self.assertFalse(response.has_header("X-Catalog-Cache"))
+
+    # 상품, 리뷰 변경 시 버전 증가로 무효화
+    def test_invalidated_on_change(self):
+        url = reverse("product-list")
+        self.client.get(url)
+        Review.objects.create(user=self.user, product=self.product, title="title", content="content", star=5)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Catalog-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["stars"], 5)
+
+        self.product.name = "renamed"
+        self.product.save()
+        response = self.client.get(url)
+        self.assertEqual(response["X-Catalog-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["name"], "renamed")
+
+
+    # 주문, 배송 상태 변경은 캐시 유지, 구매확정(판매량 변경) 시 무효화
+    def test_order_events_keep_cache(self):
+        call_command("loaddata", "json_data/status.json")
+        bill = Bill.objects.create(
+            user=self.user, address="address", detail_address="detailaddress", recipient="recipient",
+            postal_code="12345", is_paid=True,
+        )
+        url = reverse("product-list")
+        self.client.get(url)
+        order_item = OrderItem.objects.create(
+            bill=bill, seller=self.seller, order_status_id=1, name="name", amount=1, price=1000,
+            product_id=self.product.id,
+        )
+        self.assertEqual(self.client.get(url)["X-Catalog-Cache"], "HIT")
+
+        order_item = OrderItem.objects.get(pk=order_item.pk)
+        order_item.order_status_id = 6
+        order_item.save()
+        response = self.client.get(url)
+        self.assertEqual(response["X-Catalog-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["sales"], 1)
+
+
+class ProductDetailReviewTest(BaseTestCase):
+    """상품 상세 조회 리뷰 페이지네이션 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.product = Product.objects.create(seller=self.seller, name="product", content="content", price=1000)
+        self.reviews = [
+            Review.objects.create(
+                user=User.objects.create_user(
+                    f"reviewer{index}@naver.com", f"reviewer{chr(97 + index)}", "!@#password123"
+                ),
+                product=self.product, title="title", content="content", star=5,
+            )
+            for index in range(12)
+        ]
+        self.user.review_like.add(self.reviews[-1], self.reviews[0])
+        self.seller_user.review_like.add(self.reviews[-1])
+
+    # 첫 페이지만 포함, 다음 페이지는 같은 형식으로 조회
+    def test_first_page_and_next(self):
+        response = self.client.get(
+            reverse("product-detail", args=[self.product.id]),
+            HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}",
+        )
+        reviews = response.data["product_reviews"]
+        self.assertEqual(len(reviews), 10)
+        self.assertEqual(reviews[0]["id"], self.reviews[-1].id)
+        self.assertEqual((reviews[0]["review_liking_people_count"], reviews[0]["is_like"]), (2, True))
+        self.assertEqual((reviews[1]["review_liking_people_count"], reviews[1]["is_like"]), (0, False))
+        self.assertEqual(reviews[0]["user"]["nickname"], "reviewerl")
+
+        response = self.client.get(
+            response.data["product_reviews_next"], HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}"
+        )
+        reviews = response.data["results"]
+        self.assertEqual([review["id"] for review in reviews], [self.reviews[1].id, self.reviews[0].id])
+        self.assertEqual((reviews[1]["review_liking_people_count"], reviews[1]["is_like"]), (1, True))
+        self.assertIsNone(response.data["next"])
+
+    # 찜, 팔로우, 좋아요 여부는 요청당 한번씩만 조회
+    def test_viewer_flags(self):
+        self.user.product_wish_list.add(self.product)
+        self.user.followings.add(self.seller)
+        url = reverse("product-detail", args=[self.product.id])
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {self.user_access_token}"}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **headers)
+        self.assertTrue(response.data["in_wishlist"])
+        self.assertTrue(response.data["seller"]["is_follow"])
+        liked_queries = [
+            query for query in queries
+            if "users_user_review_like" in query["sql"] and "COUNT" not in query["sql"]
+        ]
+        self.assertEqual(len(liked_queries), 1)
+
+        response = self.client.get(url)
+        self.assertFalse(response.data["in_wishlist"])
+        self.assertFalse(response.data["seller"]["is_follow"])
+
+
+class ProductSuggestTest(BaseTestCase):
+    """상품 이름 자동완성 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.chocolate = Product.objects.create(seller=self.seller, name="다크 초콜릿", content="content", price=1000)
+        self.milk = Product.objects.create(seller=self.seller, name="초코 우유", content="content", price=1000)
+        ProductStatistic.objects.filter(product=self.milk).update(sales=10)
+        suggest_index.rebuild()
+        suggest_index.rebuilding = False
+        # 테스트 트랜잭션 데이터는 다른 스레드에서 보이지 않으므로 백그라운드 재생성은 호출 여부만 확인
+        patcher = patch.object(suggest_index, "start_rebuild")
+        self.start_rebuild = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def suggest(self, q):
+        response = self.client.get(reverse("product-suggest"), {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [product["id"] for product in response.data]
+
+    def test_decompose(self):
+        self.assertEqual(decompose("초콜릿"), "ㅊㅗㅋㅗㄹㄹㅣㅅ")
+        self.assertTrue(decompose("닭").startswith(decompose("달")))
+
+    # 입력 중인 음절, 단어 시작 위치 접두사 일치, 누적판매량 순 정렬
+    def test_suggest(self):
+        self.assertEqual(self.suggest("초코"), [self.milk.id, self.chocolate.id])
+        self.assertEqual(self.suggest("촠"), [self.milk.id, self.chocolate.id])
+        self.assertEqual(self.suggest("우"), [self.milk.id])
+        self.assertEqual(self.suggest("콜릿"), [])
+
+    # 상품 저장 시 증분 갱신
+    def test_incremental_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.milk.item_state = 6
+            self.milk.save()
+            strawberry = Product.objects.create(seller=self.seller, name="딸기 우유", content="content", price=1000)
+        self.assertEqual(self.suggest("초코"), [self.chocolate.id])
+        self.assertEqual(self.suggest("우유"), [strawberry.id])
+
+    # 롤백된 상품 저장은 반영하지 않음
+    def test_rollback_not_indexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.chocolate.name = "화이트 초콜릿"
+                    self.chocolate.save()
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(self.suggest("화이트"), [])
+        self.assertEqual(self.suggest("다크"), [self.chocolate.id])
+
+    # 다른 프로세스의 변경(카탈로그 버전)을 감지해 재생성은 한번만 시작하고, 끝날 때까지 이전 인덱스로 응답
+    def test_stale_index_rebuilds_in_background(self):
+        Product.objects.filter(pk=self.milk.pk).update(name="딸기 우유")
+        CatalogCache.bump_version()
+        self.assertEqual(self.suggest("초코"), [self.milk.id, self.chocolate.id])
+        self.assertEqual(self.suggest("초코"), [self.milk.id, self.chocolate.id])
+        self.assertEqual(self.start_rebuild.call_count, 1)
+
+        suggest_index.run_rebuild()
+        self.assertEqual(self.suggest("초코"), [self.chocolate.id])
+        self.assertEqual(self.suggest("딸기"), [self.milk.id])
+        self.assertEqual(self.start_rebuild.call_count, 1)
+
+
+class ProductFacetTest(BaseTestCase):
+    """상품 목록 패싯 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name="chocolate")
+        products = [
+            ("milk chocolate", 5000, 1, self.category),
+            ("dark chocolate", 12000, 2, self.category),
+            ("cookie", 150000, 1, None),
+            ("deleted chocolate", 5000, 6, self.category),
+        ]
+        for name, price, item_state, category in products:
+            Product.objects.create(
+                seller=self.seller, name=name, content="content", price=price, item_state=item_state, category=category
+            )
+
+    # 검색 조건과 같은 필터로 한번의 쿼리로 패싯 계산
+    def test_facets(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("product-list"), {"facets": "1"})
+        facets = response.data["facets"]
+        self.assertEqual(
+            facets["categories"],
+            [{"id": self.category.id, "name": "chocolate", "count": 2}, {"id": None, "name": None, "count": 1}],
+        )
+        self.assertEqual([price["count"] for price in facets["prices"]], [1, 1, 0, 0, 1])
+        self.assertEqual(facets["prices"][1], {"min": 10000, "max": 29999, "count": 1})
+        self.assertEqual(facets["stock"], {"in_stock": 2, "sold_out": 1})
+        self.assertEqual(len([query for query in queries if "GROUP BY" in query["sql"]]), 1)
+
+        response = self.client.get(reverse("product-list"), {"facets": "1", "search": "chocolate"})
+        self.assertEqual(response.data["facets"]["stock"], {"in_stock": 1, "sold_out": 1})
+        self.assertNotIn("facets", self.client.get(reverse("product-list")).data)
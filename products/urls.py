@@ -7,7 +7,9 @@ from .views import (
     ReviewDetailView,
     MyReviewView,
     AllProductListAPIView,
-    MyProductReview
+    MyProductReview,
+    CatalogCacheStatsView,
+    ProductSuggestView,
 )
 
 """
@@ -19,6 +21,8 @@ urlpatterns = [
     path("seller/<int:user_id>/all/", AllProductListAPIView.as_view(), name="seller-product-list-all"),
     # 상품 전체 조회
     path("", ProductListAPIView.as_view(), name="product-list"),
+    # 상품 이름 자동완성
+    path("suggest/", ProductSuggestView.as_view(), name="product-suggest"),
     # 상품 상세 조회
     path("<int:pk>/", ProductDetailAPIView.as_view(), name="product-detail"),
 ]
@@ -45,4 +49,6 @@ CategoryAPI
 urlpatterns += [
     # 카테고리 조회
     path("categories/", CategoryListAPIView.as_view(), name="category-list"),
+    # 상품 목록 응답 캐시 적중률 조회
+    path("cache/stats/", CatalogCacheStatsView.as_view(), name="catalog-cache-stats"),
 ]
\ No newline at end of file
@@ -8,6 +8,7 @@ from rest_framework.generics import (
     ListAPIView,
 )
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework import status
 from .serializers import (
     CategoryListSerializer,
@@ -16,34 +17,92 @@ from .serializers import (
     ProductListSerializer,
     ReviewSerializer,
     ReviewDetailSerializer,
+    GetReviewUserListInfo,
 )
 from users.serializers import PointSerializer
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from .models import Product, Category, Review
+from .search import get_search_backend
+from .cache import CatalogCache, CatalogCacheMixin
+from .suggest import suggest_index
+from .flashsale import FlashSaleCounter
 from users.models import OrderItem, Seller, User
 from config.permissions_ import IsApprovedSeller, IsReadOnly
+from config.pagination import KeysetPagination
 from rest_framework.pagination import PageNumberPagination
 from math import ceil
 from django.db import models
-from django.db.models import Avg, Count, Q, Sum, OuterRef, Subquery, F
+from django.db.models import Case, Count, Q, Value, When
 from django.db.models.functions import Coalesce
 
 
 class ProductPagination(PageNumberPagination):
-    """페이지네이션"""
+    """
+    페이지네이션
+    ?cursor= 파라미터가 있으면 키셋(커서) 페이지네이션, 없으면 기존 페이지 번호 방식
+    """
 
     page_size = 9
     page_size_query_param = "page_size"
     max_page_size = 10000
 
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = KeysetPagination()
+        self.keyset.page_size = self.page_size
+        if self.keyset.is_requested(request):
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
 
-class CategoryListAPIView(ListAPIView):
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+# 검색 결과 최대 개수 (관련도 순)
+SEARCH_RESULT_LIMIT = 1000
+
+# 가격대 패싯 구간 시작 가격
+PRICE_FACET_BOUNDS = [0, 10000, 30000, 50000, 100000]
+
+
+class CategoryListAPIView(CatalogCacheMixin, ListAPIView):
     """카테고리 조회"""
 
     queryset = Category.objects.all()
     serializer_class = CategoryListSerializer
 
 
+class CatalogCacheStatsView(APIView):
+    """상품 목록 응답 캐시 적중률 조회 (관리자)"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(CatalogCache.get_stats(), status=status.HTTP_200_OK)
+
+
+class ProductSuggestView(APIView):
+    """
+    상품 이름 자동완성
+    ?q= 접두사(한글 자모 단위)가 일치하는 판매중, 품절 상품을 누적판매량, 찜 수 순서로 반환
+    """
+
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "suggest"
+    default_limit = 10
+    max_limit = 20
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        suggestions = suggest_index.suggest(request.query_params.get("q", ""), limit=limit)
+        return Response(suggestions, status=status.HTTP_200_OK)
+
+
 class AllProductListAPIView(ListAPIView):
     """특정 판매자의 상품 전체 조회"""
 
@@ -52,34 +111,58 @@ class AllProductListAPIView(ListAPIView):
 
     def get_queryset(self):
         user_id = self.kwargs.get("user_id")
-        queryset = Product.objects.filter(seller=user_id).order_by("-created_at")
+        queryset = Product.objects.filter(seller=user_id).select_related("statistic").order_by("-created_at")
         return queryset
 
 
-class ProductListAPIView(ListCreateAPIView):
-    """상품 전체 조회, 필터링, 검색"""
+class ProductListAPIView(CatalogCacheMixin, ListCreateAPIView):
+    """
+    상품 전체 조회, 필터링, 검색
+    ?facets=1 : 같은 조건의 카테고리별, 가격대별, 재고 상태별 상품 수 함께 반환
+    """
 
     permission_classes = [(IsAuthenticated & IsApprovedSeller) | IsReadOnly]
     serializer_class = ProductListSerializer
     pagination_class = ProductPagination
 
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.request.query_params.get("facets") == "1":
+            response.data["facets"] = get_facets(Product.objects.filter(self.filters))
+        return response
+
     def get_queryset(self):
         filters = (Q(item_state=1)| Q(item_state=2)) # 판매중(1), 품절(2)
         params = self.request.query_params
 
+        ranking = None
+
         if seller := params.get("user_id"):
             filters &= Q(seller__user_id=seller)
 
         if search := params.get("search"):
-            filters &= Q(name__contains=search) | Q(content__contains=search)
+            # 검색 색인에서 관련도 순으로 상품 id 조회
+            ranking = [
+                product_id for product_id, score in get_search_backend().search(search, limit=SEARCH_RESULT_LIMIT)
+            ]
+            filters &= Q(pk__in=ranking)
 
         if category := params.get("category"):
             filters &= Q(category__id=category)
 
-        queryset = Product.objects.filter(filters).order_by("-created_at")
+        self.filters = filters
+        queryset = Product.objects.filter(filters).select_related("statistic").order_by("-created_at")
 
         if ordering := params.get("ordering"):
             queryset = ordering_queryset(queryset, ordering)
+        elif ranking:
+            # 정렬 조건이 없는 검색은 관련도 순
+            queryset = queryset.annotate(
+                relevance=Case(
+                    *[When(pk=product_id, then=Value(rank)) for rank, product_id in enumerate(ranking)],
+                    output_field=models.IntegerField(),
+                )
+            ).order_by("relevance")
 
         return queryset
 
@@ -88,37 +171,74 @@ class ProductListAPIView(ListCreateAPIView):
         serializer.save(seller=seller)
 
 
+def get_facets(queryset):
+    """
+    카테고리, 가격대, 재고 상태(판매중, 품절)별 상품 수
+    (카테고리, 가격대, 상태) 조합별 개수를 한번의 GROUP BY 로 조회 후 항목별로 합산
+    """
+    price_band = Case(
+        *[When(price__gte=bound, then=Value(index)) for index, bound in reversed(list(enumerate(PRICE_FACET_BOUNDS)))],
+        default=Value(0),
+        output_field=models.IntegerField(),
+    )
+    rows = (
+        queryset.order_by()
+        .annotate(price_band=price_band)
+        .values("category_id", "category__name", "price_band", "item_state")
+        .annotate(count=Count("pk"))
+    )
+
+    categories = {}
+    price_counts = [0] * len(PRICE_FACET_BOUNDS)
+    stock = {"in_stock": 0, "sold_out": 0}
+    for row in rows:
+        category = categories.setdefault(
+            row["category_id"], {"id": row["category_id"], "name": row["category__name"], "count": 0}
+        )
+        category["count"] += row["count"]
+        price_counts[row["price_band"]] += row["count"]
+        stock["in_stock" if row["item_state"] == 1 else "sold_out"] += row["count"]
+
+    prices = [
+        {
+            "min": bound,
+            "max": PRICE_FACET_BOUNDS[index + 1] - 1 if index + 1 < len(PRICE_FACET_BOUNDS) else None,
+            "count": price_counts[index],
+        }
+        for index, bound in enumerate(PRICE_FACET_BOUNDS)
+    ]
+    return {
+        "categories": sorted(categories.values(), key=lambda category: -category["count"]),
+        "prices": prices,
+        "stock": stock,
+    }
+
+
 def ordering_queryset(queryset, ordering):
-    
-    order_items_qs = OrderItem.objects.filter(
-    product_id=OuterRef("id")
-    ).values('product_id').annotate(sales_count=Sum("amount")).values("sales_count")
-
-    """쿼리셋 정렬 함수"""
-    orderings = {
-        "recent": queryset,
-        "popularity": queryset.annotate(num_wishlists=Count("wish_lists")).order_by(
-            "-num_wishlists"
-        ),
-        "stars": queryset.annotate(stars=Avg("product_reviews__star")).order_by(
-            F('stars').desc(nulls_last=True)
-        ),
-        "expensive": queryset.order_by("-price"),
-        "cheap": queryset.order_by("price"),
-        "sales": queryset.annotate(
-            sales_count=Coalesce(Subquery(order_items_qs, output_field=models.IntegerField()), 0)
-        ).order_by(
-            F('sales_count').desc(nulls_last=True)
-        ),
+    """
+    쿼리셋 정렬 함수
+    인기(찜), 별점, 판매량순은 ProductStatistic 정렬 컬럼 + 상품 id 로 정렬 (statistic_*_idx 인덱스 순서와 같음)
+    통계 row 는 상품 저장 시 항상 생성되므로 INNER JOIN 으로 조회해 인덱스 순서대로 읽음
+    가격순은 키셋 페이지네이션을 위해 NULL 값(가격 미입력)을 0으로 정렬 (sort_key)
+    """
+    statistic_orderings = {
+        "popularity": "statistic__likes",
+        "stars": "statistic__star_average",
+        "sales": "statistic__sales",
     }
-    return orderings[ordering]
+    if field := statistic_orderings.get(ordering):
+        return queryset.filter(statistic__isnull=False).order_by(f"-{field}", "-statistic__product_id")
+    if ordering not in ("expensive", "cheap"):
+        return queryset
+    queryset = queryset.annotate(sort_key=Coalesce("price", Value(0), output_field=models.IntegerField()))
+    return queryset.order_by("-sort_key", "-pk") if ordering == "expensive" else queryset.order_by("sort_key", "pk")
 
 
 class ProductDetailAPIView(RetrieveUpdateDestroyAPIView):
     """상세 조회, 수정, 삭제"""
 
     permission_classes = [(IsAuthenticated & IsApprovedSeller) | IsReadOnly]
-    queryset = Product.objects.exclude(item_state__in=[5])
+    queryset = Product.objects.exclude(item_state__in=[5]).select_related("statistic")
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -144,6 +264,9 @@ class ProductDetailAPIView(RetrieveUpdateDestroyAPIView):
         if cur_item_state in [1, 2]:
             item_state = 1 if amount and int(amount) > 0 else 2
         serializer.save(seller=seller, item_state=item_state)
+        # 플래시 세일 중 재고 수정 시 미반영 차감 수량 반영 후 수정한 재고로 카운터 재설정
+        if amount is not None:
+            FlashSaleCounter.reconcile(serializer.instance.pk)
 
     def perform_destroy(self, instance):
         instance.item_state = 6
@@ -151,14 +274,28 @@ class ProductDetailAPIView(RetrieveUpdateDestroyAPIView):
 
 
 class ReviewView(ListCreateAPIView):
-    """리뷰 조회, 생성"""
+    """
+    리뷰 조회, 생성
+    ?detail=1 : 상품 상세 조회의 리뷰 목록과 같은 형식 (작성자 프로필, 좋아요 수, 좋아요 여부)
+    """
 
     permission_classes = [IsAuthenticated | IsReadOnly]
     serializer_class = ReviewSerializer
+    pagination_class = KeysetPagination
+
+    def is_detail(self):
+        return self.request.method == "GET" and self.request.query_params.get("detail") == "1"
+
+    def get_serializer_class(self):
+        if self.is_detail():
+            return GetReviewUserListInfo
+        return ReviewSerializer
 
     def get_queryset(self):
         product_id = self.kwargs.get("product_id")
-        queryset = Review.objects.filter(product_id=product_id)
+        if self.is_detail():
+            return GetReviewUserListInfo.get_queryset(product_id)
+        queryset = Review.objects.filter(product_id=product_id).select_related("product")
         return queryset
 
     def get_point_info(self, product_price, image_exists):
@@ -232,6 +369,7 @@ class MyReviewView(ListAPIView):
 
     permission_classes = [IsAuthenticated]
     serializer_class = ReviewSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         queryset = Review.objects.filter(user=self.request.user)
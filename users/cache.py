@@ -0,0 +1,62 @@
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class PointCalendarCache:
+    """
+    포인트 달력 응답 캐시 (사용자, 월별)
+    캐시 키에 사용자별 포인트 버전을 포함하고, 포인트 추가, 삭제 시 버전만 바꿔 해당 사용자 캐시 무효화
+    """
+
+    @classmethod
+    def get_timeout(cls):
+        return getattr(settings, "POINT_CALENDAR_CACHE_TIMEOUT", 60 * 60 * 24)
+
+    @classmethod
+    def get_version_key(cls, user_id):
+        return f"points:{user_id}:version"
+
+    @classmethod
+    def get_version(cls, user_id):
+        """
+        사용자 포인트 버전, 없다면 새 버전으로 초기화
+        """
+        key = cls.get_version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def bump_version(cls, user_ids):
+        """
+        포인트 버전 변경 (즉시 + 트랜잭션 커밋 후), 사용자 수와 관계없이 캐시 요청 한번 (set_many)
+        """
+        keys = [cls.get_version_key(user_id) for user_id in set(user_ids)]
+        if not keys:
+            return
+        cls._set_versions(keys)
+        transaction.on_commit(lambda: cls._set_versions(keys))
+
+    @classmethod
+    def _set_versions(cls, keys):
+        cache.set_many(dict.fromkeys(keys, uuid.uuid4().hex), None)
+
+    @classmethod
+    def get_key(cls, user_id, year, month):
+        return f"points:{user_id}:{cls.get_version(user_id)}:calendar:{year}-{month:02d}"
+
+    @classmethod
+    def get_or_build(cls, user_id, year, month, build):
+        """
+        캐시된 달력 반환, 없다면 build() 결과 저장 후 반환
+        """
+        key = cls.get_key(user_id, year, month)
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, cls.get_timeout())
+        return data
@@ -6,8 +6,10 @@ from .validated import EmailService
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from users.models import User, OrderItem, Point
+from users.models import User, OrderItem, OrderEvent, Point, PointBalance, PointBalanceSnapshot, StockReservation
 from chat.models import RoomMessage
+from products.models import ProductStatistic
+from products.flashsale import FlashSaleCounter
 from datetime import timedelta
 from .views import PointStatisticView
 from .orderviews import order_point_create
@@ -24,6 +26,22 @@ class CrontabView(APIView):
         RelatedSubscriptionandChatandPoint.subscription_update()
         RelatedSubscriptionandChatandPoint.chatlog_delete()
         RelatedSubscriptionandChatandPoint.pointpaid()
+
+        # 상품 통계(판매량, 인기, 별점 정렬 컬럼) 검증 후 불일치한 상품만 재계산
+        ProductStatistic.objects.repair()
+
+        # 만료된 장바구니 재고 선점 삭제
+        StockReservation.objects.expire()
+
+        # 플래시 세일 차감 수량 Product.amount 반영
+        FlashSaleCounter.flush_all()
+
+        # 주문 이벤트를 집계 테이블에 반영
+        OrderEvent.objects.consume_all()
+
+        # 바뀐 포인트 잔액만 스냅샷 저장 (검증용), 보관 기간이 지난 스냅샷 삭제
+        PointBalance.objects.snapshot()
+        PointBalanceSnapshot.objects.prune()
                 
         return Response({"msg":"완료"}, status=status.HTTP_202_ACCEPTED)
 
@@ -0,0 +1,78 @@
+from functools import cached_property
+
+
+class ViewerContext:
+    """
+    요청 사용자(viewer) 기준 플래그 조회 (찜 여부, 리뷰 좋아요 여부, 판매자 팔로우 여부)
+    찜 상품 id, 좋아요 리뷰 id, 팔로우 판매자 id 를 처음 필요할 때 한번씩 조회해 요청 동안 재사용
+    """
+
+    context_key = "viewer_context"
+
+    def __init__(self, user):
+        self.user = user
+        self.review_ids = {}
+
+    @classmethod
+    def from_context(cls, context):
+        """
+        serializer context 에서 로더 조회, 없다면 생성 (중첩 serializer 는 같은 context 공유)
+        context 의 request.user 또는 user 기준
+        """
+        viewer = context.get(cls.context_key)
+        if viewer is None:
+            request = context.get("request")
+            user = request.user if request is not None else context.get("user")
+            viewer = context[cls.context_key] = cls(user)
+        return viewer
+
+    @property
+    def is_authenticated(self):
+        return self.user is not None and self.user.is_authenticated
+
+    def get_ids(self, relation):
+        if not self.is_authenticated:
+            return frozenset()
+        return frozenset(getattr(self.user, relation).values_list("pk", flat=True))
+
+    @cached_property
+    def wish_product_ids(self):
+        return self.get_ids("product_wish_list")
+
+    @cached_property
+    def liked_review_ids(self):
+        return self.get_ids("review_like")
+
+    @cached_property
+    def followed_seller_ids(self):
+        return self.get_ids("followings")
+
+    def in_wishlist(self, product_id):
+        return product_id in self.wish_product_ids
+
+    def is_like(self, review_id):
+        return review_id in self.liked_review_ids
+
+    def is_follow(self, seller_id):
+        return seller_id in self.followed_seller_ids
+
+    def load_reviews(self, product_ids):
+        """
+        상품별 사용자가 작성한 리뷰 id 를 한번에 조회 (리뷰가 없다면 None)
+        """
+        from products.models import Review
+
+        product_ids = set(product_ids) - set(self.review_ids)
+        if not product_ids:
+            return
+        self.review_ids.update(dict.fromkeys(product_ids))
+        if not self.is_authenticated:
+            return
+        reviews = Review.objects.filter(user=self.user, product_id__in=product_ids).order_by("-pk")
+        for product_id, review_id in reviews.values_list("product_id", "pk"):
+            self.review_ids[product_id] = review_id
+
+    def get_review_id(self, product_id):
+        if product_id not in self.review_ids:
+            self.load_reviews([product_id])
+        return self.review_ids[product_id]
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from users.models import OrderEvent, OrderEventConsumer, SellerDailySales
+
+
+class Command(BaseCommand):
+    """
+    주문 이벤트를 집계 테이블에 반영, 검증
+    python manage.py consume_order_events [--verify | --rebuild]
+    """
+
+    help = "마지막으로 반영한 이벤트 이후의 주문 이벤트를 집계 테이블에 반영합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="반영한 이벤트와 집계 테이블 불일치 항목 출력")
+        parser.add_argument("--rebuild", action="store_true", help="집계 테이블을 비우고 처음 이벤트부터 다시 반영")
+
+    def report(self):
+        mismatches = SellerDailySales.objects.verify()
+        for (seller_id, day), stored, expected in mismatches:
+            self.stdout.write(f"seller {seller_id} {day}: stored={stored} expected={expected}")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"{len(mismatches)}개 판매자 일별 집계 불일치"))
+        else:
+            self.stdout.write(self.style.SUCCESS("판매자 일별 집계 일치"))
+
+    def handle(self, *args, **options):
+        if options["verify"]:
+            self.report()
+            return
+
+        if options["rebuild"]:
+            self.report()
+            with transaction.atomic():
+                SellerDailySales.objects.all().delete()
+                OrderEventConsumer.objects.all().delete()
+
+        for name, processed in OrderEvent.objects.consume_all().items():
+            self.stdout.write(f"{name}: {processed}개 이벤트 반영")
+        self.stdout.write(self.style.SUCCESS("완료"))
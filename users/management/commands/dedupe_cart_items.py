@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from users.models import CartItem
+
+
+class Command(BaseCommand):
+    """
+    (유저, 상품) 중복 장바구니 정리 (unique_cart_item 제약 추가 전 실행)
+    python manage.py dedupe_cart_items
+    """
+
+    help = "같은 유저, 상품의 장바구니 row 를 수량을 합쳐 하나로 정리합니다."
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"{CartItem.objects.dedupe()}개 중복 장바구니 정리 완료"))
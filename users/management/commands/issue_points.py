@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from users.models import Point, User
+
+
+class Command(BaseCommand):
+    """
+    캠페인 포인트 대량 지급
+    python manage.py issue_points <campaign> <point> --type <id> [--target active|subscribers] [--user <id> ...]
+    """
+
+    help = "대상 유저에게 캠페인 포인트를 대량 지급합니다. (같은 캠페인은 한번만 지급)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("campaign", help="캠페인 id (중복 지급 방지)")
+        parser.add_argument("point", type=int, help="유저별 지급 포인트")
+        parser.add_argument("--type", type=int, dest="point_type_id", required=True, choices=Point.PLUS_TYPES)
+        parser.add_argument("--target", choices=["active", "subscribers"], default="active", help="대상 유저")
+        parser.add_argument("--user", type=int, nargs="*", dest="user_ids", help="대상 유저 id")
+        parser.add_argument("--batch-size", type=int, default=1000, dest="batch_size")
+
+    def get_users(self, options):
+        if options.get("user_ids"):
+            return User.objects.filter(pk__in=options["user_ids"])
+        if options["target"] == "subscribers":
+            return User.objects.filter(is_active=True, subscribe_data__subscribe=True)
+        return User.objects.filter(is_active=True)
+
+    def handle(self, *args, **options):
+        point = options["point"]
+        if point <= 0:
+            raise CommandError("지급 포인트는 0보다 커야 합니다.")
+        user_ids = self.get_users(options).order_by("pk").values_list("pk", flat=True)
+
+        def progress(processed, issued, elapsed):
+            self.stdout.write(f"{processed}명 처리, {issued}명 지급 ({processed / max(elapsed, 0.001):.0f}명/초)")
+
+        processed, issued = Point.objects.issue(
+            options["campaign"],
+            options["point_type_id"],
+            ((user_id, point) for user_id in user_ids.iterator(chunk_size=options["batch_size"])),
+            batch_size=options["batch_size"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f"{options['campaign']}: {processed}명 중 {issued}명 지급 완료"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from users.models import PointBalance, PointBalanceSnapshot
+
+
+class Command(BaseCommand):
+    """
+    포인트 잔액 검증, 재계산(일별 집계 포함), 스냅샷 저장, 보관 기간이 지난 스냅샷 삭제
+    python manage.py point_balance verify|repair|snapshot|prune [--full] [--user <id> ...] [--days <일>]
+    """
+
+    help = "포인트 잔액을 원본(Point)과 비교하거나 재계산합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["verify", "repair", "snapshot", "prune"])
+        parser.add_argument("--full", action="store_true", help="스냅샷 대신 전체 포인트로 검증")
+        parser.add_argument("--user", type=int, nargs="*", dest="user_ids", help="대상 유저 id")
+        parser.add_argument("--days", type=int, help="스냅샷 보관 기간(일), 기본값 POINT_SNAPSHOT_RETENTION_DAYS")
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        user_ids = options.get("user_ids") or None
+
+        if action == "snapshot":
+            self.stdout.write(self.style.SUCCESS(f"{PointBalance.objects.snapshot()}개 잔액 스냅샷 저장"))
+            return
+
+        if action == "prune":
+            deleted = PointBalanceSnapshot.objects.prune(options.get("days"))
+            self.stdout.write(self.style.SUCCESS(f"{deleted}개 스냅샷 삭제"))
+            return
+
+        if action == "repair":
+            with transaction.atomic():
+                balances = PointBalance.objects.rebuild(user_ids)
+            self.stdout.write(self.style.SUCCESS(f"{len(balances)}개 잔액 재계산 완료"))
+            return
+
+        mismatches = PointBalance.objects.verify(user_ids, full=options["full"])
+        for user_id, stored, expected in mismatches:
+            self.stdout.write(f"user {user_id}: stored={stored} expected={expected}")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"{len(mismatches)}개 잔액 불일치"))
+        else:
+            self.stdout.write(self.style.SUCCESS("포인트 잔액 일치"))
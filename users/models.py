@@ -1,14 +1,24 @@
 from django.db import models
 from config.models import CommonModel
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser
-from datetime import date
+from datetime import date, timedelta
 from config.models import CommonModel,img_upload_to
 from .iamport import validation_prepare, get_transaction
 from .validated import ValidatedData
 import hashlib
+import itertools
 import random
 import time
-from django.db.models.signals import post_save
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from products.models import ProductStatistic
+from products.cache import CatalogCache
+from .cache import PointCalendarCache
 
 
 class UserManager(BaseUserManager):
@@ -155,6 +165,62 @@ class Delivery(models.Model):
         return str(self.user)
 
 
+class CartItemManager(models.Manager):
+    """
+    장바구니 일괄 추가
+    """
+
+    def merge(self, user, lines):
+        """
+        (상품 id, 수량) 목록을 장바구니에 추가, 이미 담긴 상품은 수량 합산
+        판매중 상품 조회 한번 + 없는 row INSERT 한번 + 수량 UPDATE(amount = amount + n) 한번으로 처리
+        수량은 DB 에서 더하므로 동시에 담아도 합산이 유실되지 않음
+        판매중(1)이 아닌 상품은 건너뛰고 (추가한 장바구니 쿼리셋, 건너뛴 상품 id 목록) 반환
+        """
+        from products.models import Product
+        from products.stock import StockLedger
+
+        lines = StockLedger.merge(lines)
+        sellable = set(
+            Product.objects.filter(pk__in=[product_id for product_id, amount in lines], item_state=1)
+            .values_list("pk", flat=True)
+        )
+        skipped = [product_id for product_id, amount in lines if product_id not in sellable]
+        lines = [(product_id, amount) for product_id, amount in lines if product_id in sellable]
+        if lines:
+            with transaction.atomic():
+                self.bulk_create(
+                    [self.model(user=user, product_id=product_id, amount=0) for product_id, amount in lines],
+                    ignore_conflicts=True,
+                )
+                self.filter(user=user, product_id__in=sellable).update(
+                    amount=F("amount") + Case(
+                        *[When(product_id=product_id, then=Value(amount)) for product_id, amount in lines],
+                        default=Value(0),
+                        output_field=models.PositiveIntegerField(),
+                    ),
+                    updated_at=timezone.now(),
+                )
+        return self.filter(user=user, product_id__in=sellable), skipped
+
+    @transaction.atomic
+    def dedupe(self):
+        """
+        (유저, 상품) 중복 row 를 가장 먼저 담은 row 로 수량을 합쳐 정리, 정리한 (유저, 상품) 수 반환
+        unique_cart_item 제약 추가(migrate) 전에 실행 (python manage.py dedupe_cart_items)
+        """
+        duplicates = list(
+            self.order_by()
+            .values("user_id", "product_id")
+            .annotate(keep_id=Min("pk"), total=Sum("amount"), rows=Count("pk"))
+            .filter(rows__gt=1)
+        )
+        for row in duplicates:
+            self.filter(user_id=row["user_id"], product_id=row["product_id"]).exclude(pk=row["keep_id"]).delete()
+        self.bulk_update([self.model(pk=row["keep_id"], amount=row["total"]) for row in duplicates], ["amount"])
+        return len(duplicates)
+
+
 class CartItem(CommonModel):
     """장바구니"""
 
@@ -170,6 +236,110 @@ class CartItem(CommonModel):
     )
     amount = models.PositiveIntegerField("상품개수", default=1)
 
+    objects = CartItemManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], name="unique_cart_item"),
+        ]
+
+
+class StockReservationManager(models.Manager):
+    """
+    장바구니 재고 선점
+    판매 가능 수량 = 상품 재고 - 다른 사용자의 유효한 선점 수량
+    """
+
+    def get_timeout(self):
+        return getattr(settings, "STOCK_RESERVATION_TIMEOUT", 60 * 10)
+
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def get_held_amounts(self, product_ids, exclude_user=None):
+        """
+        상품별 유효한 선점 수량 합계
+        """
+        reservations = self.active().filter(product_id__in=product_ids)
+        if exclude_user is not None:
+            reservations = reservations.exclude(user=exclude_user)
+        return dict(reservations.values("product_id").annotate(total=Sum("amount")).values_list("product_id", "total"))
+
+    def get_available_amounts(self, product_ids, user=None):
+        """
+        상품별 판매 가능 수량 (user 의 선점 수량은 판매 가능 수량에 포함)
+        """
+        from products.models import Product
+
+        held = self.get_held_amounts(product_ids, exclude_user=user)
+        return {
+            product_id: max((amount or 0) - held.get(product_id, 0), 0)
+            for product_id, amount in Product.objects.filter(pk__in=product_ids).values_list("pk", "amount")
+        }
+
+    @transaction.atomic
+    def reserve(self, user, lines):
+        """
+        (상품 id, 수량) 목록 선점, 이미 선점한 상품은 수량과 만료 시각 갱신
+        동시 선점 시 판매 가능 수량을 넘지 않도록 상품 row 를 id 순서로 잠금
+        (선점 목록, 실패 목록 [(상품 id, 요청 수량, 판매 가능 수량)]) 반환
+        """
+        from products.models import Product
+
+        lines = dict(lines)
+        product_ids = sorted(lines)
+        list(Product.objects.select_for_update().filter(pk__in=product_ids).order_by("pk").values_list("pk"))
+        available = self.get_available_amounts(product_ids, user=user)
+        expires_at = timezone.now() + timedelta(seconds=self.get_timeout())
+
+        reservations, failures = [], []
+        for product_id in product_ids:
+            amount = lines[product_id]
+            if amount > available.get(product_id, 0):
+                failures.append((product_id, amount, available.get(product_id, 0)))
+                continue
+            reservation, created = self.update_or_create(
+                user=user, product_id=product_id, defaults={"amount": amount, "expires_at": expires_at}
+            )
+            reservations.append(reservation)
+        return reservations, failures
+
+    def release(self, user, product_ids=None):
+        """
+        사용자의 선점 해제 (주문 완료 시 재고 차감으로 전환)
+        """
+        reservations = self.filter(user=user)
+        if product_ids is not None:
+            reservations = reservations.filter(product_id__in=product_ids)
+        return reservations.delete()[0]
+
+    def expire(self):
+        """
+        만료된 선점 일괄 삭제, 삭제한 개수 반환
+        """
+        return self.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+class StockReservation(CommonModel):
+    """장바구니 재고 선점 (사용자, 상품별 하나, expires_at 까지 유효)"""
+
+    user = models.ForeignKey("users.User", models.CASCADE, verbose_name="유저", related_name="stock_reservations")
+    product = models.ForeignKey(
+        "products.Product", models.CASCADE, verbose_name="상품", related_name="stock_reservations"
+    )
+    amount = models.PositiveIntegerField("선점수량")
+    expires_at = models.DateTimeField("만료시각", db_index=True)
+
+    objects = StockReservationManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], name="unique_stock_reservation"),
+        ]
+        indexes = [
+            models.Index(fields=["product", "expires_at"], name="reservation_product_idx"),
+        ]
+
 
 class Bill(CommonModel):
     """주문내역"""
@@ -210,6 +380,446 @@ class OrderItem(CommonModel):
     image = models.TextField("상품이미지", null=True)
     product_id = models.PositiveIntegerField("상품ID")
 
+    class Meta:
+        indexes = [
+            # 판매자 주문 대시보드 (주문 상태 필터, 주문일 역순 커서 페이지네이션)
+            models.Index(fields=["seller", "order_status", "-created_at"], name="orderitem_seller_status_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        변경 전 주문 상태 기록 (통계 증감량 계산용)
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status_id = instance.__dict__.get("order_status_id")
+        return instance
+
+
+class BillSummaryManager(models.Manager):
+    """
+    주문내역 요약 생성 및 갱신
+    """
+
+    def summarize(self, bill_id, order_items):
+        """
+        주문상품 목록으로 요약 객체 생성 (저장하지 않음)
+        """
+        order_items = sorted(order_items, key=lambda order_item: order_item.pk or 0)
+        thumbnail = next((order_item for order_item in order_items if order_item.image), None)
+        if thumbnail is None and order_items:
+            thumbnail = order_items[0]
+        return self.model(
+            bill_id=bill_id,
+            total_price=sum(order_item.price * order_item.amount for order_item in order_items),
+            order_items_count=len(order_items),
+            thumbnail_image=thumbnail.image if thumbnail else None,
+            thumbnail_name=thumbnail.name if thumbnail else "",
+            min_status_id=min((order_item.order_status_id for order_item in order_items), default=None),
+        )
+
+    def save_all(self, summaries):
+        self.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=["bill"],
+            update_fields=["total_price", "order_items_count", "thumbnail_image", "thumbnail_name", "min_status"],
+        )
+        return summaries
+
+    def build(self, bill, order_items):
+        """
+        주문 생성 시 저장한 주문상품으로 요약 생성 (추가 조회 없음)
+        """
+        return self.save_all([self.summarize(bill.pk, order_items)])[0]
+
+    def rebuild(self, bill_ids=None):
+        """
+        주문상품 원본으로 요약 재생성, 생성한 요약 목록 반환
+        """
+        bills = Bill.objects.all() if bill_ids is None else Bill.objects.filter(pk__in=bill_ids)
+        bill_ids = list(bills.values_list("pk", flat=True))
+        order_items = defaultdict(list)
+        for order_item in OrderItem.objects.filter(bill_id__in=bill_ids).only(
+            "pk", "bill_id", "price", "amount", "image", "name", "order_status_id"
+        ):
+            order_items[order_item.bill_id].append(order_item)
+        return self.save_all([self.summarize(bill_id, order_items[bill_id]) for bill_id in bill_ids])
+
+    def refresh_status(self, bill_ids):
+        """
+        주문 상태 변경 시 주문내역의 최소 주문 상태 갱신 (UPDATE 한번)
+        """
+        if not bill_ids:
+            return 0
+        min_status = (
+            OrderItem.objects.filter(bill_id=OuterRef("bill_id"))
+            .values("bill_id")
+            .annotate(min_status=Min("order_status_id"))
+            .values("min_status")
+        )
+        return self.filter(bill_id__in=bill_ids).update(min_status_id=Subquery(min_status))
+
+
+class BillSummary(models.Model):
+    """
+    주문내역 요약 (주문내역 목록 조회용)
+    주문 생성 시 생성, 주문 상태 변경 시 최소 주문 상태 갱신
+    """
+
+    bill = models.OneToOneField(
+        "users.Bill", models.CASCADE, related_name="summary", primary_key=True, verbose_name="주문내역"
+    )
+    total_price = models.PositiveIntegerField("총 주문금액", default=0)
+    order_items_count = models.PositiveIntegerField("주문상품 수", default=0)
+    thumbnail_image = models.TextField("대표 상품이미지", null=True)
+    thumbnail_name = models.CharField("대표 상품명", max_length=100, blank=True)
+    min_status = models.ForeignKey(
+        "users.StatusCategory", models.SET_NULL, null=True, verbose_name="최소 주문상태", related_name="+"
+    )
+
+    objects = BillSummaryManager()
+
+
+class SellerOrderCounterManager(models.Manager):
+    """
+    판매자 주문 상태별 주문상품 수
+    대시보드 첫 조회 시 원본(OrderItem)으로 생성하고 이후 주문 상태 변경 시 증감
+    """
+
+    def rebuild(self, seller_id):
+        """
+        판매자의 모든 주문 상태 카운터를 원본으로 재계산
+        """
+        counts = dict(
+            OrderItem.objects.filter(seller_id=seller_id)
+            .values("order_status_id")
+            .annotate(count=Count("pk"))
+            .values_list("order_status_id", "count")
+        )
+        self.bulk_create(
+            [
+                self.model(seller_id=seller_id, order_status_id=status_id, count=counts.get(status_id, 0))
+                for status_id in StatusCategory.objects.values_list("pk", flat=True)
+            ],
+            update_conflicts=True,
+            unique_fields=["seller", "order_status"],
+            update_fields=["count"],
+        )
+
+    def add(self, deltas):
+        """
+        카운터 증감을 UPDATE 한번으로 반영 (카운터를 생성하지 않은 판매자는 무시)
+        deltas : {(판매자 id, 주문 상태 id): 증감}
+        """
+        deltas = {key: count for key, count in deltas.items() if count}
+        if not deltas:
+            return 0
+        condition = Q()
+        for seller_id, status_id in deltas:
+            condition |= Q(seller_id=seller_id, order_status_id=status_id)
+        delta = Case(
+            *[
+                When(seller_id=seller_id, order_status_id=status_id, then=Value(count))
+                for (seller_id, status_id), count in deltas.items()
+            ],
+            default=Value(0),
+            output_field=models.IntegerField(),
+        )
+        return self.filter(condition).update(count=F("count") + delta)
+
+    @transaction.atomic
+    def get_counts(self, seller_id):
+        """
+        주문 상태별 주문상품 수 [{"order_status": id, "name": 상태, "count": 개수}]
+        """
+        counters = self.filter(seller_id=seller_id).select_related("order_status").order_by("order_status_id")
+        if not counters:
+            self.rebuild(seller_id)
+            counters = counters.all()
+        return [
+            {"order_status": counter.order_status_id, "name": counter.order_status.name, "count": counter.count}
+            for counter in counters
+        ]
+
+
+class SellerOrderCounter(models.Model):
+    """판매자 주문 상태별 주문상품 수 (판매자 주문 대시보드)"""
+
+    seller = models.ForeignKey(
+        "users.Seller", models.CASCADE, verbose_name="판매자", related_name="order_counters"
+    )
+    order_status = models.ForeignKey(
+        "users.StatusCategory", models.CASCADE, verbose_name="주문상태", related_name="+"
+    )
+    count = models.IntegerField("주문상품 수", default=0)
+
+    objects = SellerOrderCounterManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["seller", "order_status"], name="unique_seller_order_counter"),
+        ]
+
+
+class OrderEventManager(models.Manager):
+    """
+    주문 상태 변경 이벤트 추가 및 집계 테이블(consumer) 반영
+    """
+
+    def get_settle_time(self):
+        return timedelta(seconds=getattr(settings, "ORDER_EVENT_SETTLE_SECONDS", 5))
+
+    def get_consumers(self):
+        """
+        {consumer 이름: 이벤트 목록을 집계 테이블에 반영하는 함수}
+        """
+        return {"seller_daily_sales": SellerDailySales.objects.fold}
+
+    def append(self, transitions):
+        """
+        (주문상품, 변경 전 상태 id) 목록을 이벤트로 저장 (INSERT 한번)
+        """
+        now = timezone.now()
+        return self.bulk_create(
+            [
+                self.model(
+                    order_item_id=order_item.pk,
+                    seller_id=order_item.seller_id,
+                    product_id=order_item.product_id,
+                    from_status=previous_status,
+                    to_status=order_item.order_status_id,
+                    amount=order_item.amount,
+                    price=order_item.price,
+                    created_at=now,
+                )
+                for order_item, previous_status in transitions
+            ]
+        )
+
+    def get_gap_timeout(self):
+        return timedelta(seconds=getattr(settings, "ORDER_EVENT_GAP_SECONDS", 60 * 60))
+
+    def consume(self, name, fold, batch_size=1000):
+        """
+        watermark(마지막으로 반영한 이벤트 id) 이후 이벤트를 id 순서로 batch_size 씩 fold 에 전달, 반영한 이벤트 수 반환
+        settle 시간이 지난 이벤트만 반영하고, watermark 아래의 빈 id(늦게 커밋되는 트랜잭션)는 gap 으로 저장해
+        다음 실행마다 다시 조회 (gap 보관 시간이 지난 id 는 롤백된 것으로 보고 제외)
+        """
+        now = timezone.now()
+        cutoff = now - self.get_settle_time()
+        processed = 0
+        with transaction.atomic():
+            consumer, created = OrderEventConsumer.objects.select_for_update().get_or_create(name=name)
+            gaps = {int(event_id): seen_at for event_id, seen_at in consumer.gaps.items()}
+
+            # 이전 실행에서 비어 있던 id 중 커밋된 이벤트 반영
+            if gaps:
+                found = list(self.filter(pk__in=gaps).order_by("pk"))
+                if found:
+                    fold(found)
+                    processed += len(found)
+                    for event in found:
+                        del gaps[event.pk]
+
+            events = self.filter(created_at__lte=cutoff).order_by("pk")
+            seen_at = now.isoformat()
+            while batch := list(events.filter(pk__gt=consumer.last_event_id)[:batch_size]):
+                fold(batch)
+                present = {event.pk for event in batch}
+                # 처음 실행은 첫 이벤트 이전 id 를 gap 으로 보지 않음
+                start = consumer.last_event_id + 1 if consumer.last_event_id else batch[0].pk
+                for event_id in range(start, batch[-1].pk):
+                    if event_id not in present:
+                        gaps[event_id] = seen_at
+                consumer.last_event_id = batch[-1].pk
+                processed += len(batch)
+
+            expired = (now - self.get_gap_timeout()).isoformat()
+            consumer.gaps = {str(event_id): seen for event_id, seen in gaps.items() if seen > expired}
+            consumer.save()
+        return processed
+
+    def consume_all(self):
+        return {name: self.consume(name, fold) for name, fold in self.get_consumers().items()}
+
+
+class OrderEvent(models.Model):
+    """
+    주문 상태 변경 이벤트 (추가만 가능)
+    신규 주문상품은 변경 전 상태(from_status) None
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    order_item = models.ForeignKey("users.OrderItem", models.CASCADE, verbose_name="주문상품", related_name="events")
+    seller = models.ForeignKey("users.Seller", models.CASCADE, verbose_name="판매자", related_name="+")
+    product_id = models.PositiveIntegerField("상품ID")
+    from_status = models.PositiveSmallIntegerField("변경 전 주문상태", null=True)
+    to_status = models.PositiveSmallIntegerField("변경 후 주문상태")
+    amount = models.PositiveIntegerField("상품개수")
+    price = models.PositiveIntegerField("상품가격")
+    created_at = models.DateTimeField("발생시각", default=timezone.now)
+
+    objects = OrderEventManager()
+
+
+class OrderEventConsumer(models.Model):
+    """주문 이벤트 consumer 별 마지막으로 반영한 이벤트 id (watermark), watermark 아래 아직 비어 있는 id (gap)"""
+
+    name = models.CharField("이름", max_length=50, primary_key=True)
+    last_event_id = models.BigIntegerField("마지막 이벤트 id", default=0)
+    gaps = models.JSONField("빈 이벤트 id", default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class SellerDailySalesManager(models.Manager):
+    """
+    판매자 일별 주문 집계 (주문 이벤트 consumer)
+    """
+
+    def get_deltas(self, event):
+        total_price = event.amount * event.price
+        deltas = defaultdict(int)
+        if event.from_status is None:
+            deltas["order_count"] += 1
+            deltas["order_price"] += total_price
+        # 구매확정(6) 진입 시 확정 금액 증가, 구매확정에서 벗어나면 차감
+        for status, sign in ((event.to_status, 1), (event.from_status, -1)):
+            if status == 6:
+                deltas["confirmed_count"] += sign
+                deltas["confirmed_amount"] += sign * event.amount
+                deltas["confirmed_price"] += sign * total_price
+        # 주문취소(7), 환불완료(9)
+        if event.to_status in (7, 9):
+            deltas["refund_price"] += total_price
+        return deltas
+
+    def calculate(self, events, changes=None):
+        """
+        이벤트 목록을 (판매자, 날짜)별 증감량으로 합산
+        """
+        if changes is None:
+            changes = defaultdict(lambda: defaultdict(int))
+        for event in events:
+            created_at = timezone.localtime(event.created_at) if timezone.is_aware(event.created_at) else event.created_at
+            for field, value in self.get_deltas(event).items():
+                changes[(event.seller_id, created_at.date())][field] += value
+        return changes
+
+    def verify(self, name="seller_daily_sales"):
+        """
+        반영한 이벤트(watermark 이하, gap 제외)로 다시 합산한 값과 저장된 집계 비교
+        불일치 목록 [((판매자 id, 날짜), 저장된 값, 계산한 값)] 반환
+        """
+        consumer = OrderEventConsumer.objects.filter(name=name).first()
+        events = OrderEvent.objects.none()
+        if consumer is not None:
+            events = OrderEvent.objects.filter(pk__lte=consumer.last_event_id).exclude(pk__in=map(int, consumer.gaps))
+        changes = self.calculate(events.order_by("pk").iterator())
+        stored = {
+            (row["seller_id"], row["date"]): {field: row[field] for field in self.model.SUM_FIELDS}
+            for row in self.values("seller_id", "date", *self.model.SUM_FIELDS)
+        }
+        mismatches = []
+        for key in set(changes) | set(stored):
+            expected = {field: changes.get(key, {}).get(field, 0) for field in self.model.SUM_FIELDS}
+            current = stored.get(key, dict.fromkeys(self.model.SUM_FIELDS, 0))
+            if current != expected:
+                mismatches.append((key, current, expected))
+        return sorted(mismatches, key=lambda mismatch: mismatch[0])
+
+    def fold(self, events):
+        """
+        이벤트 목록을 (판매자, 날짜)별 증감량으로 합산해 반영
+        """
+        changes = self.calculate(events)
+        if not changes:
+            return
+
+        rows = {
+            (row.seller_id, row.date): row
+            for row in self.filter(
+                seller_id__in={seller_id for seller_id, day in changes}, date__in={day for seller_id, day in changes}
+            )
+        }
+        created, updated = [], []
+        for (seller_id, day), deltas in changes.items():
+            row = rows.get((seller_id, day))
+            if row is None:
+                row = self.model(seller_id=seller_id, date=day)
+                created.append(row)
+            else:
+                updated.append(row)
+            for field, value in deltas.items():
+                setattr(row, field, getattr(row, field) + value)
+        self.bulk_create(created)
+        self.bulk_update(updated, self.model.SUM_FIELDS)
+
+
+class SellerDailySales(models.Model):
+    """판매자 일별 주문 집계 (주문 이벤트 발생일 기준)"""
+
+    SUM_FIELDS = ["order_count", "order_price", "confirmed_count", "confirmed_amount", "confirmed_price", "refund_price"]
+
+    seller = models.ForeignKey("users.Seller", models.CASCADE, verbose_name="판매자", related_name="daily_sales")
+    date = models.DateField("날짜")
+    order_count = models.IntegerField("주문상품 수", default=0)
+    order_price = models.BigIntegerField("주문금액", default=0)
+    confirmed_count = models.IntegerField("구매확정 주문상품 수", default=0)
+    confirmed_amount = models.IntegerField("구매확정 상품개수", default=0)
+    confirmed_price = models.BigIntegerField("구매확정 금액", default=0)
+    refund_price = models.BigIntegerField("취소, 환불 금액", default=0)
+
+    objects = SellerDailySalesManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["seller", "date"], name="unique_seller_daily_sales"),
+        ]
+
+
+def apply_order_transitions(transitions):
+    """
+    주문 상태 변경 내역을 집계 테이블에 반영하고 주문 이벤트로 저장
+    transitions : (주문상품, 변경 전 상태 id) 목록, 신규 주문상품은 변경 전 상태 None
+    """
+    sales = defaultdict(int)
+    counters = defaultdict(int)
+    bill_ids = set()
+    events = []
+    for order_item, previous_status in transitions:
+        current_status = order_item.order_status_id
+        if previous_status == current_status:
+            continue
+        events.append((order_item, previous_status))
+        counters[(order_item.seller_id, current_status)] += 1
+        if previous_status is not None:
+            bill_ids.add(order_item.bill_id)
+            counters[(order_item.seller_id, previous_status)] -= 1
+        # 구매확정(6) 진입 시 판매량 증가, 구매확정에서 벗어나면 차감
+        if current_status == 6:
+            sales[order_item.product_id] += order_item.amount
+        elif previous_status == 6:
+            sales[order_item.product_id] -= order_item.amount
+    ProductStatistic.objects.add_sales(sales)
+    BillSummary.objects.refresh_status(bill_ids)
+    SellerOrderCounter.objects.add(counters)
+    if events:
+        OrderEvent.objects.append(events)
+    # 목록에 보이는 판매량(정렬 컬럼)이 바뀐 경우만 상품 목록 캐시 무효화 (주문, 배송 상태 변경은 제외)
+    if any(sales.values()):
+        CatalogCache.bump_version()
+
+
+def order_item_saved(sender, instance, created, *args, **kwargs):
+    # 주문상품 저장 시 상태 변경 내역 반영
+    previous_status = None if created else getattr(instance, "_loaded_status_id", None)
+    apply_order_transitions([(instance, previous_status)])
+    instance._loaded_status_id = instance.order_status_id
+
+
+post_save.connect(order_item_saved, sender=OrderItem)
+
 
 class PointType(models.Model):
     """포인트 종류: 출석(1), 텍스트리뷰(2), 포토리뷰(3), 구매(4), 충전(5), 사용(6), 결제(7), 정산(8), 환불(9)"""
@@ -222,6 +832,54 @@ class PointType(models.Model):
         return self.title
 
 
+class PointManager(models.Manager):
+    """
+    포인트 대량 지급 (캠페인, 정산)
+    """
+
+    def issue(self, campaign, point_type_id, lines, batch_size=1000, progress=None):
+        """
+        (유저 id, 포인트) 목록을 batch_size 개씩 나눠 bulk_create 후 잔액, 일별 집계에 묶음마다 UPDATE 한번으로 반영
+        같은 campaign 으로 이미 지급한 유저는 건너뜀 (다시 실행하거나 겹쳐 실행해도 중복 지급 없음)
+        progress(처리 수, 지급 수, 경과 시간) : 묶음마다 호출
+        반환 : (처리 수, 지급 수)
+        """
+        if point_type_id not in Point.PLUS_TYPES:
+            raise ValueError("적립 포인트 종류만 지급할 수 있습니다.")
+        lines = iter(lines)
+        processed = issued = 0
+        started = time.monotonic()
+        today = timezone.now().date()
+        while True:
+            chunk = dict(itertools.islice(lines, batch_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                # 잔액 row 를 잠가(없다면 생성) 같은 유저에게 겹쳐 실행되는 지급을 순서대로 처리
+                PointBalance.objects.lock_balances(chunk)
+                issued_ids = set(
+                    self.filter(campaign=campaign, user_id__in=chunk).values_list("user_id", flat=True)
+                )
+                self.bulk_create(
+                    [
+                        self.model(user_id=user_id, point_type_id=point_type_id, point=point, date=today, campaign=campaign)
+                        for user_id, point in chunk.items()
+                        if user_id not in issued_ids and point > 0
+                    ],
+                    ignore_conflicts=True,
+                )
+                # 이번에 저장한 포인트 (ignore_conflicts 는 id 를 돌려주지 않으므로 다시 조회)
+                points = list(
+                    self.filter(campaign=campaign, user_id__in=chunk).exclude(user_id__in=issued_ids).order_by()
+                )
+                apply_points(points)
+            processed += len(chunk)
+            issued += len(points)
+            if progress is not None:
+                progress(processed, issued, time.monotonic() - started)
+        return processed, issued
+
+
 class Point(CommonModel):
     """포인트 종류: 출석(1), 텍스트리뷰(2), 포토리뷰(3), 구매(4), 충전(5), 사용(6), 결제(7), 정산(8), 환불(9)"""
 
@@ -231,12 +889,430 @@ class Point(CommonModel):
     date = models.DateField("날짜", default=date.today)
     point = models.PositiveIntegerField("포인트점수", default=0, null=False, blank=False)
     point_type = models.ForeignKey(PointType, on_delete=models.PROTECT)
+    campaign = models.CharField("캠페인", max_length=50, null=True, blank=True)
+
+    objects = PointManager()
+
+    # 적립, 차감 포인트 종류
+    PLUS_TYPES = [1, 2, 3, 4, 5, 8, 9]
+    MINUS_TYPES = [6, 7]
 
     def __str__(self):
         return self.user.nickname + self.point_type.title + str(self.point)
     
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["campaign", "user"], condition=Q(campaign__isnull=False), name="unique_campaign_point"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # 잔액 갱신(post_save)과 같은 트랜잭션으로 저장
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def get_signed_point(self):
+        if self.point_type_id in self.MINUS_TYPES:
+            return -self.point
+        return self.point if self.point_type_id in self.PLUS_TYPES else 0
+
+    @classmethod
+    def get_signed_sum(cls):
+        """
+        적립 - 차감 합계 (aggregate, annotate 용)
+        """
+        return Sum(
+            Case(
+                When(point_type_id__in=cls.PLUS_TYPES, then=F("point")),
+                When(point_type_id__in=cls.MINUS_TYPES, then=-F("point")),
+                default=Value(0),
+                output_field=models.BigIntegerField(),
+            )
+        )
+
+
+class PointBalanceManager(models.Manager):
+    """
+    사용자별 포인트 잔액
+    포인트 저장과 같은 트랜잭션에서 증감하고, 스냅샷 + 이후 포인트로 검증
+    """
+
+    def get_balance(self, user_id):
+        """
+        잔액 조회 (기본키 조회 한번, 잔액이 없다면 원본으로 생성)
+        """
+        balance = self.filter(pk=user_id).values_list("balance", flat=True).first()
+        if balance is None:
+            balance = self.rebuild([user_id]).get(user_id, 0)
+        return balance
+
+    def lock_balance(self, user_id):
+        """
+        잔액 row 를 잠그고 잔액 반환 (트랜잭션 안에서 호출)
+        동시 결제 시 잔액 확인과 결제 포인트 저장 사이에 다른 결제가 끼어들지 않도록 사용
+        """
+        balances = self.select_for_update().filter(pk=user_id).values_list("balance", flat=True)
+        balance = balances.first()
+        if balance is None:
+            self.rebuild([user_id])
+            balance = balances.first()
+        return balance
+
+    def lock_balances(self, user_ids):
+        """
+        여러 사용자의 잔액 row 잠금, 잔액이 없는 사용자는 원본으로 생성 (생성한 row 도 트랜잭션 끝까지 잠김)
+        """
+        locked = set(self.select_for_update().filter(pk__in=user_ids).values_list("pk", flat=True))
+        missing = [user_id for user_id in user_ids if user_id not in locked]
+        if missing:
+            self.rebuild(missing)
+
+    def calculate(self, user_ids=None):
+        """
+        원본(Point)으로 사용자별 (잔액, 마지막 포인트 id) 계산
+        """
+        points = Point.objects.order_by()
+        if user_ids is not None:
+            points = points.filter(user_id__in=user_ids)
+        return {
+            user_id: (total or 0, last_point_id)
+            for user_id, total, last_point_id in points.values("user_id")
+            .annotate(total=Point.get_signed_sum(), last_point_id=Max("pk"))
+            .values_list("user_id", "total", "last_point_id")
+        }
+
+    @transaction.atomic
+    def rebuild(self, user_ids=None):
+        """
+        원본으로 잔액, 일별 집계 재계산, {user id: 잔액} 반환
+        """
+        totals = self.calculate(user_ids)
+        if user_ids is None:
+            user_ids = set(totals) | set(self.values_list("pk", flat=True))
+        balances = []
+        for user_id in user_ids:
+            balance, last_point_id = totals.get(user_id, (0, 0))
+            balances.append(self.model(user_id=user_id, balance=balance, last_point_id=last_point_id))
+        self.bulk_create(
+            balances, update_conflicts=True, unique_fields=["user"], update_fields=["balance", "last_point_id"]
+        )
+        PointDailyRollup.objects.rebuild([balance.user_id for balance in balances])
+        return {balance.user_id: balance.balance for balance in balances}
+
+    def add_points(self, points, sign=1):
+        """
+        저장(sign=1), 삭제(sign=-1)한 포인트 목록을 사용자 수와 관계없이 UPDATE 한번으로 반영
+        잔액이 없는 사용자 id 목록 반환
+        """
+        deltas = defaultdict(int)
+        last_point_ids = defaultdict(int)
+        for point in points:
+            deltas[point.user_id] += sign * point.get_signed_point()
+            last_point_ids[point.user_id] = max(last_point_ids[point.user_id], point.pk or 0)
+        if not deltas:
+            return []
+
+        def by_user(values):
+            return Case(
+                *[When(pk=user_id, then=Value(value)) for user_id, value in values.items()],
+                default=Value(0),
+                output_field=models.BigIntegerField(),
+            )
+
+        user_ids = sorted(deltas)
+        updated = self.filter(pk__in=user_ids).update(
+            balance=F("balance") + by_user(deltas),
+            last_point_id=Greatest(F("last_point_id"), by_user(last_point_ids)),
+        )
+        if updated == len(user_ids):
+            return []
+        existing = set(self.filter(pk__in=user_ids).values_list("pk", flat=True))
+        return [user_id for user_id in user_ids if user_id not in existing]
+
+    def snapshot(self, batch_size=1000):
+        """
+        마지막 스냅샷 이후 바뀐(잔액 또는 마지막 반영 포인트 id) 잔액만 스냅샷 저장, 저장한 개수 반환
+        user id 순서로 batch_size 개씩 조회해 저장 (전체 목록을 메모리에 올리지 않음)
+        스냅샷도 포인트도 없는 잔액은 저장하지 않음
+        """
+        latest = PointBalanceSnapshot.objects.filter(user_id=OuterRef("pk")).order_by("-created_at", "-pk")
+        changed = (
+            self.annotate(
+                snapshot_balance=Coalesce(Subquery(latest.values("balance")[:1]), 0),
+                snapshot_last_point_id=Coalesce(Subquery(latest.values("last_point_id")[:1]), 0),
+            )
+            .filter(~Q(balance=F("snapshot_balance")) | ~Q(last_point_id=F("snapshot_last_point_id")))
+            .order_by("pk")
+        )
+        count = last_user_id = 0
+        while True:
+            rows = list(
+                changed.filter(pk__gt=last_user_id).values_list("user_id", "balance", "last_point_id")[:batch_size]
+            )
+            if not rows:
+                return count
+            PointBalanceSnapshot.objects.bulk_create(
+                [
+                    PointBalanceSnapshot(user_id=user_id, balance=balance, last_point_id=last_point_id)
+                    for user_id, balance, last_point_id in rows
+                ]
+            )
+            count += len(rows)
+            last_user_id = rows[-1][0]
+
+    def verify(self, user_ids=None, full=False):
+        """
+        잔액 검증, 불일치 목록 [(user id, 저장된 잔액, 계산한 잔액)] 반환
+        full=False : 마지막 스냅샷 잔액 + 스냅샷 이후 포인트 (스냅샷이 없다면 전체 포인트)
+        full=True : 전체 포인트
+        """
+        balances = self.all() if user_ids is None else self.filter(pk__in=user_ids)
+        stored = dict(balances.values_list("user_id", "balance"))
+        if full:
+            totals = self.calculate(user_ids)
+            expected = {user_id: totals.get(user_id, (0, 0))[0] for user_id in set(stored) | set(totals)}
+        else:
+            latest = PointBalanceSnapshot.objects.filter(user_id=OuterRef("user_id")).order_by("-created_at", "-pk")
+            points = Point.objects.order_by().filter(
+                pk__gt=Coalesce(Subquery(latest.values("last_point_id")[:1]), 0)
+            )
+            if user_ids is not None:
+                points = points.filter(user_id__in=user_ids)
+            deltas = dict(
+                points.values("user_id").annotate(total=Point.get_signed_sum()).values_list("user_id", "total")
+            )
+            snapshots = dict(
+                balances.annotate(
+                    snapshot_balance=Subquery(
+                        PointBalanceSnapshot.objects.filter(user_id=OuterRef("pk"))
+                        .order_by("-created_at", "-pk")
+                        .values("balance")[:1]
+                    )
+                ).values_list("user_id", "snapshot_balance")
+            )
+            expected = {
+                user_id: (snapshots.get(user_id) or 0) + (deltas.get(user_id) or 0)
+                for user_id in set(stored) | set(deltas)
+            }
+        return [
+            (user_id, stored.get(user_id), expected[user_id])
+            for user_id in sorted(expected)
+            if stored.get(user_id) != expected[user_id]
+        ]
+
+
+class PointBalance(models.Model):
+    """사용자별 포인트 잔액 (적립 - 차감)"""
+
+    user = models.OneToOneField(
+        "users.User", models.CASCADE, related_name="point_balance", primary_key=True, verbose_name="유저"
+    )
+    balance = models.BigIntegerField("잔액", default=0)
+    last_point_id = models.BigIntegerField("마지막 반영 포인트 id", default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PointBalanceManager()
+
+
+class PointBalanceSnapshotManager(models.Manager):
+    """
+    포인트 잔액 스냅샷 보관
+    """
+
+    def prune(self, days=None):
+        """
+        보관 기간(POINT_SNAPSHOT_RETENTION_DAYS)이 지난 스냅샷 삭제, 삭제한 개수 반환
+        사용자별 마지막 스냅샷은 잔액 검증 기준이므로 기간이 지나도 유지
+        """
+        if days is None:
+            days = getattr(settings, "POINT_SNAPSHOT_RETENTION_DAYS", 90)
+        latest = self.filter(user_id=OuterRef("user_id")).order_by("-created_at", "-pk")
+        expired = self.filter(created_at__lt=timezone.now() - timedelta(days=days)).exclude(
+            pk=Subquery(latest.values("pk")[:1])
+        )
+        deleted, _ = expired.delete()
+        return deleted
+
+
+class PointBalanceSnapshot(models.Model):
+    """포인트 잔액 스냅샷 (감사, 검증용)"""
+
+    user = models.ForeignKey("users.User", models.CASCADE, related_name="point_snapshots", verbose_name="유저")
+    balance = models.BigIntegerField("잔액")
+    last_point_id = models.BigIntegerField("마지막 반영 포인트 id", default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = PointBalanceSnapshotManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="point_snapshot_user_idx"),
+        ]
+
+
+class PointDailyRollupManager(models.Manager):
+    """
+    사용자, 날짜, 포인트 종류별 포인트 합계
+    잔액(PointBalance)이 있는 사용자는 일별 집계도 모두 생성되어 있음 (잔액과 함께 원본으로 생성)
+    """
+
+    def rebuild(self, user_ids=None):
+        """
+        원본(Point)으로 일별 집계 재생성
+        """
+        rollups = self.all() if user_ids is None else self.filter(user_id__in=user_ids)
+        rollups.delete()
+        points = Point.objects.order_by()
+        if user_ids is not None:
+            points = points.filter(user_id__in=user_ids)
+        self.bulk_create(
+            [
+                self.model(user_id=user_id, date=day, point_type_id=point_type_id, total=total, count=count)
+                for user_id, day, point_type_id, total, count in points.values("user_id", "date", "point_type_id")
+                .annotate(total=Sum("point"), count=Count("pk"))
+                .values_list("user_id", "date", "point_type_id", "total", "count")
+            ],
+            batch_size=1000,
+        )
+
+    def add_points(self, points, sign=1, create_missing=True):
+        """
+        저장(sign=1), 삭제(sign=-1)한 포인트 목록을 (사용자, 날짜, 포인트 종류) 수와 관계없이 UPDATE 한번으로 반영
+        """
+        deltas = defaultdict(lambda: [0, 0])
+        for point in points:
+            delta = deltas[(point.user_id, point.date, point.point_type_id)]
+            delta[0] += sign * point.point
+            delta[1] += sign
+
+        def get_condition(key):
+            user_id, day, point_type_id = key
+            return Q(user_id=user_id, date=day, point_type_id=point_type_id)
+
+        def update(keys):
+            if not keys:
+                return 0
+            # 키마다 OR 로 이으면 SQLite 식 깊이 제한(1000)을 넘으므로 IN 으로 좁힌 뒤 CASE(평평한 WHEN 목록)로 정확히 일치하는 행만 선택
+            matched = Case(
+                *[When(get_condition(key), then=Value(True)) for key in keys],
+                default=Value(False),
+                output_field=models.BooleanField(),
+            )
+            changes = {}
+            for field, index in (("total", 0), ("count", 1)):
+                changes[field] = F(field) + Case(
+                    *[When(get_condition(key), then=Value(deltas[key][index])) for key in keys],
+                    default=Value(0),
+                    output_field=models.BigIntegerField(),
+                )
+            return (
+                self.filter(
+                    user_id__in={user_id for user_id, day, point_type_id in keys},
+                    date__in={day for user_id, day, point_type_id in keys},
+                    point_type_id__in={point_type_id for user_id, day, point_type_id in keys},
+                )
+                .filter(matched)
+                .update(**changes)
+            )
+
+        keys = sorted(deltas)
+        if update(keys) == len(keys) or not create_missing:
+            return
+        # 그날 처음 추가한 포인트 종류 (동시에 생성해도 한 행만 남도록 생성 후 UPDATE)
+        # apply_points 에서 잔액 row 를 먼저 UPDATE(잠금)하므로 조회와 생성 사이에 같은 사용자의 행이 추가되지 않음
+        user_ids = {user_id for user_id, day, point_type_id in keys}
+        existing = set(
+            self.filter(user_id__in=user_ids, date__in={day for user_id, day, point_type_id in keys})
+            .values_list("user_id", "date", "point_type_id")
+        )
+        missing = [key for key in keys if key not in existing]
+        self.bulk_create(
+            [self.model(user_id=user_id, date=day, point_type_id=point_type_id) for user_id, day, point_type_id in missing],
+            ignore_conflicts=True,
+        )
+        update(missing)
+
+    def get_statistics(self, user_id, day, month_start, month_end):
+        """
+        day 와 [month_start, month_end) 기간의 적립, 차감 합계 (쿼리 한번)
+        """
+        rollups = self.filter(user_id=user_id).filter(Q(date=day) | Q(date__gte=month_start, date__lt=month_end))
+        plus, minus = Q(point_type_id__in=Point.PLUS_TYPES), Q(point_type_id__in=Point.MINUS_TYPES)
+        month = Q(date__gte=month_start, date__lt=month_end)
+        statistics = rollups.aggregate(
+            day_plus=Sum("total", filter=Q(date=day) & plus),
+            day_minus=Sum("total", filter=Q(date=day) & minus),
+            month_plus=Sum("total", filter=month & plus),
+            month_minus=Sum("total", filter=month & minus),
+        )
+        return {key: value or 0 for key, value in statistics.items()}
+
+    def get_calendar(self, user_id, start, end):
+        """
+        [start, end) 기간의 날짜별 (적립, 차감, 포인트 수) (쿼리 한번)
+        """
+        rollups = (
+            self.filter(user_id=user_id, date__gte=start, date__lt=end)
+            .order_by()
+            .values("date")
+            .annotate(
+                plus=Sum("total", filter=Q(point_type_id__in=Point.PLUS_TYPES)),
+                minus=Sum("total", filter=Q(point_type_id__in=Point.MINUS_TYPES)),
+                entries=Sum("count"),
+            )
+        )
+        return {
+            rollup["date"]: (rollup["plus"] or 0, rollup["minus"] or 0, rollup["entries"] or 0)
+            for rollup in rollups
+        }
+
+
+class PointDailyRollup(models.Model):
+    """사용자, 날짜, 포인트 종류별 포인트 합계 (포인트 통계 조회용)"""
+
+    user = models.ForeignKey("users.User", models.CASCADE, related_name="point_rollups", verbose_name="유저")
+    date = models.DateField("날짜")
+    point_type = models.ForeignKey(PointType, models.PROTECT, related_name="+", verbose_name="포인트 종류")
+    total = models.BigIntegerField("포인트 합계", default=0)
+    count = models.IntegerField("포인트 수", default=0)
+
+    objects = PointDailyRollupManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date", "point_type"], name="unique_point_daily_rollup"),
+        ]
+
+
+def apply_points(points, sign=1, create_missing=True):
+    """
+    포인트 추가(sign=1), 삭제(sign=-1)를 잔액, 일별 집계에 반영
+    잔액이 없는 사용자는 원본으로 잔액, 일별 집계 생성 (bulk_create 등 post_save 가 발생하지 않는 경로에서 직접 호출)
+    """
+    missing = PointBalance.objects.add_points(points, sign)
+    PointDailyRollup.objects.add_points(
+        [point for point in points if point.user_id not in missing], sign, create_missing=create_missing
+    )
+    if missing and create_missing:
+        PointBalance.objects.rebuild(missing)
+    PointCalendarCache.bump_version(point.user_id for point in points)
+
+
+def point_saved(sender, instance, created, *args, **kwargs):
+    # 포인트 추가 시 잔액, 일별 집계 증감 (기존 포인트 수정은 point_balance repair 로 반영)
+    if created:
+        apply_points([instance])
+
+
+def point_deleted(sender, instance, *args, **kwargs):
+    # 사용자 삭제로 잔액이 먼저 삭제된 경우 다시 생성하지 않음
+    apply_points([instance], sign=-1, create_missing=False)
+
+
+post_save.connect(point_saved, sender=Point)
+post_delete.connect(point_deleted, sender=Point)
 
 
 class TransactionManager(models.Manager):
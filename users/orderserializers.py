@@ -1,12 +1,15 @@
 from rest_framework.serializers import (
+    IntegerField,
+    ListField,
     ModelSerializer,
+    Serializer,
     SerializerMethodField,
     StringRelatedField,
 )
-from users.models import CartItem, Bill, OrderItem, StatusCategory
-from products.models import Product
+from users.models import CartItem, Bill, BillSummary, OrderItem, StatusCategory
 from users.validated import ValidatedData
 from .cryption import AESAlgorithm
+from .loaders import ViewerContext
 from products.serializers import ProductDetailSerializer, SimpleSellerInformation
 from rest_framework.serializers import ValidationError, PrimaryKeyRelatedField
 
@@ -112,45 +115,56 @@ class SimpleBillSerializer(ModelSerializer):
 class BillSerializer(ModelSerializer):
     """
     주문서 목록 조회 시리얼라이저
+    주문 상태, 대표 상품, 총 금액, 주문상품 수는 주문내역 요약(BillSummary)에서 조회
     """
 
+    # 암호화 되어 저장된 배송지 필드
+    encrypted_fields = ("address", "detail_address", "recipient", "postal_code")
+
     order_items_count = SerializerMethodField()
     total_price = SerializerMethodField()
     thumbnail = SerializerMethodField()
     bill_order_status = SerializerMethodField()
 
+    def get_summary(self, obj):
+        """
+        주문내역 요약, 없다면(요약 도입 이전 주문) 생성
+        """
+        try:
+            return obj.summary
+        except BillSummary.DoesNotExist:
+            obj.summary = BillSummary.objects.rebuild([obj.pk])[0]
+            return obj.summary
+
     def get_bill_order_status(self, obj):
         if obj.is_paid == False:
             return "결제대기"
-        else:
-            temp = {i.order_status.id for i in obj.orderitem_set.all()}
-            return StatusCategory.objects.get(id=min(temp)).name if temp else 1
+        summary = self.get_summary(obj)
+        if summary.min_status_id is None:
+            return 1
+        return summary.min_status.name
 
     def get_thumbnail(self, obj):
-        if ord_list := obj.orderitem_set.all():
-            for order_item in ord_list:
-                if order_item.image:
-                    return {"image": order_item.image, "name": order_item.name}
-            return {"image": None, "name": ord_list.first().name}
+        summary = self.get_summary(obj)
+        if summary.order_items_count:
+            return {"image": summary.thumbnail_image, "name": summary.thumbnail_name}
         return None
 
     def get_total_price(self, obj):
-        order_items = obj.orderitem_set.filter(bill=obj)
-        total_price = 0
-        for i in order_items:
-            total_price += i.price * i.amount
-        return total_price
+        return self.get_summary(obj).total_price
 
     def get_order_items_count(self, obj):
-        return obj.orderitem_set.all().count()
+        return self.get_summary(obj).order_items_count
 
     def to_representation(self, instance):
         """
         배송지 모델  데이터 복호화
         """
         information = super().to_representation(instance)
-        decrypt_result = AESAlgorithm.decrypt_all(**information)
-        return decrypt_result
+        information.update(
+            AESAlgorithm.decrypt_all(**{field: information[field] for field in self.encrypted_fields})
+        )
+        return information
 
     class Meta:
         model = Bill
@@ -211,15 +225,9 @@ class SimpleOrderItemSerializer(ModelSerializer):
     is_reviewed = SerializerMethodField()
 
     def get_is_reviewed(self, obj):
-        request = self.context.get("request")
-        if request.user.is_authenticated:
-            product = Product.objects.get(pk=obj.product_id)
-            try:
-                review = product.product_reviews.get(user=request.user)
-                return {"reviewed": True, "review_id": review.pk}
-            except:
-                pass
-        return {"reviewed": False, "review_id": None}
+        # 주문내역의 상품별 리뷰는 BillDetailSerializer 에서 한번에 조회
+        review_id = ViewerContext.from_context(self.context).get_review_id(obj.product_id)
+        return {"reviewed": review_id is not None, "review_id": review_id}
 
     class Meta:
         model = OrderItem
@@ -238,24 +246,26 @@ class BillDetailSerializer(ModelSerializer):
     def get_bill_order_status(self, obj):
         if obj.is_paid == False:
             return "결제대기"
-        else:
-            temp = {i.order_status.id for i in obj.orderitem_set.all()}
-            return StatusCategory.objects.get(id=min(temp)).name if temp else "결제대기"
+        order_items = obj.orderitem_set.all()
+        if not order_items:
+            return "결제대기"
+        return min(order_items, key=lambda order_item: order_item.order_status_id).order_status.name
 
     def get_total_price(self, obj):
-        order_items = obj.orderitem_set.filter(bill=obj)
-        total_price = 0
-        for i in order_items:
-            total_price += i.price * i.amount
-        return total_price
+        return sum(order_item.price * order_item.amount for order_item in obj.orderitem_set.all())
 
     def to_representation(self, instance):
         """
-        배송지 모델  데이터 복호화
+        주문상품별 리뷰 작성 여부 일괄 조회, 배송지 모델 데이터 복호화
         """
+        ViewerContext.from_context(self.context).load_reviews(
+            order_item.product_id for order_item in instance.orderitem_set.all()
+        )
         information = super().to_representation(instance)
-        decrypt_result = AESAlgorithm.decrypt_all(**information)
-        return decrypt_result
+        information.update(
+            AESAlgorithm.decrypt_all(**{field: information[field] for field in BillSerializer.encrypted_fields})
+        )
+        return information
 
     class Meta:
         model = Bill
@@ -277,6 +287,36 @@ class OrderItemSerializer(ModelSerializer):
         read_only_fields = ("bill", "name", "price", "seller")
 
 
+class SellerOrderBillSerializer(ModelSerializer):
+    """
+    판매자 주문 대시보드 배송지 (암호화 필드만 복호화)
+    """
+
+    def to_representation(self, instance):
+        information = super().to_representation(instance)
+        information.update(
+            AESAlgorithm.decrypt_all(**{field: information[field] for field in BillSerializer.encrypted_fields})
+        )
+        return information
+
+    class Meta:
+        model = Bill
+        fields = ("id", "address", "detail_address", "recipient", "postal_code")
+
+
+class SellerOrderItemSerializer(ModelSerializer):
+    """
+    판매자 주문 대시보드 주문상품 (판매자 정보는 응답에 한번만 포함)
+    """
+
+    bill = SellerOrderBillSerializer()
+    order_status = StatusCategorySerializer()
+
+    class Meta:
+        model = OrderItem
+        exclude = ("seller",)
+
+
 class OrderStatusSerializer(ModelSerializer):
     """결제대기(1) 주문확인중(2) 배송준비중(3) 발송완료(4) 배송완료(5) 구매확정(6) 주문취소(7) 환불요청(8) 환불완료(9)"""
 
@@ -316,7 +356,7 @@ class OrderStatusSerializer(ModelSerializer):
                 """환불요청취소"""
                 return True
 
-        if seller == user.user_seller:
+        if seller == getattr(user, "user_seller", None):
             """판매자 상태 변경"""
             if cur_status in [2, 3, 4] and new_status in [2, 3, 4, 5]:
                 """주문확정, 배송 및 배송완료"""
@@ -331,3 +371,41 @@ class OrderStatusSerializer(ModelSerializer):
             raise ValidationError("상품의 구매자 혹은 판매자가 아닙니다.")
 
         return False
+
+
+class BulkOrderStatusSerializer(Serializer):
+    """
+    주문 상태 일괄 변경 {"order_items": [주문상품 id], "order_status": 상태 id}
+    주문상품을 한번에 잠가 조회하고 OrderStatusSerializer 와 같은 기준으로 모든 상태 변경 확인
+    """
+
+    order_items = ListField(child=IntegerField(), allow_empty=False, max_length=100)
+    order_status = PrimaryKeyRelatedField(queryset=StatusCategory.objects.all())
+
+    def validate(self, data):
+        user = self.context["request"].user
+        new_status = data["order_status"].pk
+        order_item_ids = set(data["order_items"])
+        order_items = list(
+            OrderItem.objects.select_for_update(of=("self",))
+            .filter(pk__in=order_item_ids)
+            .select_related("seller", "bill__user__subscribe_data")
+            .order_by("pk")
+        )
+        missing = order_item_ids - {order_item.pk for order_item in order_items}
+        if missing:
+            raise ValidationError({"order_items": f"존재하지 않는 주문상품입니다. {sorted(missing)}"})
+
+        checker = OrderStatusSerializer()
+        invalid = [
+            order_item.pk
+            for order_item in order_items
+            if not checker.is_valid_status_change(
+                user, order_item.order_status_id, new_status, order_item.bill.user, order_item.seller
+            )
+        ]
+        if invalid:
+            raise ValidationError({"order_items": f"유효하지 않은 주문 상태입니다. {invalid}"})
+        data["order_items"] = order_items
+        return data
+
@@ -1,9 +1,14 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
 from math import ceil
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from rest_framework.serializers import ValidationError
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Prefetch, Sum
 from django.db.utils import IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import status
 from rest_framework.generics import (
     CreateAPIView,
@@ -16,18 +21,28 @@ from rest_framework.generics import (
 )
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from products.models import Product
+from products.serializers import SimpleSellerInformation
+from products.flashsale import FlashSaleCounter
+from products.stock import OutOfStock, StockLedger
 from users.serializers import DeliverySerializer
 from users.validated import ValidatedData
 from .models import (
+    apply_order_transitions,
+    apply_points,
     CartItem,
+    StockReservation,
     OrderItem,
     Bill,
+    BillSummary,
     Delivery,
     Point,
+    PointBalance,
     StatusCategory,
     Seller,
+    SellerOrderCounter,
     PhoneVerification,
     User,
 )
@@ -35,6 +50,7 @@ from .orderserializers import (
     BillCreateSerializer,
     BillDetailSerializer,
     BillSerializer,
+    BulkOrderStatusSerializer,
     CartDetailSerializer,
     CartListSerializer,
     CartSerializer,
@@ -42,9 +58,11 @@ from .orderserializers import (
     OrderItemDetailSerializer,
     OrderItemSerializer,
     OrderStatusSerializer,
+    SellerOrderItemSerializer,
     StatusCategorySerializer,
 )
-from config.permissions_ import IsDeliveryRegistered
+from config.permissions_ import IsDeliveryRegistered, IsSeller
+from config.pagination import KeysetPagination
 from .views import PointStatisticView
 
 
@@ -74,41 +92,30 @@ class CartView(ListCreateAPIView):
             return queryset
 
     def post(self, request, *args, **kwargs):
-        """장바구니 추가"""
+        """
+        장바구니 추가, 이미 담긴 상품이면 개수 합산
+        주문내역, 주문상품으로 다시 담을 때 판매중이 아닌 상품은 건너뛰고 skipped 로 반환
+        """
 
         # 상품 아이디로 추가
         if product_id := request.data.get("product"):
             product = get_object_or_404(Product, id=product_id, item_state=1)
-            amount = int(request.data.get("amount"))
-            self.add_exist_cart(product, amount)
+            lines = [(product.pk, int(request.data.get("amount")))]
 
         # 주문내역 아이디로 추가
         elif bill_id := request.data.get("bill_id"):
-            bill = get_object_or_404(Bill, pk=bill_id)
-            order_items = bill.orderitem_set.all()
-            for orderitem in order_items:
-                product = get_object_or_404(
-                    Product, pk=orderitem.product_id, item_state=1
-                )
-                amount = orderitem.amount
-                self.add_exist_cart(product, amount)
+            bill = get_object_or_404(Bill, pk=bill_id, user=request.user)
+            lines = bill.orderitem_set.values_list("product_id", "amount")
 
         # 주문상품 아이디로 추가
         elif order_item_id := request.data.get("order_item_id"):
-            orderitem = get_object_or_404(OrderItem, id=order_item_id)
-            product = get_object_or_404(Product, pk=orderitem.product_id, item_state=1)
-            amount = orderitem.amount
-            self.add_exist_cart(product, amount)
-        return Response({"msg": "장바구니에 추가되었습니다."}, status=status.HTTP_200_OK)
-
-    # 이미 존재하는 상품이면 개수 amount개 추가
-    def add_exist_cart(self, product, amount):
-        cart_item, created = CartItem.objects.get_or_create(
-            product=product, user=self.request.user, defaults={"amount": amount}
-        )
-        if not created:
-            cart_item.amount += amount
-            cart_item.save()
+            orderitem = get_object_or_404(OrderItem, id=order_item_id, bill__user=request.user)
+            lines = [(orderitem.product_id, orderitem.amount)]
+
+        else:
+            lines = []
+        cart_items, skipped = CartItem.objects.merge(request.user, lines)
+        return Response({"msg": "장바구니에 추가되었습니다.", "skipped": skipped}, status=status.HTTP_200_OK)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -122,6 +129,116 @@ class CartView(ListCreateAPIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
 
+def get_selected_cart_items(request):
+    """
+    요청 사용자의 장바구니 상품, ?cart_id=1,2 선택한 장바구니 상품만 (숫자가 아닌 id 는 400)
+    """
+    cart_items = CartItem.objects.filter(user=request.user)
+    if cart_id := request.query_params.get("cart_id"):
+        try:
+            cart_ids = [int(value) for value in cart_id.split(",")]
+        except ValueError:
+            raise ValidationError({"cart_id": "숫자를 입력해주세요."})
+        cart_items = cart_items.filter(id__in=cart_ids)
+    return cart_items
+
+
+class CartReservationView(APIView):
+    """
+    장바구니 상품 재고 선점 (STOCK_RESERVATION_TIMEOUT 동안 유효)
+    ?cart_id=1,2 선택한 장바구니 상품만, 없으면 전체
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """재고 선점, 판매 가능 수량이 부족한 상품은 failures 로 반환 (409)"""
+        lines = defaultdict(int)
+        for product_id, amount in get_selected_cart_items(request).values_list("product_id", "amount"):
+            lines[product_id] += amount
+        if not lines:
+            return Response({"err": "no_cart"}, status=status.HTTP_400_BAD_REQUEST)
+
+        reservations, failures = StockReservation.objects.reserve(request.user, lines.items())
+        data = {
+            "reservations": [
+                {"product": reservation.product_id, "amount": reservation.amount, "expires_at": reservation.expires_at}
+                for reservation in reservations
+            ],
+            "failures": [
+                {"product": product_id, "amount": amount, "available": available}
+                for product_id, amount, available in failures
+            ],
+        }
+        return Response(data, status=status.HTTP_409_CONFLICT if failures else status.HTTP_200_OK)
+
+    def delete(self, request):
+        """재고 선점 해제"""
+        StockReservation.objects.release(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CartQuoteView(APIView):
+    """
+    주문 전 결제 금액, 포인트 잔액, 상품별 재고 상태 조회 (주문내역, 포인트, 재고를 변경하지 않음)
+    ?cart_id=1,2 선택한 장바구니 상품만, 없으면 전체
+    장바구니 상품, 상품, 판매 가능 수량(재고 - 다른 사용자 선점 수량) 한번에 조회 + 포인트 잔액 조회
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_stock_status(self, product, amount, available):
+        if product.item_state not in (1, 2):
+            return "unavailable"
+        if available <= 0:
+            return "sold_out"
+        return "available" if amount <= available else "insufficient"
+
+    def get(self, request):
+        cart_items = list(
+            get_selected_cart_items(request)
+            .select_related("product")
+            .annotate(held=StockLedger.get_held_amount(request.user, "product_id"))
+            .order_by("product_id")
+        )
+        if not cart_items:
+            return Response({"err": "no_cart"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 플래시 세일 상품은 카운터의 남은 재고 기준
+        flash_sale_ids = FlashSaleCounter.get_active_product_ids([cart.product_id for cart in cart_items])
+        lines = []
+        for cart in cart_items:
+            product = cart.product
+            stock = FlashSaleCounter.get_stock(product.pk) if product.pk in flash_sale_ids else None
+            available = max(stock if stock is not None else (product.amount or 0) - cart.held, 0)
+            lines.append(
+                {
+                    "cart_id": cart.pk,
+                    "product": product.pk,
+                    "name": product.name,
+                    "price": product.price,
+                    "amount": cart.amount,
+                    "line_total": product.price * cart.amount,
+                    "available_amount": available,
+                    "stock_status": self.get_stock_status(product, cart.amount, available),
+                }
+            )
+
+        total_price = sum(line["line_total"] for line in lines)
+        point_balance = PointStatisticView.get_total_point(request.user)
+        is_in_stock = all(line["stock_status"] == "available" for line in lines)
+        data = {
+            "lines": lines,
+            "total_price": total_price,
+            "point_balance": point_balance,
+            "point_shortage": max(total_price - point_balance, 0),
+            "is_balance_sufficient": point_balance >= total_price,
+            "is_in_stock": is_in_stock,
+            "is_orderable": is_in_stock and point_balance >= total_price,
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
 class CartDetailView(UpdateAPIView):
     """장바구니 수량 변경"""
 
@@ -137,6 +254,7 @@ class OrderListView(ListAPIView):
 
     permission_classes = [IsAuthenticated]
     serializer_class = OrderItemSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         # url에서 product_id 존재하면 필터링, 없으면 해당 판매자 주문 조회
@@ -144,16 +262,85 @@ class OrderListView(ListAPIView):
             queryset = OrderItem.objects.filter(product_id=product_id)
         else:
             queryset = OrderItem.objects.filter(seller=self.request.user.pk)
-        return queryset
+        return queryset.order_by("-created_at")
+
+
+class SellerOrderPagination(KeysetPagination):
+    """판매자 주문 대시보드는 ?cursor= 없이도 첫 페이지부터 페이지네이션"""
+
+    def is_requested(self, request):
+        return True
+
+
+class SellerOrderDashboardView(ListAPIView):
+    """
+    판매자 주문 대시보드
+    ?status=주문상태 id, ?product=상품 id, ?start=, ?end= 주문일(YYYY-MM-DD) 필터, 주문일 역순 커서 페이지네이션
+    판매자 정보, 주문 상태별 주문상품 수(SellerOrderCounter)는 응답에 한번만 포함
+    """
+
+    permission_classes = [IsAuthenticated, IsSeller]
+    serializer_class = SellerOrderItemSerializer
+    pagination_class = SellerOrderPagination
+
+    def get_int_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: "숫자를 입력해주세요."})
+
+    def get_date_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: "날짜 형식(YYYY-MM-DD)이 올바르지 않습니다."})
+        start = datetime.combine(day, time.min)
+        return timezone.make_aware(start) if settings.USE_TZ else start
+
+    def get_queryset(self):
+        # (seller, order_status, created_at) 인덱스 범위 조회
+        queryset = OrderItem.objects.filter(seller_id=self.request.user.pk)
+        if (order_status := self.get_int_param("status")) is not None:
+            queryset = queryset.filter(order_status_id=order_status)
+        if (product_id := self.get_int_param("product")) is not None:
+            queryset = queryset.filter(product_id=product_id)
+        if start := self.get_date_param("start"):
+            queryset = queryset.filter(created_at__gte=start)
+        if end := self.get_date_param("end"):
+            queryset = queryset.filter(created_at__lt=end + timedelta(days=1))
+        return queryset.select_related("bill", "order_status").order_by("-created_at")
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        seller = self.request.user.user_seller
+        response.data["seller"] = SimpleSellerInformation(seller, context=self.get_serializer_context()).data
+        response.data["order_counts"] = SellerOrderCounter.objects.get_counts(seller.pk)
+        return response
 
 
 class OrderCreateView(CreateAPIView):
-    """주문 생성"""
+    """
+    주문 생성
+    장바구니 상품 수와 관계없이 일정한 쿼리 수로 처리
+    1. 장바구니 상품, 상품, 판매자 한번에 조회
+    2. 포인트 잔액 row 잠금 후 확인, 재고 확인
+    3. 결제 포인트, 재고 차감, 주문상품 일괄 저장
+    """
 
     permission_classes = [IsAuthenticated, IsDeliveryRegistered]
     queryset = OrderItem.objects.all()
     serializer_class = OrderCreateSerializer
 
+    # 주문 트랜잭션이 롤백되면 플래시 세일 카운터에서 차감한 수량 복구
+    @FlashSaleCounter.release_on_error()
     @transaction.atomic()
     def create(self, request, *args, **kwargs):
         # bill이 생성되었는지 확인, 생성되지 않았다면 404
@@ -162,56 +349,65 @@ class OrderCreateView(CreateAPIView):
             Bill, id=bill_id, user=self.request.user, is_paid=False
         )
 
-        # cart_ids 리스트 => 해당하는 객체 쿼리셋 조회
+        # cart_ids 리스트 => 해당하는 장바구니 상품, 상품, 판매자 한번에 조회
         try:
             cart_ids: list = request.query_params.get("cart_id").split(",")
-            cart_objects = CartItem.objects.filter(pk__in=cart_ids)
-            
-            # 포인트 조회
-            total_point = PointStatisticView.get_total_point(self.request.user)
-            total_buy_price = sum(
-                [(cart.product.price * cart.amount) for cart in cart_objects]
+            carts = list(
+                CartItem.objects.filter(pk__in=cart_ids, user=self.request.user)
+                .select_related("product__seller")
+                .order_by("product_id")
             )
-            if total_point < total_buy_price:
-                raise PermissionDenied("insufficient_balance")
-            else:
-                Point.objects.create(user=self.request.user, point_type_id=7, point=total_buy_price)
         except AttributeError:  # url params 오류
             bill.delete()
             return Response(
                 {"err": "no_cart"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        except PermissionDenied as e:  # 포인트 부족
-            bill.delete()
-            return Response({"err": str(e)}, status=status.HTTP_403_FORBIDDEN)
-        # orderitem 객체 리스트 생성
+
         try:
             is_paid = StatusCategory.objects.get(pk=2)
-            order_items = []
-            for cart in cart_objects:
-                order_item_data = {
-                    "name": cart.product.name,
-                    "product_id": cart.product.id,
-                    "amount": cart.amount,
-                    "price": cart.product.price,
-                    "seller": cart.product.seller,
-                    "bill_id": bill_id,
-                    "order_status": is_paid,
-                }
-                if cart.product.image:
-                    order_item_data["image"] = cart.product.image.url
-                order_item = OrderItem(**order_item_data)
-                order_items.append(order_item)
-                product_amount_deduction(product=cart.product, buy_amount=cart.amount)
-
-            # bulk_create로 장바구니 => 주문상품으로 옮겨줌. 성공시 201
-            OrderItem.objects.bulk_create(order_items)
+            total_buy_price = sum(cart.product.price * cart.amount for cart in carts)
+
+            # 결제 포인트, 재고 차감, 주문상품 저장 (실패 시 플래시 세일 카운터 차감까지 함께 취소)
+            with FlashSaleCounter.release_on_error(), transaction.atomic():
+                # 잔액 row 를 잠그고 확인 (동시 결제로 잔액을 초과해 결제하지 않도록)
+                if PointBalance.objects.lock_balance(self.request.user.pk) < total_buy_price:
+                    raise PermissionDenied("insufficient_balance")
+                Point.objects.create(user=self.request.user, point_type_id=7, point=total_buy_price)
+                # 상품 재고량 차감 (부족한 상품이 있다면 전체 취소 후 out_of_stock), 선점한 재고는 차감으로 전환
+                StockLedger.deduct(((cart.product_id, cart.amount) for cart in carts), user=self.request.user)
+                order_items = [
+                    OrderItem(
+                        name=cart.product.name,
+                        product_id=cart.product_id,
+                        amount=cart.amount,
+                        price=cart.product.price,
+                        seller=cart.product.seller,
+                        bill_id=bill_id,
+                        order_status=is_paid,
+                        image=cart.product.image.url if cart.product.image else None,
+                    )
+                    for cart in carts
+                ]
+                # bulk_create로 장바구니 => 주문상품으로 옮겨줌 (post_save 대신 집계 직접 반영). 성공시 201
+                OrderItem.objects.bulk_create(order_items)
+                apply_order_transitions([(order_item, None) for order_item in order_items])
+                # 주문내역 목록 조회용 요약 생성
+                BillSummary.objects.build(bill, order_items)
             bill.is_paid = True
             bill.save()
             return Response({"msg": "생성 완료"}, status=status.HTTP_201_CREATED)
 
-        # 상품 재고량 부족
+        except PermissionDenied as e:  # 포인트 부족
+            bill.delete()
+            return Response({"err": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        # 상품 재고량 부족 (재고가 부족한 상품 id 목록 포함)
+        except OutOfStock as e:
+            bill.delete()
+            return Response(
+                {"err": e.detail[0].code, "products": [product_id for product_id, amount in e.failures]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except ValidationError as e:
             bill.delete()
             return Response(
@@ -230,10 +426,6 @@ class OrderCreateView(CreateAPIView):
             return Response(
                 {"err": "status_not_exist"}, status=status.HTTP_404_NOT_FOUND
             )
-    #     order_items.append(order_item_data)
-    #     serializer = self.get_serializer(data=order_items, many=True)
-    #     serializer.is_valid(raise_exception=True)
-    #     serializer.save(bill=bill)
 
 
 def order_point_create(user: object, seller:object, total_buy_price: int):
@@ -253,22 +445,23 @@ def order_point_refund(user: object, total_buy_price: int):
     Point.objects.create(user=user, point_type_id=9, point=total_buy_price)
 
 
+def get_order_points(order_item, buyer, cur_status, new_status):
+    """
+    주문 상태 변경에 따른 포인트 목록 (저장하지 않음)
+    구매확정(6) : 구매자 적립, 판매자 정산 / 주문취소(7), 환불완료(9) : 구매자 환불
+    """
+    total_point = order_item.amount * order_item.price
+    if cur_status == 5 and new_status == 6:
+        subscribe = getattr(buyer, "subscribe_data", None)
+        is_subscribed = int(subscribe.subscribe) if subscribe else 0
+        return [
+            Point(user=buyer, point_type_id=4, point=ceil(total_point / 20) * (1 + is_subscribed)),
+            Point(user_id=order_item.seller_id, point_type_id=8, point=total_point),
+        ]
+    if new_status in [7, 9]:
+        return [Point(user=buyer, point_type_id=9, point=total_point)]
+    return []
 
-def product_amount_deduction(product: object, buy_amount: int):
-    """주문 시 상품 재고량 감소"""
-    if product.amount < buy_amount:
-        raise ValidationError(code="out_of_stock")
-    else:
-        product.amount -= buy_amount
-        if product.amount == 0: # 재고량 없을 시
-            product.item_state = 2 # 품절(2)상태로 변경
-        product.save()
-
-def product_amount_restock(product: object, buy_amount: int):
-    """환불 시 상품 재고량 복구"""
-    product.amount += buy_amount
-    product.item_state = 1 # 판매중(1)상태로 변경
-    product.save()
 
 
 class OrderDetailView(RetrieveUpdateAPIView):
@@ -282,6 +475,8 @@ class OrderDetailView(RetrieveUpdateAPIView):
 class BillView(ListCreateAPIView):
     """주문 내역 조회"""
 
+    pagination_class = KeysetPagination
+
     def get_permissions(self):
         if self.request.method == "GET":
             self.permission_classes = [IsAuthenticated]
@@ -341,7 +536,11 @@ class BillView(ListCreateAPIView):
         serializer.save(user=self.request.user)
 
     def get_queryset(self):
-        queryset = Bill.objects.filter(user=self.request.user).order_by("-created_at")
+        queryset = (
+            Bill.objects.filter(user=self.request.user)
+            .select_related("summary__min_status")
+            .order_by("-created_at")
+        )
         return queryset
 
 
@@ -352,7 +551,10 @@ class BillDetailView(RetrieveAPIView):
     serializer_class = BillDetailSerializer
 
     def get_queryset(self):
-        queryset = Bill.objects.filter(user=self.request.user)
+        # 주문상품, 주문상태 함께 조회 (주문상품 수와 관계없이 쿼리 수 일정)
+        queryset = Bill.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch("orderitem_set", queryset=OrderItem.objects.select_related("order_status"))
+        )
         return queryset
 
 
@@ -386,12 +588,55 @@ class StatusChangeView(UpdateAPIView):
         # 주문취소(7), 환불완료(9) 되었을 때
         if new_status in [7,9] :
             
-            # 유저 포인트 환불
+            # 구매자 포인트 환불
             total_point = order_item.amount * order_item.price
-            order_point_refund(self.request.user, total_point)
+            order_point_refund(order_item.bill.user, total_point)
             
             # 상품 수량 복구
-            product = get_object_or_404(Product, id=order_item.product_id)
-            product_amount_restock(product=product, buy_amount=order_item.amount)
+            get_object_or_404(Product, id=order_item.product_id)
+            StockLedger.restock([(order_item.product_id, order_item.amount)])
             
         serializer.save()
+
+
+class BulkStatusChangeView(APIView):
+    """
+    주문 상태 일괄 변경
+    모든 주문상품의 상태 변경을 먼저 확인(하나라도 불가능하면 전체 취소)하고
+    상태 변경(bulk_update), 적립, 정산, 환불 포인트(bulk_create), 상품별 재고 복구를 한 트랜잭션으로 처리
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @transaction.atomic
+    def post(self, request):
+        serializer = BulkOrderStatusSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        order_items = serializer.validated_data["order_items"]
+        new_status = serializer.validated_data["order_status"].pk
+
+        now = timezone.now()
+        transitions, points, restock_lines = [], [], []
+        for order_item in order_items:
+            cur_status = order_item.order_status_id
+            points.extend(get_order_points(order_item, order_item.bill.user, cur_status, new_status))
+            if new_status in [7, 9]:
+                restock_lines.append((order_item.product_id, order_item.amount))
+            order_item.order_status_id = new_status
+            order_item.updated_at = now
+            transitions.append((order_item, cur_status))
+
+        OrderItem.objects.bulk_update(order_items, ["order_status", "updated_at"])
+        # bulk_update 는 post_save 가 발생하지 않으므로 집계 테이블 직접 반영
+        apply_order_transitions(transitions)
+        for order_item in order_items:
+            order_item._loaded_status_id = new_status
+        Point.objects.bulk_create(points)
+        apply_points(points)
+        if restock_lines:
+            StockLedger.restock(restock_lines)
+        return Response(
+            {"order_items": [order_item.pk for order_item in order_items], "order_status": new_status},
+            status=status.HTTP_200_OK,
+        )
+
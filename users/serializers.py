@@ -5,16 +5,17 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework.generics import get_object_or_404
 from django.contrib.auth.hashers import check_password
 from products.models import Product
-from django.db.models import Sum
 from datetime import datetime, timedelta
 from .validated import ValidatedData, SmsSendView, EmailService
 from django.utils import timezone
 from .cryption import AESAlgorithm
+from .loaders import ViewerContext
 from users.models import (
     User,
     Delivery,
     Seller,
     Point,
+    PointBalance,
     Subscribe,
     OrderItem,
     PhoneVerification,
@@ -356,11 +357,8 @@ class SellerSerializer(serializers.ModelSerializer):
     is_follow = serializers.SerializerMethodField()
 
     def get_is_follow(self, obj):
-        user = self.context.get("user")
-        if user.is_authenticated:
-            # 좋아요 object에 포함되 있다면 True 아니라면 False
-            return user.followings.filter(pk=obj.pk).exists()
-        return False
+        # 요청 사용자의 팔로우 판매자 id 목록에 포함되 있다면 True 아니라면 False
+        return ViewerContext.from_context(self.context).is_follow(obj.pk)
 
     class Meta:
         model = Seller
@@ -492,26 +490,9 @@ class ReadUserSerializer(serializers.ModelSerializer):
 
     def get_user_total_point(self, user_id):
         """
-        포인트 합산 내역 정리
+        포인트 잔액 (PointBalance 기본키 조회)
         """
-        total_plus_point = (
-            Point.objects.filter(user_id=user_id)
-                .filter(point_type_id__in=[1, 2, 3, 4, 5, 8, 9])
-                .aggregate(total=Sum("point"))
-        )
-        total_minus_point = (
-            Point.objects.filter(user_id=user_id)
-                .filter(point_type_id__in=[6, 7])
-                .aggregate(total=Sum("point"))
-        )
-        try:
-            total_point = total_plus_point["total"] - total_minus_point["total"]
-        except TypeError:
-            total_point = (
-                total_plus_point["total"]
-                if total_plus_point["total"] is not None else 0
-            )
-        return total_point
+        return PointBalance.objects.get_balance(user_id)
 
     def to_representation(self, instance):
         """
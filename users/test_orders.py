@@ -5,16 +5,30 @@ from users.models import (
     CartItem,
     PhoneVerification,
     Point,
+    PointBalance,
+    PointDailyRollup,
     Seller,
     User,
     Bill,
     OrderItem,
     StatusCategory,
     PointType,
+    StockReservation,
+    OrderEvent,
+    OrderEventConsumer,
+    SellerDailySales,
 )
 from products.models import Product, Review
+from products.stock import OutOfStock, StockLedger
+from products.flashsale import FlashSaleCounter, get_counter_store
+from io import StringIO
 from json import dumps
 from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 
 class BaseTestCase(APITestCase):
@@ -113,6 +127,42 @@ class CartItemCreateTest(BaseTestCase):
         )
         self.assertEqual(response.status_code, 200)
 
+    # 주문내역으로 다시 담기, 판매중이 아닌 상품은 건너뛰고 담긴 상품은 수량 합산
+    def test_add_bill_to_cart(self):
+        call_command("loaddata", "json_data/status.json")
+        bill = Bill.objects.create(
+            user=self.user, address="address", detail_address="detail", recipient="recipient", postal_code="12345"
+        )
+        for product, amount in ((self.product, 2), (self.product2, 3), (self.product3, 4)):
+            OrderItem.objects.create(
+                bill=bill, seller=self.seller, name=product.name, price=10, amount=amount, product_id=product.id
+            )
+        CartItem.objects.create(user=self.user, product=self.product, amount=1)
+        Product.objects.filter(pk=self.product3.pk).update(item_state=3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("cart_view"), {"bill_id": bill.pk}, HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["skipped"], [self.product3.id])
+        self.assertEqual(
+            dict(CartItem.objects.filter(user=self.user).values_list("product_id", "amount")),
+            {self.product.id: 3, self.product2.id: 3},
+        )
+        bill_queries = len(queries)
+
+        # 주문상품 수와 관계없이 쿼리 수 일정
+        for index in range(5):
+            product = Product.objects.create(seller=self.seller, name=f"product {index}", content="content", price=10)
+            OrderItem.objects.create(bill=bill, seller=self.seller, name=product.name, price=10, product_id=product.id)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse("cart_view"), {"bill_id": bill.pk}, HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}"
+            )
+        self.assertEqual(len(queries), bill_queries)
+        self.assertEqual(CartItem.objects.get(user=self.user, product=self.product).amount, 5)
+
 
 class CartItemListTest(BaseTestCase):
     """장바구니 목록 조회 테스트"""
@@ -270,3 +320,503 @@ class OrderCreateTest(BaseTestCase):
             HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}",
         )
         self.assertEqual(response.status_code, 201)
+
+    # 잠근 잔액보다 결제 금액이 크면 403, 재고와 주문내역은 그대로
+    def test_insufficient_balance(self):
+        Point.objects.create(user=self.user, point=99500, point_type_id=6)
+        Product.objects.filter(pk=self.product.pk).update(price=1000)
+        bill = Bill.objects.create(
+            user=self.user, address="address", detail_address="detail", recipient="recipient", postal_code="12345"
+        )
+        response = self.client.post(
+            reverse("order_create_view", kwargs={"bill_id": bill.id}) + f"?cart_id={self.cart.id}",
+            HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data["err"], "insufficient_balance")
+        self.assertEqual(Product.objects.get(pk=self.product.pk).amount, 100)
+        self.assertFalse(Bill.objects.filter(pk=bill.pk).exists())
+
+    def order(self, carts):
+        bill = Bill.objects.create(
+            user=self.user, address="address", detail_address="detail", recipient="recipient", postal_code="12345"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("order_create_view", kwargs={"bill_id": bill.id})
+                + "?cart_id=" + ",".join(str(cart.id) for cart in carts),
+                HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}",
+            )
+        self.assertEqual(response.status_code, 201)
+        return len(queries)
+
+    # 장바구니 상품 수와 관계없이 쿼리 수 일정
+    def test_fixed_query_count(self):
+        # 오늘 결제 포인트 일별 집계 생성 이후 쿼리 수 비교
+        PointDailyRollup.objects.create(user=self.user, date=timezone.now().date(), point_type_id=7)
+        single = self.order([self.cart])
+        carts = [
+            CartItem.objects.create(
+                user=self.user,
+                product=Product.objects.create(seller=self.seller, name=f"product {index}", content="content", price=10, amount=5),
+                amount=2,
+            )
+            for index in range(20)
+        ]
+        self.assertEqual(self.order(carts), single)
+        self.assertEqual(OrderItem.objects.count(), 21)
+        self.assertEqual(Product.objects.get(pk=carts[0].product_id).amount, 3)
+        self.assertEqual(Point.objects.filter(point_type_id=7).count(), 2)
+
+
+    # 결제 금액, 잔액, 재고 상태 조회는 주문내역, 포인트, 재고를 변경하지 않음
+    def test_quote(self):
+        Product.objects.filter(pk=self.product.pk).update(price=1000)
+        Product.objects.filter(pk=self.product3.pk).update(amount=2)
+        StockReservation.objects.create(
+            user=self.seller_user, product=self.product2, amount=99, expires_at=timezone.now() + timedelta(minutes=5)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("cart_quote_view"), HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}")
+        self.assertEqual(response.status_code, 200)
+        lines = {line["product"]: line for line in response.data["lines"]}
+        self.assertEqual(lines[self.product.id]["line_total"], 1000)
+        self.assertEqual(
+            [lines[product.id]["stock_status"] for product in (self.product, self.product2, self.product3)],
+            ["available", "insufficient", "insufficient"],
+        )
+        self.assertEqual(lines[self.product2.id]["available_amount"], 1)
+        self.assertEqual(response.data["total_price"], 1000)
+        self.assertEqual(response.data["point_balance"], 100000)
+        self.assertFalse(response.data["is_orderable"])
+        self.assertEqual(Bill.objects.count(), 0)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).amount, 100)
+
+        response = self.client.get(
+            reverse("cart_quote_view"), {"cart_id": f"{self.cart.id},{self.cart2.id}"},
+            HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}",
+        )
+        self.assertEqual(len(response.data["lines"]), 2)
+        self.assertLessEqual(len(queries), 4)
+
+        # 숫자가 아닌 장바구니 id 는 400
+        response = self.client.get(
+            reverse("cart_quote_view"), {"cart_id": f"{self.cart.id},abc"},
+            HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}",
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse("cart_reserve_view") + f"?cart_id={self.cart.id},abc",
+            HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    # 주문 생성 시 주문내역 요약 생성, 주문 상태 변경 시 최소 주문 상태 갱신
+    def test_bill_summary(self):
+        self.order([self.cart, self.cart2, self.cart3])
+        self.order([self.cart])
+        order_item = OrderItem.objects.filter(product_id=self.product.id).first()
+        for order_item in OrderItem.objects.filter(bill=order_item.bill):
+            order_item.order_status_id = 3
+            order_item.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("bill_view"), {"cursor": ""}, HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}"
+            )
+        bills = response.data["results"]
+        self.assertEqual([bill["order_items_count"] for bill in bills], [1, 3])
+        self.assertEqual([bill["total_price"] for bill in bills], [0, 0])
+        self.assertEqual([bill["bill_order_status"] for bill in bills], ["주문확인중", "배송준비중"])
+        self.assertEqual(bills[1]["thumbnail"], {"image": None, "name": "product test name1"})
+        self.assertEqual(bills[1]["address"], "address")
+        self.assertLessEqual(len(queries), 3)
+
+    # 주문서 상세 조회 시 주문상품 수와 관계없이 쿼리 수 일정
+    def test_bill_detail_query_count(self):
+        def get_detail(bill_id):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    reverse("bill_detail_view", kwargs={"pk": bill_id}),
+                    HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}",
+                )
+            self.assertEqual(response.status_code, 200)
+            return response.data, len(queries)
+
+        self.order([self.cart])
+        self.order([self.cart, self.cart2, self.cart3])
+        bills = list(Bill.objects.filter(user=self.user).order_by("pk").values_list("pk", flat=True))
+        review = Review.objects.create(user=self.user, product=self.product2, title="title", content="content", star=5)
+
+        single, single_count = get_detail(bills[0])
+        data, count = get_detail(bills[1])
+        self.assertEqual(count, single_count)
+        self.assertEqual(data["address"], "address")
+        reviewed = {item["product_id"]: item["is_reviewed"] for item in data["orderitem_set"]}
+        self.assertEqual(reviewed[self.product2.id], {"reviewed": True, "review_id": review.pk})
+        self.assertEqual(reviewed[self.product.id], {"reviewed": False, "review_id": None})
+
+
+class StockLedgerTest(BaseTestCase):
+    """재고 차감, 복구 테스트"""
+
+    def get_product(self, product):
+        return Product.objects.get(pk=product.pk)
+
+    # 재고가 0이 되면 품절, 복구 시 판매중
+    def test_deduct_and_restock(self):
+        failures = StockLedger.deduct([(self.product.id, 60), (self.product2.id, 1), (self.product.id, 40)])
+        self.assertEqual(failures, [])
+        product = self.get_product(self.product)
+        self.assertEqual((product.amount, product.item_state), (0, 2))
+        self.assertEqual(self.get_product(self.product2).amount, 99)
+
+        StockLedger.restock([(self.product.id, 3)])
+        product = self.get_product(self.product)
+        self.assertEqual((product.amount, product.item_state), (3, 1))
+
+    # 한 상품이라도 부족하면 전체 취소, partial 이면 가능한 상품만 차감
+    def test_out_of_stock(self):
+        with self.assertRaises(OutOfStock) as context:
+            StockLedger.deduct([(self.product.id, 1), (self.product2.id, 101)])
+        self.assertEqual(context.exception.failures, [(self.product2.id, 101)])
+        self.assertEqual(self.get_product(self.product).amount, 100)
+
+        failures = StockLedger.deduct([(self.product.id, 1), (self.product2.id, 101)], partial=True)
+        self.assertEqual(failures, [(self.product2.id, 101)])
+        self.assertEqual(self.get_product(self.product).amount, 99)
+
+
+class StockReservationTest(BaseTestCase):
+    """장바구니 재고 선점 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.other_user = User.objects.create_user("other@naver.com", "otheruser", "!@#password123")
+        self.cart = CartItem.objects.create(user=self.user, product=self.product, amount=30)
+
+    def reserve(self):
+        return self.client.post(
+            reverse("cart_reserve_view"), HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}"
+        )
+
+    # 다른 사용자의 선점 수량을 제외한 수량까지만 선점
+    def test_reserve(self):
+        StockReservation.objects.reserve(self.other_user, [(self.product.id, 80)])
+        response = self.reserve()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["failures"], [{"product": self.product.id, "amount": 30, "available": 20}])
+
+        self.cart.amount = 20
+        self.cart.save()
+        response = self.reserve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StockReservation.objects.get_available_amounts([self.product.id]), {self.product.id: 0})
+
+    # 다른 사용자 선점 수량은 차감 불가, 본인 선점은 차감으로 전환, 만료된 선점은 무시 및 삭제
+    def test_deduct_and_expire(self):
+        StockReservation.objects.reserve(self.other_user, [(self.product.id, 80)])
+        StockReservation.objects.reserve(self.user, [(self.product.id, 20)])
+        with self.assertRaises(OutOfStock):
+            StockLedger.deduct([(self.product.id, 21)], user=self.user)
+        StockLedger.deduct([(self.product.id, 20)], user=self.user)
+        self.assertEqual(Product.objects.get(pk=self.product.id).amount, 80)
+        self.assertFalse(StockReservation.objects.filter(user=self.user).exists())
+
+        StockReservation.objects.update(expires_at=timezone.now())
+        StockLedger.deduct([(self.product.id, 80)], user=self.user)
+        self.assertEqual(StockReservation.objects.expire(), 1)
+
+
+class FlashSaleTest(BaseTestCase):
+    """플래시 세일 재고 카운터 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        call_command("loaddata", "json_data/status.json")
+        FlashSaleCounter.start(self.product.id)
+
+    def tearDown(self):
+        FlashSaleCounter.end(self.product.id)
+
+    def get_amount(self):
+        return Product.objects.get(pk=self.product.id).amount
+
+    # 세일 중에는 카운터에서 차감, 반영 단위마다 Product.amount 에 반영
+    def test_claim_and_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            StockLedger.deduct([(self.product.id, 30)])
+        self.assertEqual(self.get_amount(), 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            StockLedger.deduct([(self.product.id, 20)])
+        self.assertEqual(self.get_amount(), 50)
+
+        with self.assertRaises(OutOfStock):
+            StockLedger.deduct([(self.product.id, 51)])
+        with self.captureOnCommitCallbacks(execute=True):
+            StockLedger.deduct([(self.product.id, 50)])
+        FlashSaleCounter.flush_all()
+        product = Product.objects.get(pk=self.product.id)
+        self.assertEqual((product.amount, product.item_state), (0, 2))
+
+    # 주문 트랜잭션이 롤백되면 카운터 복구, 누적 차감 수량(Product.amount)에 반영하지 않음
+    def test_rollback_releases_claim(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                with FlashSaleCounter.release_on_error(), transaction.atomic():
+                    StockLedger.deduct([(self.product.id, 60)])
+                    raise ValueError
+        self.assertEqual(FlashSaleCounter.get_stock(self.product.id), 100)
+        FlashSaleCounter.flush(self.product.id)
+        self.assertEqual(self.get_amount(), 100)
+
+    # 세일 중 재고가 차감 수량보다 적어지면 0(품절)으로 반영
+    def test_flush_clamped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            StockLedger.deduct([(self.product.id, 30)])
+        Product.objects.filter(pk=self.product.id).update(amount=10)
+        FlashSaleCounter.flush(self.product.id)
+        product = Product.objects.get(pk=self.product.id)
+        self.assertEqual((product.amount, product.item_state), (0, 2))
+        self.assertEqual(FlashSaleCounter.get_stock(self.product.id), 0)
+
+    # 카운터가 사라지면 세일 시작 이후 주문상품으로 복구
+    def test_reconcile(self):
+        StockLedger.deduct([(self.product.id, 10)])
+        bill = Bill.objects.create(
+            user=self.user, address="address", detail_address="detail", recipient="recipient", postal_code="12345"
+        )
+        OrderItem.objects.create(
+            bill=bill, seller=self.seller, name="name", amount=10, price=1000, product_id=self.product.id
+        )
+        get_counter_store().delete(*FlashSaleCounter.get_keys(self.product.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(FlashSaleCounter.claim(self.product.id, 5))
+        FlashSaleCounter.flush(self.product.id)
+        self.assertEqual(self.get_amount(), 85)
+
+
+class SellerOrderDashboardTest(BaseTestCase):
+    """판매자 주문 대시보드 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        call_command("loaddata", "json_data/status.json")
+        self.bill = Bill.objects.create(
+            user=self.user, address="address", detail_address="detail", recipient="recipient", postal_code="12345"
+        )
+        self.order_items = [
+            OrderItem.objects.create(
+                bill=self.bill, seller=self.seller, name=product.name, price=10, product_id=product.id
+            )
+            for product in (self.product, self.product2, self.product3)
+        ]
+
+    def get_dashboard(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("seller_order_dashboard_view"), params,
+                HTTP_AUTHORIZATION=f"Bearer {self.seller_user_access_token}",
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def get_counts(self, data):
+        return {count["order_status"]: count["count"] for count in data["order_counts"] if count["count"]}
+
+    # 첫 조회 시 카운터 생성, 이후 주문 상태 변경 시 증감
+    def test_order_counts(self):
+        data, count = self.get_dashboard()
+        self.assertEqual(self.get_counts(data), {1: 3})
+        self.assertEqual(data["seller"]["company_name"], "test company")
+        self.assertEqual(data["results"][0]["bill"]["address"], "address")
+
+        order_item = OrderItem.objects.get(pk=self.order_items[0].pk)
+        order_item.order_status_id = 3
+        order_item.save()
+        OrderItem.objects.create(bill=self.bill, seller=self.seller, name="name", price=10, product_id=self.product.id)
+        self.assertEqual(self.get_counts(self.get_dashboard()[0]), {1: 3, 3: 1})
+
+    # 필터, 커서 페이지네이션, 주문상품 수와 관계없이 쿼리 수 일정
+    def test_filters(self):
+        self.get_dashboard()
+        OrderItem.objects.filter(pk=self.order_items[1].pk).update(order_status_id=3)
+        data, count = self.get_dashboard(status=3)
+        self.assertEqual([item["id"] for item in data["results"]], [self.order_items[1].pk])
+        data, count = self.get_dashboard(product=self.product3.id)
+        self.assertEqual([item["id"] for item in data["results"]], [self.order_items[2].pk])
+
+        today = timezone.now().date().isoformat()
+        data, count = self.get_dashboard(start=today, end=today, page_size=2)
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIsNotNone(data["next"])
+        single, single_count = self.get_dashboard(page_size=1)
+        self.assertEqual(count, single_count)
+        self.assertEqual(len(self.get_dashboard(end="2000-01-01")[0]["results"]), 0)
+
+        response = self.client.get(
+            reverse("seller_order_dashboard_view"), {"start": "2000-13-01"},
+            HTTP_AUTHORIZATION=f"Bearer {self.seller_user_access_token}",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkStatusChangeTest(BaseTestCase):
+    """주문 상태 일괄 변경 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        call_command("loaddata", "json_data/status.json")
+        call_command("loaddata", "json_data/point.json")
+        self.bill = Bill.objects.create(
+            user=self.user, address="address", detail_address="detail", recipient="recipient", postal_code="12345"
+        )
+        self.order_items = [
+            OrderItem.objects.create(
+                bill=self.bill, seller=self.seller, name=product.name, price=100, amount=2,
+                product_id=product.id, order_status_id=2,
+            )
+            for product in (self.product, self.product, self.product2)
+        ]
+
+    def change(self, order_items, order_status, token=None):
+        return self.client.post(
+            reverse("bulk_status_change_view"),
+            {"order_items": [order_item.pk for order_item in order_items], "order_status": order_status},
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {token or self.seller_user_access_token}",
+        )
+
+    def get_statuses(self):
+        return list(OrderItem.objects.order_by("pk").values_list("order_status_id", flat=True))
+
+    # 하나라도 변경할 수 없으면 전체 취소
+    def test_invalid_transition(self):
+        OrderItem.objects.filter(pk=self.order_items[2].pk).update(order_status_id=6)
+        response = self.change(self.order_items, 4)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_statuses(), [2, 2, 6])
+
+        response = self.change(self.order_items[:2], 6, token=self.user_access_token)
+        self.assertEqual(response.status_code, 400)
+
+    # 단건 변경: 판매자가 아닌 구매자의 허용되지 않은 변경은 400 (판매자 정보 없음으로 500 이 되지 않음)
+    def test_single_change_by_buyer(self):
+        url = reverse("status_change_view", kwargs={"pk": self.order_items[0].pk})
+        response = self.client.patch(
+            url, {"order_status": 4}, format="json", HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}"
+        )
+        self.assertEqual(response.status_code, 400)
+        StatusCategory.objects.create(pk=8, name="환불요청중")
+        response = self.client.patch(
+            url, {"order_status": 8}, format="json", HTTP_AUTHORIZATION=f"Bearer {self.user_access_token}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_statuses()[0], 8)
+
+    # 주문취소 시 구매자 환불, 상품별 재고 합산 복구
+    def test_cancel(self):
+        StatusCategory.objects.create(pk=7, name="주문취소")
+        PointType.objects.create(pk=9, title="환불")
+        # 잔액, 오늘 환불 포인트 일별 집계 생성 이후 쿼리 수 비교
+        PointBalance.objects.rebuild([self.user.id])
+        PointDailyRollup.objects.create(user=self.user, date=timezone.now().date(), point_type_id=9)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.change(self.order_items, 7)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_statuses(), [7, 7, 7])
+        self.assertEqual(Point.objects.filter(user=self.user, point_type_id=9).count(), 3)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).amount, 104)
+        self.assertEqual(Product.objects.get(pk=self.product2.pk).amount, 102)
+        cancel_queries = len(queries)
+
+        order_items = [
+            OrderItem.objects.create(
+                bill=self.bill, seller=self.seller, name="name", price=100, product_id=self.product3.id, order_status_id=2,
+            )
+            for index in range(10)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.change(order_items, 7).status_code, 200)
+        self.assertEqual(len(queries), cancel_queries)
+
+    # 배송 후 구매자 구매확정 시 적립, 판매자 정산
+    def test_confirm(self):
+        self.assertEqual(self.change(self.order_items, 5).status_code, 200)
+        response = self.change(self.order_items, 6, token=self.user_access_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_statuses(), [6, 6, 6])
+        self.assertEqual(Point.objects.filter(user=self.user, point_type_id=4).count(), 3)
+        self.assertEqual(
+            sum(Point.objects.filter(user=self.seller_user, point_type_id=8).values_list("point", flat=True)), 600
+        )
+
+
+@override_settings(ORDER_EVENT_SETTLE_SECONDS=0)
+class OrderEventTest(BaseTestCase):
+    """주문 이벤트, 판매자 일별 집계 테이블 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        call_command("loaddata", "json_data/status.json")
+        self.bill = Bill.objects.create(
+            user=self.user, address="address", detail_address="detail", recipient="recipient", postal_code="12345"
+        )
+
+    def create_order_item(self, amount):
+        return OrderItem.objects.create(
+            bill=self.bill, seller=self.seller, name="name", price=100, amount=amount, product_id=self.product.id
+        )
+
+    def get_sales(self):
+        sales = SellerDailySales.objects.get(seller=self.seller)
+        return sales.order_count, sales.order_price, sales.confirmed_count, sales.confirmed_price
+
+    # watermark 이후 이벤트만 반영
+    def test_consume(self):
+        order_item = self.create_order_item(2)
+        self.create_order_item(1)
+        order_item.order_status_id = 6
+        order_item.save()
+        order_item.save()
+        self.assertEqual(
+            list(OrderEvent.objects.order_by("pk").values_list("from_status", "to_status")),
+            [(None, 1), (None, 1), (1, 6)],
+        )
+
+        self.assertEqual(OrderEvent.objects.consume_all(), {"seller_daily_sales": 3})
+        self.assertEqual(self.get_sales(), (2, 300, 1, 200))
+        self.assertEqual(OrderEvent.objects.consume_all(), {"seller_daily_sales": 0})
+
+        order_item.order_status_id = 5
+        order_item.save()
+        self.assertEqual(OrderEvent.objects.consume_all(), {"seller_daily_sales": 1})
+        self.assertEqual(self.get_sales(), (2, 300, 0, 0))
+
+        call_command("consume_order_events", "--rebuild", stdout=StringIO())
+        self.assertEqual(self.get_sales(), (2, 300, 0, 0))
+
+    # watermark 아래에 늦게 커밋된 이벤트도 gap 으로 다시 조회해 반영, 집계 불일치 검증
+    def test_late_commit_gap(self):
+        self.create_order_item(1)
+        late = self.create_order_item(2)
+        self.create_order_item(3)
+        late_event = OrderEvent.objects.get(order_item=late)
+        OrderEvent.objects.filter(pk=late_event.pk).delete()
+        self.assertEqual(OrderEvent.objects.consume_all(), {"seller_daily_sales": 2})
+        consumer = OrderEventConsumer.objects.get(name="seller_daily_sales")
+        self.assertEqual(list(consumer.gaps), [str(late_event.pk)])
+
+        # 늦게 커밋된 이벤트
+        late_event.save()
+        self.assertEqual(OrderEvent.objects.consume_all(), {"seller_daily_sales": 1})
+        self.assertEqual(self.get_sales(), (3, 600, 0, 0))
+        self.assertEqual(OrderEventConsumer.objects.get(name="seller_daily_sales").gaps, {})
+        self.assertEqual(SellerDailySales.objects.verify(), [])
+
+        SellerDailySales.objects.update(order_count=10)
+        out = StringIO()
+        call_command("consume_order_events", "--verify", stdout=out)
+        self.assertIn("1개 판매자 일별 집계 불일치", out.getvalue())
+
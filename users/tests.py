@@ -1,4 +1,5 @@
 from rest_framework.test import APITestCase
+from io import StringIO
 from datetime import timedelta
 from unittest.mock import patch
 from django.utils import timezone
@@ -12,16 +13,31 @@ from PIL import Image
 import users.models
 import users.validated
 import json
+import calendar
 import tempfile
+import shutil
 import os
 CALLING_NUMBER = os.environ.get('CALLING_NUMBER')
 from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
+# 테스트 중 업로드한 이미지는 임시 디렉터리에 저장 (프로젝트 media 디렉터리에 남지 않도록)
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class CommonTestClass(APITestCase):
     """
     데이터 및 모듈 셋팅 클래스
     """
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
     @classmethod
     def setUpTestData(cls):
         """
@@ -858,3 +874,178 @@ class DeliveryInformationTestCase(CommonTestClass):
         )
         self.assertEqual(response.status_code, 204)
 
+
+
+class PointBalanceTestCase(CommonTestClass):
+    """
+    포인트 잔액 테스트
+    """
+
+    def setUp(self):
+        call_command("loaddata", "json_data/point.json")
+
+    def add_point(self, point_type_id, point):
+        return users.models.Point.objects.create(user=self.user, point_type_id=point_type_id, point=point)
+
+    def test_point_balance(self):
+        """
+        포인트 추가, 삭제 시 잔액 증감, 스냅샷 + 이후 포인트로 검증, 재계산
+        """
+        balances = users.models.PointBalance.objects
+        self.add_point(5, 1000)
+        self.add_point(7, 300)
+        self.assertEqual(balances.get_balance(self.user.pk), 700)
+
+        balances.snapshot()
+        point = self.add_point(4, 50)
+        self.assertEqual(balances.get_balance(self.user.pk), 750)
+        point.delete()
+        self.assertEqual(balances.get_balance(self.user.pk), 700)
+        self.assertEqual(balances.verify(), [])
+
+        # 잔액을 직접 수정한 경우 검증에서 발견, repair 로 복구
+        balances.filter(pk=self.user.pk).update(balance=0)
+        self.assertEqual(balances.verify([self.user.pk]), [(self.user.pk, 0, 700)])
+        self.assertEqual(balances.verify([self.user.pk], full=True), [(self.user.pk, 0, 700)])
+        call_command("point_balance", "repair", "--user", str(self.user.pk), stdout=StringIO())
+        self.assertEqual(balances.get_balance(self.user.pk), 700)
+
+    def test_snapshot_changed_only(self):
+        """
+        바뀐 잔액만 나눠서 스냅샷 저장, 보관 기간이 지난 스냅샷은 사용자별 마지막 스냅샷만 남기고 삭제
+        """
+        balances = users.models.PointBalance.objects
+        snapshots = users.models.PointBalanceSnapshot.objects
+        other = users.models.User.objects.create_user("snapshot@naver.com", "snapshot", "Test123456!")
+        point = self.add_point(5, 1000)
+        users.models.Point.objects.create(user=other, point_type_id=5, point=500)
+        self.assertEqual(balances.snapshot(batch_size=1), 2)
+        self.assertEqual(balances.snapshot(), 0)
+
+        # 스냅샷 이전 포인트 삭제도 잔액이 바뀌었으므로 저장
+        self.add_point(5, 300)
+        self.assertEqual(balances.snapshot(), 1)
+        point.delete()
+        self.assertEqual(balances.snapshot(), 1)
+        self.assertEqual(balances.verify(), [])
+
+        snapshots.update(created_at=timezone.now() - timedelta(days=100))
+        call_command("point_balance", "prune", "--days", "90", stdout=StringIO())
+        self.assertEqual(
+            sorted(snapshots.values_list("user_id", "balance")), sorted([(self.user.pk, 300), (other.pk, 500)])
+        )
+        self.assertEqual(balances.verify(), [])
+
+    def test_point_statistics(self):
+        """
+        일별 집계로 날짜별, 이번 달 적립, 차감 합계 조회 (작년 같은 달 포인트 제외)
+        """
+        today = timezone.now().date()
+        self.add_point(5, 1000)
+        self.add_point(7, 300)
+        self.add_point(7, 200)
+        users.models.Point.objects.create(
+            user=self.user, point_type_id=5, point=5000, date=today.replace(year=today.year - 1, day=1)
+        )
+        rollup = users.models.PointDailyRollup.objects.get(user=self.user, date=today, point_type_id=7)
+        self.assertEqual((rollup.total, rollup.count), (500, 2))
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("point_date_statistic", kwargs={"date": today.isoformat()}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data,
+            {"day_plus": 1000, "day_minus": 500, "month_plus": 1000, "month_minus": 500, "total_point": 5500},
+        )
+        response = self.client.get(reverse("point_date_statistic", kwargs={"date": "2023-13-01"}))
+        self.assertEqual(response.status_code, 400)
+
+    def test_point_calendar(self):
+        """
+        월별 포인트 달력, 포인트 추가 시 캐시 무효화
+        """
+        today = timezone.now().date()
+        self.add_point(5, 1000)
+        self.add_point(7, 300)
+        self.client.force_authenticate(self.user)
+        url = reverse("point_calendar", kwargs={"year": today.year, "month": today.month})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        days = {day["date"]: day for day in response.data["days"]}
+        self.assertEqual(len(days), calendar.monthrange(today.year, today.month)[1])
+        self.assertEqual(days[today.isoformat()], {"date": today.isoformat(), "plus": 1000, "minus": 300, "count": 2})
+        self.assertEqual((response.data["month_plus"], response.data["month_minus"]), (1000, 300))
+
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        self.add_point(1, 100)
+        response = self.client.get(url)
+        self.assertEqual(response.data["month_plus"], 1100)
+        response = self.client.get(reverse("point_calendar", kwargs={"year": today.year, "month": 13}))
+        self.assertEqual(response.status_code, 400)
+
+    def test_issue_points(self):
+        """
+        캠페인 포인트 대량 지급, 같은 캠페인은 다시 실행해도 한번만 지급
+        """
+        self.add_point(5, 1000)
+        user_ids = [self.user.pk, self.another_user.pk, self.kakao_user.pk]
+        call_command(
+            "issue_points", "welcome", "500", "--type", "5", "--user", *map(str, user_ids), "--batch-size", "2",
+            stdout=StringIO(),
+        )
+        self.assertEqual(users.models.PointBalance.objects.get_balance(self.user.pk), 1500)
+        self.assertEqual(users.models.PointBalance.objects.get_balance(self.another_user.pk), 500)
+
+        out = StringIO()
+        call_command("issue_points", "welcome", "500", "--type", "5", "--user", *map(str, user_ids), stdout=out)
+        self.assertIn("3명 중 0명 지급", out.getvalue())
+        self.assertEqual(users.models.Point.objects.filter(campaign="welcome").count(), 3)
+        self.assertEqual(users.models.PointBalance.objects.verify(full=True), [])
+        with self.assertRaises(ValueError):
+            users.models.Point.objects.issue("welcome", 7, [(self.user.pk, 100)])
+
+    def test_issue_points_query_count(self):
+        """
+        묶음마다 잔액, 일별 집계를 UPDATE 한번으로 반영 (유저 수와 관계없이 쿼리 수 일정)
+        """
+        user_ids = [
+            users.models.User.objects.create_user(
+                f"campaign{index}@naver.com", f"campaign{chr(97 + index // 26)}{chr(97 + index % 26)}", "Test123456!"
+            ).pk
+            for index in range(30)
+        ]
+        users.models.PointBalance.objects.rebuild(user_ids[:20])
+
+        def issue(campaign, ids):
+            with CaptureQueriesContext(connection) as queries:
+                processed, issued = users.models.Point.objects.issue(campaign, 5, [(user_id, 100) for user_id in ids])
+            self.assertEqual(issued, len(ids))
+            return len(queries)
+
+        self.assertLessEqual(issue("first", user_ids), 20)
+        self.assertEqual(issue("second", user_ids), issue("third", user_ids[:10]))
+        self.assertEqual(users.models.PointBalance.objects.get_balance(user_ids[0]), 300)
+        self.assertEqual(users.models.PointBalance.objects.verify(full=True), [])
+
+    def test_issue_points_large_chunk(self):
+        """
+        한 묶음에 1000명 이상 지급해도 쿼리 식이 SQLite 제한(깊이 1000)을 넘지 않음
+        """
+        users.models.User.objects.bulk_create(
+            [
+                users.models.User(email=f"bulk{index}@naver.com", nickname="bulk", password="!")
+                for index in range(1200)
+            ]
+        )
+        user_ids = list(
+            users.models.User.objects.filter(email__startswith="bulk").order_by("pk").values_list("pk", flat=True)
+        )
+        processed, issued = users.models.Point.objects.issue("large", 5, [(user_id, 100) for user_id in user_ids], batch_size=1200)
+        self.assertEqual((processed, issued), (1200, 1200))
+        processed, issued = users.models.Point.objects.issue("large", 5, [(user_id, 100) for user_id in user_ids], batch_size=1200)
+        self.assertEqual((processed, issued), (1200, 0))
+        self.assertEqual(users.models.PointBalance.objects.get_balance(user_ids[-1]), 100)
+        self.assertEqual(users.models.PointBalance.objects.verify(full=True), [])
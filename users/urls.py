@@ -16,6 +16,7 @@ from .views import (
     CustomTokenObtainPairView,
     PointView,
     PointStatisticView,
+    PointCalendarView,
     SubscribeView,
     ReviewListAPIView,
     WishListAPIView,
@@ -30,13 +31,17 @@ from .views import (
 from .orderviews import (
     CartView,
     CartDetailView,
+    CartReservationView,
+    CartQuoteView,
     BillView,
     BillDetailView,
     OrderCreateView,
     OrderListView,
+    SellerOrderDashboardView,
     OrderDetailView,
     StatusCategoryView,
-    StatusChangeView
+    StatusChangeView,
+    BulkStatusChangeView,
 )
 from users.crontab import CrontabView
 
@@ -110,6 +115,10 @@ urlpatterns += [
     path("carts/delete/", CartView.as_view(), name="cart_delete_view"),
     # 장바구니 수량 변경
     path("carts/<int:pk>/", CartDetailView.as_view(), name="cart_detail_view"),
+    # 장바구니 상품 재고 선점, 선점 해제
+    path("carts/reserve/", CartReservationView.as_view(), name="cart_reserve_view"),
+    # 장바구니 결제 금액, 포인트 잔액, 재고 상태 조회
+    path("carts/quote/", CartQuoteView.as_view(), name="cart_quote_view"),
     # 주문 상태 생성
     path("status/", StatusCategoryView.as_view(), name="status_category_view"),
     # 주문 내역 생성, 조회
@@ -120,12 +129,16 @@ urlpatterns += [
     path("bills/<int:bill_id>/orders/",OrderCreateView.as_view(),name="order_create_view"),
     # 판매자별 주문 목록 조회
     path("orders/products/", OrderListView.as_view(), name="seller_order_list_view"),
+    # 판매자 주문 대시보드
+    path("orders/seller/", SellerOrderDashboardView.as_view(), name="seller_order_dashboard_view"),
     # 상품별 주문 목록 조회
     path("orders/products/<int:product_id>/",OrderListView.as_view(),name="order_list_view"),
     # 주문 상세 조회
     path("orders/<int:pk>/", OrderDetailView.as_view(), name="order_detail_view"),
     # 주문 상태 변경 ()
     path("orders/status/<int:pk>/", StatusChangeView.as_view(), name="status_change_view"),
+    # 주문 상태 일괄 변경
+    path("orders/status/", BulkStatusChangeView.as_view(), name="bulk_status_change_view"),
 ]
 
 """
@@ -135,6 +148,7 @@ PointAPI
 urlpatterns += [
     # 포인트 보기
     path("points/<str:date>/statistic/",PointStatisticView.as_view(),name="point_date_statistic"),
+    path("points/calendar/<int:year>/<int:month>/",PointCalendarView.as_view(),name="point_calendar"),
     path("points/<str:date>/", PointView.as_view(), name="point_date_view"),
     # 출석용 포인트
     path("attendance/", PointAttendanceView.as_view(), name="point_attendance_view"),
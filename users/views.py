@@ -6,20 +6,24 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.db.utils import IntegrityError
-from django.db.models import Sum
 from datetime import timedelta
 from django.db import transaction
 from django.http import JsonResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .cache import PointCalendarCache
 from django.db.models import Count
 from django.views.generic import TemplateView
 from products.models import Product, Review
 from .validated import ValidatedData, EmailService
+from config.pagination import KeysetPagination
 from .models import (
     User,
     Delivery,
     Seller,
     Point,
+    PointBalance,
+    PointDailyRollup,
     Subscribe,
     PayTransaction,
     PhoneVerification,
@@ -641,6 +645,7 @@ class FollowAPIView(APIView):
 class PointView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = PointSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         date = self.kwargs.get("date")
@@ -653,54 +658,29 @@ class PointStatisticView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, date):
-        # 포인트 총합 계산
-        """포인트 종류: 출석(1), 텍스트리뷰(2), 포토리뷰(3), 구매(4), 충전(5), 구독권이용료(6), 결제(7), 정산(8), 환불(9)"""
-        day_plus_point = (
-            Point.objects.filter(user_id=request.user.id)
-                .filter(point_type__in=[1, 2, 3, 4, 5, 8, 9])
-                .filter(date=date)
-                .aggregate(total=Sum("point"))
-        )
-        day_minus_point = (
-            Point.objects.filter(user_id=request.user.id)
-                .filter(point_type__in=[6, 7])
-                .filter(date=date)
-                .aggregate(total=Sum("point"))
-        )
-        plus_point = (
-            day_plus_point["total"] if day_plus_point["total"] is not None else 0
-        )
-        minus_point = (
-            day_minus_point["total"] if day_minus_point["total"] is not None else 0
-        )
-
-        month_plus_point = (
-            Point.objects.filter(user_id=request.user.id)
-                .filter(point_type__in=[1, 2, 3, 4, 5, 8, 9])
-                .filter(date__month=timezone.now().date().month)
-                .aggregate(total=Sum("point"))
-        )
-        month_minus_point = (
-            Point.objects.filter(user_id=request.user.id)
-                .filter(point_type__in=[6, 7])
-                .filter(date__month=timezone.now().date().month)
-                .aggregate(total=Sum("point"))
-        )
-        month_plus = (
-            month_plus_point["total"] if month_plus_point["total"] is not None else 0
-        )
-        month_minus = (
-            month_minus_point["total"] if month_minus_point["total"] is not None else 0
-        )
+        """
+        date 의 적립, 차감 합계, 이번 달 적립, 차감 합계, 포인트 잔액
+        포인트 종류: 출석(1), 텍스트리뷰(2), 포토리뷰(3), 구매(4), 충전(5), 구독권이용료(6), 결제(7), 정산(8), 환불(9)
+        """
+        try:
+            day = parse_date(date)
+        except ValueError:
+            day = None
+        if day is None:
+            return Response({"message": "날짜 형식(YYYY-MM-DD)이 올바르지 않습니다."}, status.HTTP_400_BAD_REQUEST)
 
+        # 잔액 조회 시 일별 집계가 없다면 함께 생성
         total_point = PointStatisticView.get_total_point(request.user)
+        month_start = timezone.now().date().replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+        statistics = PointDailyRollup.objects.get_statistics(request.user.id, day, month_start, month_end)
 
         return Response(
             {
-                "day_plus": plus_point,
-                "day_minus": minus_point,
-                "month_plus": month_plus,
-                "month_minus": month_minus,
+                "day_plus": statistics["day_plus"],
+                "day_minus": statistics["day_minus"],
+                "month_plus": statistics["month_plus"],
+                "month_minus": statistics["month_minus"],
                 "total_point": total_point,
             },
             status=status.HTTP_200_OK,
@@ -708,28 +688,44 @@ class PointStatisticView(APIView):
 
     @classmethod
     def get_total_point(self, user):
-        total_plus_point = (
-            Point.objects.filter(user_id=user.id)
-                .filter(point_type__in=[1, 2, 3, 4, 5, 8, 9])
-                .aggregate(total=Sum("point"))
-        )
+        # 포인트 잔액(PointBalance) 기본키 조회
+        return PointBalance.objects.get_balance(user.id)
 
-        total_minus_point = (
-            Point.objects.filter(user_id=user.id)
-                .filter(point_type__in=[6, 7])
-                .aggregate(total=Sum("point"))
-        )
 
-        try:
-            total_point = total_plus_point["total"] - total_minus_point["total"]
-        except TypeError:
-            total_point = (
-                total_plus_point["total"]
-                if total_plus_point["total"] is not None
-                else 0
-            )
+class PointCalendarView(APIView):
+    """
+    월별 포인트 달력 (날짜별 적립, 차감 합계, 포인트 수)
+    일별 집계(PointDailyRollup) 쿼리 한번, (사용자, 월)별 캐시 (포인트 추가 시 무효화)
+    """
 
-        return total_point
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, year, month):
+        if not 1 <= month <= 12 or not 1 <= year < 9999:
+            return Response({"message": "올바르지 않은 월입니다."}, status.HTTP_400_BAD_REQUEST)
+        user = request.user
+        data = PointCalendarCache.get_or_build(user.pk, year, month, lambda: self.build(user, year, month))
+        return Response(data, status=status.HTTP_200_OK)
+
+    def build(self, user, year, month):
+        start = timezone.now().date().replace(year=year, month=month, day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        # 잔액이 없다면 잔액, 일별 집계 함께 생성
+        PointBalance.objects.get_balance(user.pk)
+        calendar = PointDailyRollup.objects.get_calendar(user.pk, start, end)
+
+        days = []
+        for offset in range((end - start).days):
+            day = start + timedelta(days=offset)
+            plus, minus, entries = calendar.get(day, (0, 0, 0))
+            days.append({"date": day.isoformat(), "plus": plus, "minus": minus, "count": entries})
+        return {
+            "year": year,
+            "month": month,
+            "month_plus": sum(day["plus"] for day in days),
+            "month_minus": sum(day["minus"] for day in days),
+            "days": days,
+        }
 
 
 """포인트 종류: 출석(1)"""